@@ -1,11 +1,14 @@
 from flask import Flask
 from flask_login import LoginManager
+import click
 import logging
 import os
+import threading
 from config import config
 from models import db
 from models.usuario import Usuario
 from flask_cors import CORS  # Importar CORS
+from utils.serializacion import ProveedorJSON
 
 def create_app(config_name='default'):
     """
@@ -19,6 +22,9 @@ def create_app(config_name='default'):
     """
     app = Flask(__name__)
     
+    # Serialización JSON rápida (orjson si está instalado), con fechas en ISO 8601
+    app.json = ProveedorJSON(app)
+    
     # Cargar configuración
     app.config.from_object(config[config_name])
     config[config_name].init_app(app)
@@ -101,6 +107,24 @@ def initialize_extensions(app):
     @login_manager.user_loader
     def load_user(user_id):
         return Usuario.query.get(int(user_id))
+    
+    # Inicializar el ejecutor de tareas en segundo plano
+    # (importar procesamiento registra los manejadores de tareas)
+    from utils import tareas, procesamiento, planificador
+    tareas.init_app(app)
+    
+    # Paquetes de estáticos con huella (asset_url en plantillas)
+    from utils import assets
+    assets.init_app(app)
+    
+    # Caché de páginas, fragmentos y bytecode de plantillas
+    from utils import cache
+    cache.init_app(app)
+    
+    # Bus de eventos en vivo (/api/eventos); se importa después de la caché para
+    # que sus eventos se publiquen cuando las cachés ya están invalidadas
+    from utils import eventos
+    eventos.init_app(app)
 
 def register_blueprints(app):
     """Registra los blueprints de la aplicación"""
@@ -150,6 +174,144 @@ def register_commands(app):
         
         print(f"Usuario administrador {email} creado correctamente")
 
+    @app.cli.command("seed")
+    @click.option('--reclutas', default=1000, show_default=True, help='Número de reclutas a generar')
+    @click.option('--entrevistas-per', default=1, show_default=True, help='Entrevistas por recluta')
+    @click.option('--asesores', default=5, show_default=True, help='Número de asesores a generar')
+    @click.option('--documentos', default=0, show_default=True, help='Documentos PDF por recluta')
+    @click.option('--semilla', default=42, show_default=True, help='Semilla para datos deterministas')
+    @click.option('--chunk-size', default=5000, show_default=True, help='Filas por transacción')
+    @click.option('--archivos/--sin-archivos', default=False, help='Crear archivos PDF de ejemplo en disco')
+    def seed(reclutas, entrevistas_per, asesores, documentos, semilla, chunk_size, archivos):
+        """Genera datos sintéticos para pruebas de carga y capacidad"""
+        import time
+        from utils.seeder import sembrar_datos
+        
+        inicio = time.perf_counter()
+        resultado = sembrar_datos(
+            reclutas=reclutas,
+            entrevistas_por_recluta=entrevistas_per,
+            asesores=asesores,
+            documentos=documentos,
+            semilla=semilla,
+            chunk_size=chunk_size,
+            crear_archivos=archivos
+        )
+        
+        print(f"Datos generados en {time.perf_counter() - inicio:.1f}s: {resultado}")
+
+    @app.cli.command("imagenes-variantes")
+    @click.option('--workers', default=None, type=int, help='Procesos en paralelo (por defecto, uno por CPU)')
+    @click.option('--forzar', is_flag=True, help='Regenerar variantes aunque ya existan')
+    def imagenes_variantes(workers, forzar):
+        """Genera las miniaturas de las fotos subidas anteriormente"""
+        from concurrent.futures import ProcessPoolExecutor
+        from functools import partial
+        from models.recluta import Recluta
+        from utils.imagenes import rutas_variantes, procesar_variantes
+        from utils.almacenamiento import ruta_absoluta
+        
+        # Reunir las fotos referenciadas (sin duplicados: el contenido puede estar compartido)
+        rutas = set()
+        for modelo in (Recluta, Usuario):
+            consulta = db.session.query(modelo.foto_url).filter(modelo.foto_url.isnot(None)).distinct()
+            for (foto_url,) in consulta:
+                if rutas_variantes(foto_url) and os.path.exists(ruta_absoluta(foto_url)):
+                    rutas.add(ruta_absoluta(foto_url))
+        
+        print(f"Procesando {len(rutas)} imágenes...")
+        generadas = errores = 0
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            tarea = partial(procesar_variantes, forzar=forzar)
+            for ruta, cantidad, error in executor.map(tarea, sorted(rutas), chunksize=16):
+                if error:
+                    errores += 1
+                    print(f"Error en {ruta}: {error}")
+                generadas += cantidad
+        
+        print(f"Variantes generadas: {generadas}. Imágenes con error: {errores}")
+
+    @app.cli.command("uploads-gc")
+    @click.option('--gracia-horas', default=None, type=float, help='Antigüedad mínima de un archivo para recolectarlo')
+    @click.option('--dry-run', is_flag=True, help='Sólo reportar los huérfanos, sin modificar nada')
+    @click.option('--cuarentena/--eliminar', default=None, help='Mover los huérfanos a uploads/.cuarentena o borrarlos')
+    def uploads_gc(gracia_horas, dry_run, cuarentena):
+        """Elimina los archivos de uploads que ya no referencia ninguna fila"""
+        from utils.recolector import recolectar_huerfanos
+        
+        if gracia_horas is None:
+            gracia_horas = app.config['UPLOADS_GC_GRACIA_HORAS']
+        if cuarentena is None:
+            cuarentena = app.config['UPLOADS_GC_CUARENTENA']
+        
+        resumen = recolectar_huerfanos(gracia_horas=gracia_horas, dry_run=dry_run, cuarentena=cuarentena)
+        print(f"Resumen: {resumen}")
+
+    @app.cli.command("static-comprimir")
+    @click.option('--forzar', is_flag=True, help='Regenerar aunque las versiones comprimidas estén al día')
+    def static_comprimir(forzar):
+        """Genera versiones .gz/.br de los archivos estáticos para servirlas sin comprimir por petición"""
+        from utils.compresion import precomprimir_directorio
+        
+        generados = precomprimir_directorio(app.static_folder, excluir=('uploads',), forzar=forzar)
+        print(f"Archivos comprimidos generados: {generados}")
+
+    @app.cli.command("assets-build")
+    def assets_build():
+        """Empaqueta y minifica JS y CSS en static/dist con nombres con huella de contenido"""
+        from utils.assets import construir_assets, DIRECTORIO_DIST
+        from utils.compresion import precomprimir_directorio
+        
+        construir_assets(app.static_folder)
+        generados = precomprimir_directorio(os.path.join(app.static_folder, DIRECTORIO_DIST))
+        print(f"Paquetes generados. Versiones comprimidas: {generados}")
+
+    @app.cli.command("programacion-benchmark")
+    @click.option('--candidatos', default=10000, show_default=True, help='Número de candidatos a programar')
+    @click.option('--asesores', default=50, show_default=True, help='Asesores disponibles')
+    @click.option('--salas', default=50, show_default=True, help='Salas disponibles (0 = sin sala)')
+    @click.option('--dias', default=20, show_default=True, help='Días del rango')
+    @click.option('--duracion', default=30, show_default=True, help='Minutos por entrevista')
+    def programacion_benchmark(candidatos, asesores, salas, dias, duracion):
+        """Mide la asignación de la programación masiva con datos sintéticos en memoria"""
+        from utils.planificador import benchmark
+        
+        resultado = benchmark(candidatos=candidatos, asesores=asesores, salas=salas, dias=dias, duracion=duracion)
+        print(f"Programación masiva: {resultado}")
+
+    @app.cli.command("recordatorios")
+    @click.option('--horas', default=None, type=float, help='Ventana de entrevistas (por defecto RECORDATORIOS_HORAS_ANTES)')
+    @click.option('--solo-generar', is_flag=True, help='Escribir en la bandeja de salida sin enviar')
+    def recordatorios(horas, solo_generar):
+        """Genera los recordatorios de las próximas entrevistas y envía la bandeja de salida"""
+        from utils.recordatorios import generar_recordatorios, enviar_pendientes
+        
+        generados = generar_recordatorios(horas=horas)
+        print(f"Recordatorios generados: {generados}")
+        if not solo_generar:
+            print(f"Envío: {enviar_pendientes()}")
+
+    @app.cli.command("historial-reconstruir")
+    def historial_reconstruir():
+        """Genera el historial de estados aproximado de los reclutas que no lo tienen"""
+        from utils.historial import reconstruir_historial
+        
+        agregadas = reconstruir_historial()
+        db.session.commit()
+        print(f"Filas de historial agregadas: {agregadas}")
+
+    @app.cli.command("uploads-particionar")
+    @click.option('--workers', default=8, type=int, help='Hilos para calcular hashes y mover archivos')
+    @click.option('--lote', default=1000, type=int, help='Referencias reescritas por cada UPDATE')
+    def uploads_particionar(workers, lote):
+        """Mueve los uploads existentes al esquema de directorios particionado por hash"""
+        import time
+        from utils.migracion_uploads import migrar_uploads
+        
+        inicio = time.perf_counter()
+        resumen = migrar_uploads(workers=workers, lote=lote)
+        print(f"Migración completada en {time.perf_counter() - inicio:.1f}s: {resumen}")
+
 def register_error_handlers(app):
     """Registra los manejadores de errores HTTP"""
     @app.errorhandler(404)
@@ -171,6 +333,24 @@ def register_error_handlers(app):
 
 def register_request_hooks(app):
     """Registra ganchos de petición (before/after request)"""
+    # Compresión de respuestas; se registra primero para ejecutarse al final de after_request
+    from utils import compresion
+    compresion.init_app(app)
+    
+    # Las tareas en segundo plano arrancan con la primera petición y no al
+    # crear la app, para que los comandos `flask ...` no las lancen
+    arranque = threading.Lock()
+    
+    @app.before_request
+    def iniciar_tareas():
+        """Inicia una sola vez las tareas en segundo plano del proceso"""
+        if 'tareas_iniciadas' in app.extensions:
+            return
+        with arranque:
+            if 'tareas_iniciadas' not in app.extensions:
+                app.extensions['tareas_iniciadas'] = True
+                iniciar_segundo_plano(app)
+    
     @app.before_request
     def log_request_info():
         """Log de información básica de la petición"""
@@ -188,8 +368,10 @@ def register_request_hooks(app):
 
 def initialize_database(app):
     """Inicializa la base de datos y crea datos iniciales"""
-    # Crear tablas
+    # Crear tablas y agregar a las existentes las columnas e índices nuevos
     db.create_all()
+    from utils.esquema import actualizar_esquema
+    actualizar_esquema()
     
     # Crear usuario admin por defecto si no existe
     admin_email = 'admin@example.com'
@@ -209,4 +391,26 @@ def initialize_database(app):
         db.session.commit()
         app.logger.info(f'Usuario admin2 creado: {admin2_email}')
     
-    app.logger.info('Base de datos inicializada correctamente')
\ No newline at end of file
+    app.logger.info('Base de datos inicializada correctamente')
+
+def iniciar_segundo_plano(app):
+    """
+    Reanuda las tareas interrumpidas y arranca las tareas periódicas.
+    
+    Se llama con la primera petición de cada proceso servidor; los comandos
+    CLI no la ejecutan, así que no re-despachan tareas que quizá sigue
+    ejecutando el servidor.
+    """
+    # Reanudar las tareas en segundo plano que quedaron sin terminar
+    from utils.tareas import recuperar_tareas, programar_periodica
+    recuperar_tareas(app)
+    
+    # Recolección periódica de archivos huérfanos (desactivada por defecto)
+    if app.config.get('UPLOADS_GC_INTERVALO_HORAS'):
+        from utils.recolector import recolectar_programado
+        programar_periodica(app, 'uploads-gc', app.config['UPLOADS_GC_INTERVALO_HORAS'] * 3600, recolectar_programado)
+    
+    # Recordatorios de entrevistas (desactivados por defecto)
+    if app.config.get('RECORDATORIOS_INTERVALO_MINUTOS'):
+        from utils.recordatorios import ciclo_recordatorios
+        programar_periodica(app, 'recordatorios', app.config['RECORDATORIOS_INTERVALO_MINUTOS'] * 60, ciclo_recordatorios)
\ No newline at end of file
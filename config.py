@@ -40,6 +40,88 @@ class Config:
     # Configuración CORS (nueva)
     CORS_ENABLED = True
     
+    # Tareas en segundo plano (procesamiento posterior a los uploads)
+    TAREAS_MAX_WORKERS = int(os.environ.get('TAREAS_MAX_WORKERS', 4))
+    TAREAS_TIMEOUT = 600  # Segundos antes de considerar abandonada una tarea en proceso
+    TAREAS_SINCRONAS = False
+    
+    # Descarga de documentos: None (Flask), 'x-sendfile' o 'x-accel' (nginx)
+    DESCARGAS_OFFLOAD = os.environ.get('DESCARGAS_OFFLOAD') or None
+    DESCARGAS_X_ACCEL_PREFIX = os.environ.get('DESCARGAS_X_ACCEL_PREFIX', '/uploads-protegidos/')
+    DESCARGAS_MAX_AGE = 3600  # Segundos de caché privada en el navegador
+    
+    # Carga de documentos por fragmentos
+    MAX_DOCUMENTO_SIZE = 100 * 1024 * 1024  # 100MB por documento
+    CARGAS_TAMANO_FRAGMENTO = 1024 * 1024  # 1MB por petición (muy por debajo de MAX_CONTENT_LENGTH)
+    
+    # Recolección de archivos huérfanos en uploads (flask uploads-gc)
+    UPLOADS_GC_GRACIA_HORAS = 24  # Antigüedad mínima para recolectar un archivo
+    UPLOADS_GC_CUARENTENA = True  # Mover a uploads/.cuarentena en lugar de borrar
+    UPLOADS_GC_INTERVALO_HORAS = float(os.environ.get('UPLOADS_GC_INTERVALO_HORAS', 0))  # 0 = sin ejecución periódica
+    
+    # Máximo de sub-peticiones por llamada a /api/batch
+    BATCH_MAX_PETICIONES = 10
+    
+    # Máximo de IDs explícitos en operaciones en lote sobre reclutas
+    BULK_MAX_IDS = 1000
+    
+    # Compresión de respuestas (gzip, y brotli si está instalado)
+    COMPRESION_HABILITADA = True
+    COMPRESION_TAMANO_MINIMO = 500  # Bytes; las respuestas más pequeñas se envían sin comprimir
+    COMPRESION_NIVEL_GZIP = 6
+    COMPRESION_NIVEL_BROTLI = 5
+    
+    # Usar los paquetes de static/dist (flask assets-build) si existe el manifiesto
+    ASSETS_USAR_BUNDLE = True
+    
+    # Caché en memoria por proceso (páginas públicas, fragmentos de plantilla y consultas)
+    CACHE_HABILITADA = True  # Páginas y fragmentos; las cachés de consultas se invalidan al escribir
+    CACHE_MAX_ENTRADAS = 512  # Límite de entradas por worker (LRU)
+    CACHE_TTL = 300  # Segundos por defecto
+    CACHE_PAGINAS_TTL = 600
+    CACHE_FRAGMENTOS_TTL = 3600
+    CACHE_PAGINA_MAX_BYTES = 512 * 1024  # Las páginas más grandes no se cachean
+    CACHE_VERSION = os.environ.get('APP_VERSION')  # Versión de despliegue; si falta se usa la huella de los assets
+    JINJA_BYTECODE_CACHE_DIR = os.path.join(APP_DIR, '.jinja_cache')
+    CALENDARIO_CACHE_TTL = 60  # Segundos; otros workers ven los cambios como mucho con este retraso
+    
+    # Rango máximo del reporte de entrevistas solapadas (/api/entrevistas/conflictos)
+    AGENDA_MAX_DIAS_REPORTE = 366
+    
+    # Horario laboral de los asesores por día de la semana (0 = lunes), en bloques HH:MM
+    HORARIO_LABORAL = {
+        dia: [('09:00', '14:00'), ('15:00', '18:00')] for dia in range(5)
+    }
+    DISPONIBILIDAD_MAX_DIAS = 62  # Rango máximo de /api/disponibilidad
+    DISPONIBILIDAD_CACHE_TTL = 300  # Segundos de caché de los huecos de cada asesor y día
+    ESTADISTICAS_CACHE_TTL = 120  # Segundos de caché de las estadísticas del panel (global, por asesor y desglose)
+    
+    # Programación masiva de entrevistas (POST /api/entrevistas/programacion)
+    PROGRAMACION_MAX_RECLUTAS = 10000
+    PROGRAMACION_MAX_DIAS = 62
+    
+    # Eventos en vivo del dashboard (/api/eventos, Server-Sent Events)
+    EVENTOS_HEARTBEAT = 15  # Segundos entre comentarios de keep-alive
+    EVENTOS_DURACION_MAXIMA = 1800  # Segundos antes de cerrar el flujo (el navegador se reconecta)
+    EVENTOS_MAX_CONEXIONES = 200  # Flujos abiertos por proceso; cada uno ocupa un hilo
+    EVENTOS_HISTORIAL = 200  # Eventos recientes reenviados al reconectar con Last-Event-ID
+    EVENTOS_CAPACIDAD_COLA = 100  # Eventos pendientes por cliente antes de pedirle una recarga
+    EVENTOS_REINTENTO_MS = 3000
+    
+    # Recordatorios de entrevistas (bandeja de salida mensaje_saliente)
+    RECORDATORIOS_HORAS_ANTES = 24  # Ventana de entrevistas a recordar
+    RECORDATORIOS_INTERVALO_MINUTOS = float(os.environ.get('RECORDATORIOS_INTERVALO_MINUTOS', 0))  # 0 = sin ejecución periódica
+    MENSAJES_DESPACHADOR = os.environ.get('MENSAJES_DESPACHADOR', 'log')  # log, archivo o smtp
+    MENSAJES_DIRECTORIO = os.path.join(APP_DIR, 'instance', 'mensajes')  # Despachador 'archivo'
+    MENSAJES_REMITENTE = os.environ.get('MENSAJES_REMITENTE', 'no-reply@ejemplo.com')
+    MENSAJES_MAX_INTENTOS = 5
+    MENSAJES_TIMEOUT_RECLAMO = 600  # Segundos antes de volver a reclamar un mensaje en envío
+    SMTP_HOST = os.environ.get('SMTP_HOST', 'localhost')
+    SMTP_PUERTO = int(os.environ.get('SMTP_PUERTO', 1025))  # 1025: servidor local de depuración
+    SMTP_USUARIO = os.environ.get('SMTP_USUARIO')
+    SMTP_PASSWORD = os.environ.get('SMTP_PASSWORD')
+    SMTP_TLS = os.environ.get('SMTP_TLS', '').lower() in ('1', 'true', 'si')
+    
     @staticmethod
     def init_app(app):
         """Inicialización para la configuración base"""
@@ -65,6 +147,12 @@ class DevelopmentConfig(Config):
     
     # Nivel de log para desarrollo
     LOG_LEVEL = "DEBUG"
+    
+    # En desarrollo se cargan los módulos sin empaquetar para ver los cambios al instante
+    ASSETS_USAR_BUNDLE = False
+    
+    # Las plantillas cambian constantemente durante el desarrollo
+    CACHE_HABILITADA = False
 
 class TestingConfig(Config):
     """Configuración para entorno de pruebas"""
@@ -80,6 +168,16 @@ class TestingConfig(Config):
     
     # Deshabilitar protección de contraseña para pruebas más rápidas
     BCRYPT_LOG_ROUNDS = 4
+    
+    # Ejecutar las tareas en segundo plano en línea para resultados deterministas
+    TAREAS_SINCRONAS = True
+    
+    # Sin caché de páginas ni bytecode en disco durante las pruebas
+    CACHE_HABILITADA = False
+    JINJA_BYTECODE_CACHE_DIR = None
+    
+    # Los recordatorios se escriben como ficheros .eml
+    MENSAJES_DESPACHADOR = 'archivo'
 
 class ProductionConfig(Config):
     """Configuración para entorno de producción"""
@@ -96,6 +194,9 @@ class ProductionConfig(Config):
     # Nivel de log para producción
     LOG_LEVEL = "ERROR"
     
+    # Recordatorios por SMTP real (SMTP_HOST, SMTP_PUERTO, SMTP_USUARIO...)
+    MENSAJES_DESPACHADOR = os.environ.get('MENSAJES_DESPACHADOR', 'smtp')
+    
     # Configuración CORS para producción
     # Lista de orígenes permitidos (dominios externos que pueden acceder a la API)
     CORS_ORIGINS = os.environ.get('CORS_ORIGINS', '').split(',') or [
@@ -25,4 +25,9 @@ from models.usuario import Usuario
 from models.recluta import Recluta
 from models.entrevista import Entrevista 
 from models.user_session import UserSession
-from models.documento import Documento 
\ No newline at end of file
+from models.documento import Documento
+from models.archivo import Archivo
+from models.tarea import Tarea
+from models.carga_documento import CargaDocumento
+from models.mensaje_saliente import MensajeSaliente
+from models.recluta_estado_historial import ReclutaEstadoHistorial
\ No newline at end of file
@@ -0,0 +1,33 @@
+from datetime import datetime
+from models import db
+
+class Archivo(db.Model):
+    """
+    Modelo para los archivos subidos, almacenados por contenido (SHA-256).
+
+    Cada ruta física se comparte entre todas las referencias con el mismo
+    contenido (Documento.url, Recluta.foto_url, Usuario.foto_url) y sólo se
+    elimina del disco cuando el contador de referencias llega a cero.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    sha256 = db.Column(db.String(64), nullable=False, index=True)
+    ruta = db.Column(db.String(500), unique=True, nullable=False)
+    tamaño = db.Column(db.Integer)  # Tamaño en bytes
+    referencias = db.Column(db.Integer, nullable=False, default=0)
+    fecha_creacion = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def serialize(self):
+        """Retorna una representación serializable del archivo"""
+        return {
+            'id': self.id,
+            'sha256': self.sha256,
+            'ruta': self.ruta,
+            'tamaño': self.tamaño,
+            'referencias': self.referencias,
+            'fecha_creacion': self.fecha_creacion
+        }
+
+    @classmethod
+    def get_by_ruta(cls, ruta):
+        """Obtiene el registro de un archivo por su ruta relativa"""
+        return cls.query.filter_by(ruta=ruta).first()
@@ -0,0 +1,37 @@
+from datetime import datetime
+from models import db
+
+class CargaDocumento(db.Model):
+    """
+    Modelo para las cargas de documentos por fragmentos (reanudables).
+
+    Los bytes recibidos se escriben en un archivo temporal; al finalizar se
+    verifica el checksum y se crea el Documento.
+    """
+    id = db.Column(db.String(32), primary_key=True)  # Token hexadecimal aleatorio
+    recluta_id = db.Column(db.Integer, db.ForeignKey('recluta.id', ondelete='CASCADE'), nullable=False)
+    usuario_id = db.Column(db.Integer, db.ForeignKey('usuario.id', ondelete='CASCADE'), nullable=False)
+    nombre = db.Column(db.String(255), nullable=False)
+    tamaño_total = db.Column(db.Integer, nullable=False)
+    sha256 = db.Column(db.String(64), nullable=True)  # Checksum esperado, enviado por el cliente
+    recibido = db.Column(db.Integer, nullable=False, default=0)  # Bytes confirmados
+    fecha_creacion = db.Column(db.DateTime, default=datetime.utcnow)
+    ultima_actividad = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def serialize(self):
+        """Retorna una representación serializable de la carga"""
+        return {
+            'id': self.id,
+            'recluta_id': self.recluta_id,
+            'nombre': self.nombre,
+            'tamaño_total': self.tamaño_total,
+            'recibido': self.recibido,
+            'completa': self.recibido >= self.tamaño_total,
+            'fecha_creacion': self.fecha_creacion,
+            'ultima_actividad': self.ultima_actividad
+        }
+
+    @classmethod
+    def get_for_user(cls, carga_id, usuario_id):
+        """Obtiene una carga por su ID, sólo si pertenece al usuario"""
+        return cls.query.filter_by(id=carga_id, usuario_id=usuario_id).first()
@@ -12,6 +12,8 @@ class Documento(db.Model):
     tipo = db.Column(db.String(50), default='pdf')
     tamaño = db.Column(db.Integer)  # Tamaño en bytes
     fecha_subida = db.Column(db.DateTime, default=datetime.utcnow)
+    estado = db.Column(db.String(20), default='listo')  # procesando, listo, error
+    paginas = db.Column(db.Integer, nullable=True)
     
     def serialize(self):
         """Retorna una representación serializable del documento"""
@@ -19,12 +21,52 @@ class Documento(db.Model):
             'id': self.id,
             'recluta_id': self.recluta_id,
             'nombre': self.nombre,
-            'url': self.url,
+            'url': f"/api/documentos/{self.id}/contenido",  # Descarga con permisos; la ruta en disco no se expone
             'tipo': self.tipo,
             'tamaño': self.tamaño,
-            'fecha_subida': self.fecha_subida.isoformat() if self.fecha_subida else None
+            'fecha_subida': self.fecha_subida,
+            'estado': self.estado,
+            'paginas': self.paginas
         }
     
+    @classmethod
+    def get_by_reclutas(cls, recluta_ids, current_user=None):
+        """
+        Obtiene los documentos de varios reclutas con una sola consulta.
+        
+        Args:
+            recluta_ids: Lista de IDs de reclutas
+            current_user: Usuario que realiza la consulta (para filtrar por rol)
+            
+        Returns:
+            Lista de documentos ordenados por recluta y fecha de subida
+        """
+        query = cls.query.filter(cls.recluta_id.in_(recluta_ids))
+        
+        # Un asesor sólo puede ver documentos de sus reclutas
+        if current_user and hasattr(current_user, 'rol') and current_user.rol == 'asesor':
+            from models.recluta import Recluta
+            query = query.join(Recluta, Recluta.id == cls.recluta_id).filter(Recluta.asesor_id == current_user.id)
+        
+        return query.order_by(cls.recluta_id, cls.fecha_subida.desc()).all()
+    
+    @classmethod
+    def contar_por_recluta(cls, recluta_ids):
+        """
+        Cuenta los documentos de varios reclutas con una consulta agrupada.
+        
+        Returns:
+            dict con {recluta_id: número de documentos} (sólo reclutas con documentos)
+        """
+        if not recluta_ids:
+            return {}
+        consulta = (
+            db.select(cls.recluta_id, db.func.count(cls.id))
+            .where(cls.recluta_id.in_(recluta_ids))
+            .group_by(cls.recluta_id)
+        )
+        return dict(db.session.execute(consulta).all())
+    
     def save(self):
         """Guarda el documento en la base de datos de forma segura"""
         try:
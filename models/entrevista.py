@@ -1,4 +1,4 @@
-from datetime import datetime
+from datetime import date, datetime
 from models import db, DatabaseError
 
 class Entrevista(db.Model):
@@ -17,21 +17,32 @@ class Entrevista(db.Model):
     fecha_creacion = db.Column(db.DateTime, default=datetime.utcnow)
     ultima_actualizacion = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # Índice para las búsquedas por rango de fecha/hora (calendario, agenda y recordatorios)
+    __table_args__ = (
+        db.Index('ix_entrevista_fecha_hora_estado', 'fecha', 'hora', 'estado'),
+    )
+    
+    # Columnas que devuelve el listado (además de recluta_nombre)
+    COLUMNAS_LISTADO = (
+        'id', 'recluta_id', 'fecha', 'hora', 'duracion', 'tipo', 'ubicacion',
+        'notas', 'estado', 'fecha_creacion', 'ultima_actualizacion'
+    )
+    
     def serialize(self):
         """Retorna una representación serializable de la entrevista"""
         return {
             'id': self.id,
             'recluta_id': self.recluta_id,
             'recluta_nombre': self.recluta.nombre if self.recluta else None,
-            'fecha': self.fecha.isoformat() if self.fecha else None,
+            'fecha': self.fecha,
             'hora': self.hora,
             'duracion': self.duracion,
             'tipo': self.tipo,
             'ubicacion': self.ubicacion,
             'notas': self.notas,
             'estado': self.estado,
-            'fecha_creacion': self.fecha_creacion.isoformat() if self.fecha_creacion else None,
-            'ultima_actualizacion': self.ultima_actualizacion.isoformat() if self.ultima_actualizacion else None
+            'fecha_creacion': self.fecha_creacion,
+            'ultima_actualizacion': self.ultima_actualizacion
         }
     
     def save(self):
@@ -55,6 +66,72 @@ class Entrevista(db.Model):
             db.session.rollback()
             raise DatabaseError(f"Error al eliminar entrevista: {str(e)}")
     
+    @classmethod
+    def listar(cls, recluta_id=None):
+        """
+        Obtiene las entrevistas como filas de columnas, sin construir objetos del ORM.
+        
+        El nombre del recluta se obtiene en la misma consulta con un JOIN.
+        
+        Args:
+            recluta_id: Filtrar por recluta (opcional)
+            
+        Returns:
+            Lista de diccionarios con la misma forma que serialize()
+        """
+        from models.recluta import Recluta
+        
+        consulta = (
+            db.select(*[getattr(cls, columna) for columna in cls.COLUMNAS_LISTADO], Recluta.nombre.label('recluta_nombre'))
+            .join(Recluta, Recluta.id == cls.recluta_id)
+        )
+        if recluta_id:
+            consulta = consulta.where(cls.recluta_id == recluta_id).order_by(cls.fecha, cls.hora)
+        else:
+            consulta = consulta.order_by(cls.id)
+        
+        return [dict(fila) for fila in db.session.execute(consulta).mappings()]
+    
+    # Columnas del resumen compacto que usa el calendario
+    COLUMNAS_CALENDARIO = ('id', 'recluta_id', 'hora', 'duracion', 'tipo', 'ubicacion', 'estado')
+    
+    @classmethod
+    def resumen_mes(cls, inicio, fin, asesor_id=None):
+        """
+        Agrupa por día las entrevistas de un rango de fechas con una sola consulta.
+        
+        Args:
+            inicio: Primer día del rango (incluido)
+            fin: Día siguiente al último del rango (excluido)
+            asesor_id: Limitar a los reclutas asignados a este asesor (opcional)
+            
+        Returns:
+            dict: {'total': n, 'dias': {'YYYY-MM-DD': {'total', 'por_estado', 'entrevistas'}}}
+        """
+        from models.recluta import Recluta
+        
+        consulta = (
+            db.select(cls.fecha, *[getattr(cls, columna) for columna in cls.COLUMNAS_CALENDARIO],
+                      Recluta.nombre.label('recluta_nombre'))
+            .join(Recluta, Recluta.id == cls.recluta_id)
+            .where(cls.fecha >= inicio, cls.fecha < fin)
+            .order_by(cls.fecha, cls.hora)
+        )
+        if asesor_id:
+            consulta = consulta.where(Recluta.asesor_id == asesor_id)
+        
+        dias = {}
+        total = 0
+        for fila in db.session.execute(consulta).mappings():
+            fila = dict(fila)
+            dia = dias.setdefault(fila.pop('fecha').isoformat(), {'total': 0, 'por_estado': {}, 'entrevistas': []})
+            dia['total'] += 1
+            dia['por_estado'][fila['estado']] = dia['por_estado'].get(fila['estado'], 0) + 1
+            dia['entrevistas'].append(fila)
+            total += 1
+        
+        return {'total': total, 'dias': dias}
+    
     @classmethod
     def get_by_id(cls, entrevista_id):
         """Obtiene una entrevista por su ID"""
@@ -76,23 +153,53 @@ class Entrevista(db.Model):
         return cls.query.filter_by(fecha=date).order_by(cls.hora).all()
     
     @classmethod
-    def get_upcoming(cls, limit=5):
-        """Obtiene las próximas entrevistas pendientes"""
+    def _filtrar_por_asesor(cls, consulta, asesor_id):
+        """Limita una consulta de entrevistas a los reclutas de un asesor"""
+        from models.recluta import Recluta
+        return consulta.join(Recluta, Recluta.id == cls.recluta_id).where(Recluta.asesor_id == asesor_id)
+    
+    @classmethod
+    def get_upcoming(cls, limit=5, asesor_id=None):
+        """Obtiene las próximas entrevistas pendientes (opcionalmente de los reclutas de un asesor)"""
         today = datetime.now().date()
-        return cls.query.filter(
+        consulta = db.select(cls).where(
             cls.fecha >= today,
             cls.estado == 'pendiente'
-        ).order_by(cls.fecha, cls.hora).limit(limit).all()
+        ).order_by(cls.fecha, cls.hora).limit(limit)
+        if asesor_id:
+            consulta = cls._filtrar_por_asesor(consulta, asesor_id)
+        return db.session.scalars(consulta).all()
+    
+    @classmethod
+    def count_by_month(cls, year, asesor_id=None):
+        """
+        Cuenta las entrevistas agrupadas por mes para un año específico.
+        
+        Una sola consulta agrupada; el filtro por rango de fechas usa el índice de fecha.
+        """
+        mes = db.extract('month', cls.fecha)
+        consulta = (
+            db.select(mes, db.func.count(cls.id))
+            .where(cls.fecha >= date(year, 1, 1), cls.fecha < date(year + 1, 1, 1))
+            .group_by(mes)
+        )
+        if asesor_id:
+            consulta = cls._filtrar_por_asesor(consulta, asesor_id)
+        
+        result = {month: 0 for month in range(1, 13)}
+        for month, count in db.session.execute(consulta):
+            result[int(month)] = count
+        return result
     
     @classmethod
-    def count_by_month(cls, year):
-        """Cuenta las entrevistas agrupadas por mes para un año específico"""
-        # Esta consulta podría requerir ajustes según el motor de base de datos
-        result = {}
-        for month in range(1, 13):
-            count = cls.query.filter(
-                db.extract('year', cls.fecha) == year,
-                db.extract('month', cls.fecha) == month
-            ).count()
-            result[month] = count
-        return result
\ No newline at end of file
+    def contar_por_estado(cls, asesor_id=None):
+        """
+        Cuenta las entrevistas por estado con una sola consulta agrupada.
+        
+        Returns:
+            dict: {estado: número de entrevistas}
+        """
+        consulta = db.select(cls.estado, db.func.count(cls.id)).group_by(cls.estado)
+        if asesor_id:
+            consulta = cls._filtrar_por_asesor(consulta, asesor_id)
+        return dict(db.session.execute(consulta).all())
\ No newline at end of file
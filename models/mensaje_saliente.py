@@ -0,0 +1,44 @@
+from datetime import datetime
+from models import db
+
+class MensajeSaliente(db.Model):
+    """
+    Modelo para la bandeja de salida de mensajes (recordatorios de entrevistas).
+
+    Los mensajes se escriben aquí y un despachador los envía después. La clave
+    única hace idempotente la generación: volver a generar el mismo
+    recordatorio no crea otro mensaje. El envío se reclama con un UPDATE
+    condicional para que sólo un worker entregue cada mensaje.
+    """
+    __tablename__ = 'mensaje_saliente'
+
+    id = db.Column(db.Integer, primary_key=True)
+    clave = db.Column(db.String(120), unique=True, nullable=False)  # Clave de idempotencia
+    tipo = db.Column(db.String(30), nullable=False, default='recordatorio')
+    destinatario = db.Column(db.String(100), nullable=False)
+    asunto = db.Column(db.String(200), nullable=False)
+    cuerpo = db.Column(db.Text, nullable=False)
+    entrevista_id = db.Column(db.Integer, db.ForeignKey('entrevista.id', ondelete='SET NULL'), nullable=True)
+    estado = db.Column(db.String(20), nullable=False, default='pendiente', index=True)  # pendiente, enviando, enviado, fallido, descartado
+    intentos = db.Column(db.Integer, nullable=False, default=0)
+    reclamado_por = db.Column(db.String(64), nullable=True)  # Token del worker que lo está enviando
+    reclamado_en = db.Column(db.DateTime, nullable=True)
+    enviado_en = db.Column(db.DateTime, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    fecha_creacion = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def serialize(self):
+        """Retorna una representación serializable del mensaje"""
+        return {
+            'id': self.id,
+            'clave': self.clave,
+            'tipo': self.tipo,
+            'destinatario': self.destinatario,
+            'asunto': self.asunto,
+            'entrevista_id': self.entrevista_id,
+            'estado': self.estado,
+            'intentos': self.intentos,
+            'enviado_en': self.enviado_en,
+            'error': self.error,
+            'fecha_creacion': self.fecha_creacion
+        }
@@ -1,5 +1,7 @@
 from datetime import datetime
 from models import db, DatabaseError
+from flask import current_app
+from utils.imagenes import urls_foto
 import uuid 
 
 class Recluta(db.Model):
@@ -23,11 +25,35 @@ class Recluta(db.Model):
     asesor_id = db.Column(db.Integer, db.ForeignKey('usuario.id'), nullable=True)
     asesor = db.relationship('Usuario', backref='reclutas_asignados')
     
+    # Índice para los conteos por asesor y estado de las estadísticas (ver utils/estadisticas.py)
+    __table_args__ = (
+        db.Index('ix_recluta_asesor_estado', 'asesor_id', 'estado'),
+    )
+    
     # Relación con Documento
     documentos = db.relationship('Documento', backref='recluta', lazy='dynamic', cascade="all, delete-orphan")
     
+    # Historial de cambios de estado (ver utils/historial.py)
+    historial_estados = db.relationship('ReclutaEstadoHistorial', backref='recluta', lazy='dynamic', cascade="all, delete-orphan")
+    
+    # Columnas que puede devolver el listado (además de asesor_nombre y foto_variantes)
+    COLUMNAS_LISTADO = (
+        'id', 'nombre', 'email', 'telefono', 'estado', 'puesto', 'notas', 'folio',
+        'foto_url', 'fecha_registro', 'ultima_actualizacion', 'asesor_id'
+    )
+    
+    # Campos calculados que también se pueden pedir con fields=
+    CAMPOS_CALCULADOS = ('asesor_nombre', 'foto_variantes')
+    
+    # Proyección por defecto del listado: lo que muestran la tabla y el calendario
+    CAMPOS_LISTADO_COMPACTO = (
+        'id', 'nombre', 'email', 'telefono', 'estado', 'puesto', 'folio',
+        'foto_url', 'foto_variantes', 'asesor_id', 'asesor_nombre'
+    )
+    
     def serialize(self):
         """Retorna una representación serializable del recluta"""
+        foto_url, foto_variantes = urls_foto('recluta', self.id, self.foto_url, current_app.root_path)
         return {
             'id': self.id,
             'nombre': self.nombre,
@@ -37,13 +63,32 @@ class Recluta(db.Model):
             'puesto': self.puesto,
             'notas': self.notas,
             'folio': self.folio,
-            'foto_url': self.foto_url,
-            'fecha_registro': self.fecha_registro.isoformat() if self.fecha_registro else None,
-            'ultima_actualizacion': self.ultima_actualizacion.isoformat() if self.ultima_actualizacion else None,
+            'foto_url': foto_url,
+            'foto_variantes': foto_variantes,
+            'fecha_registro': self.fecha_registro,
+            'ultima_actualizacion': self.ultima_actualizacion,
             'asesor_id': self.asesor_id,
-            'asesor_nombre': self.asesor.nombre if self.asesor else (self.asesor.email if self.asesor else None)
+            'asesor_nombre': (self.asesor.nombre or self.asesor.email) if self.asesor else None
         }
     
+    @classmethod
+    def serializar_fila(cls, fila):
+        """
+        Serializa una fila de columnas del listado (ver listar) sin pasar por el ORM.
+        
+        Args:
+            fila: Mapeo {columna: valor} devuelto por la consulta
+            
+        Returns:
+            Diccionario con la misma forma que serialize()
+        """
+        datos = dict(fila)
+        if 'foto_url' in datos:
+            datos['foto_url'], datos['foto_variantes'] = urls_foto(
+                'recluta', datos['id'], datos['foto_url'], current_app.root_path
+            )
+        return datos
+    
     def save(self):
         """Guarda el recluta en la base de datos de forma segura"""
         try:
@@ -94,32 +139,31 @@ class Recluta(db.Model):
         return query.first()
     
     @classmethod
-    def get_all(cls, page=1, per_page=10, search=None, estado=None, sort_by='id', sort_order='asc', current_user=None):
+    def condiciones_filtro(cls, search=None, estado=None, current_user=None):
         """
-        Obtiene todos los reclutas con paginación y filtros.
+        Construye las condiciones WHERE del listado de reclutas.
+        
+        Se comparten entre la consulta paginada y las operaciones en lote, para
+        que ambas respeten los mismos filtros y la restricción por rol.
         
         Args:
-            page: Número de página
-            per_page: Elementos por página
             search: Texto para buscar en nombre, email, teléfono o puesto
             estado: Filtrar por estado
-            sort_by: Campo por el que ordenar
-            sort_order: Dirección de ordenamiento ('asc' o 'desc')
             current_user: Usuario que realiza la consulta (para filtrar por rol)
             
         Returns:
-            Objeto de paginación SQLAlchemy
+            Lista de condiciones SQLAlchemy
         """
-        query = cls.query
+        condiciones = []
         
         # Filtrar por rol si el usuario no es administrador
         if current_user and hasattr(current_user, 'rol') and current_user.rol == 'asesor':
-            query = query.filter_by(asesor_id=current_user.id)
+            condiciones.append(cls.asesor_id == current_user.id)
         
         # Aplicar filtros si existen
         if search:
             search_term = f"%{search}%"
-            query = query.filter(
+            condiciones.append(
                 db.or_(
                     cls.nombre.ilike(search_term),
                     cls.email.ilike(search_term),
@@ -129,14 +173,185 @@ class Recluta(db.Model):
             )
         
         if estado:
-            query = query.filter_by(estado=estado)
+            condiciones.append(cls.estado == estado)
+        
+        return condiciones
+    
+    @classmethod
+    def validar_campos(cls, fields):
+        """
+        Interpreta el parámetro fields= del listado.
+        
+        Args:
+            fields: Lista de campos separados por comas, 'all' o vacío
+            
+        Returns:
+            tuple: Campos a devolver (siempre incluye 'id')
+            
+        Raises:
+            ValueError: Si se pide un campo desconocido
+        """
+        if not fields:
+            return cls.CAMPOS_LISTADO_COMPACTO
+        if fields == 'all':
+            return cls.COLUMNAS_LISTADO + cls.CAMPOS_CALCULADOS
+        
+        campos = [c.strip() for c in fields.split(',') if c.strip()]
+        desconocidos = [c for c in campos if c not in cls.COLUMNAS_LISTADO + cls.CAMPOS_CALCULADOS]
+        if desconocidos:
+            raise ValueError(f"Campos desconocidos: {', '.join(desconocidos)}")
+        if 'id' not in campos:
+            campos.insert(0, 'id')
+        return tuple(campos)
+    
+    @classmethod
+    def listar(cls, page=1, per_page=10, search=None, estado=None, sort_by='id', sort_order='asc',
+               current_user=None, campos=None):
+        """
+        Obtiene una página de reclutas como filas de columnas, sin construir objetos del ORM.
+        
+        Sólo se consultan las columnas pedidas; el nombre del asesor se resuelve
+        en la misma consulta con un LEFT JOIN únicamente si se pide.
+        
+        Args:
+            page: Número de página
+            per_page: Elementos por página
+            search: Texto para buscar en nombre, email, teléfono o puesto
+            estado: Filtrar por estado
+            sort_by: Columna por la que ordenar
+            sort_order: Dirección de ordenamiento ('asc' o 'desc')
+            current_user: Usuario que realiza la consulta (para filtrar por rol)
+            campos: Campos a devolver (ver validar_campos); por defecto la proyección compacta
+            
+        Returns:
+            tuple: (lista de diccionarios serializados, total de reclutas que cumplen los filtros)
+        """
+        from models.usuario import Usuario
+        
+        campos = campos or cls.CAMPOS_LISTADO_COMPACTO
+        condiciones = cls.condiciones_filtro(search, estado, current_user)
+        
+        # foto_url y foto_variantes se calculan a partir de la ruta guardada (y del id, que siempre se incluye)
+        columnas = [c for c in cls.COLUMNAS_LISTADO if c in campos or (c == 'foto_url' and 'foto_variantes' in campos)]
+        consulta = db.select(*[getattr(cls, columna) for columna in columnas]).where(*condiciones)
         
-        # Aplicar ordenamiento
-        if hasattr(cls, sort_by):
+        if 'asesor_nombre' in campos:
+            asesor_nombre = db.func.coalesce(db.func.nullif(Usuario.nombre, ''), Usuario.email)
+            consulta = consulta.add_columns(asesor_nombre.label('asesor_nombre')).outerjoin(Usuario, Usuario.id == cls.asesor_id)
+        
+        # Aplicar ordenamiento (sólo por columnas reales de la tabla)
+        if sort_by in cls.__table__.c:
             attr = getattr(cls, sort_by)
-            if sort_order.lower() == 'desc':
-                attr = attr.desc()
-            query = query.order_by(attr)
+            consulta = consulta.order_by(attr.desc() if sort_order.lower() == 'desc' else attr)
+        
+        page = max(page, 1)
+        filas = db.session.execute(consulta.limit(per_page).offset((page - 1) * per_page)).mappings()
+        total = db.session.scalar(db.select(db.func.count(cls.id)).where(*condiciones))
+        
+        reclutas = []
+        for fila in filas:
+            datos = cls.serializar_fila(fila)
+            if 'foto_url' not in campos:
+                datos.pop('foto_url', None)
+            if 'foto_variantes' not in campos:
+                datos.pop('foto_variantes', None)
+            reclutas.append(datos)
+        
+        return reclutas, total
+    
+    @classmethod
+    def contar_por_estado(cls, asesor_id=None):
+        """
+        Cuenta los reclutas por estado con una sola consulta agrupada.
+        
+        Args:
+            asesor_id: Limitar a los reclutas de este asesor (opcional)
+            
+        Returns:
+            dict: {estado: número de reclutas}
+        """
+        consulta = db.select(cls.estado, db.func.count(cls.id)).group_by(cls.estado)
+        if asesor_id:
+            consulta = consulta.where(cls.asesor_id == asesor_id)
+        return dict(db.session.execute(consulta).all())
+    
+    @classmethod
+    def contar_por_asesor_y_estado(cls):
+        """
+        Cuenta los reclutas de todos los asesores por estado en una sola consulta
+        (GROUP BY asesor_id, estado).
+        
+        Returns:
+            list: Filas (asesor_id, estado, total); asesor_id es None para los no asignados
+        """
+        return db.session.execute(
+            db.select(cls.asesor_id, cls.estado, db.func.count(cls.id))
+            .group_by(cls.asesor_id, cls.estado)
+        ).all()
+    
+    @classmethod
+    def actualizar_en_lote(cls, condiciones, cambios):
+        """
+        Actualiza con un solo UPDATE todos los reclutas que cumplen las condiciones.
+        
+        Si cambia el estado, antes se registra el cambio en el historial de
+        los reclutas afectados. El commit lo hace quien llama.
+        
+        Args:
+            condiciones: Condiciones WHERE (ver condiciones_filtro)
+            cambios: Diccionario {campo: valor} a asignar
+            
+        Returns:
+            int: Número de reclutas actualizados
+        """
+        if 'estado' in cambios:
+            from utils.historial import registrar_cambios_en_lote
+            registrar_cambios_en_lote(condiciones, cambios['estado'])
+        
+        return db.session.execute(
+            db.update(cls)
+            .where(*condiciones)
+            .values(**cambios)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+    
+    @classmethod
+    def eliminar_en_lote(cls, condiciones):
+        """
+        Elimina con sentencias DELETE todos los reclutas que cumplen las condiciones,
+        junto con sus entrevistas, documentos, cargas pendientes e historial de estados.
+        
+        El commit lo hace quien llama; los archivos no se tocan aquí.
+        
+        Args:
+            condiciones: Condiciones WHERE (ver condiciones_filtro)
+            
+        Returns:
+            tuple: (número de reclutas eliminados, rutas de fotos y documentos liberadas)
+        """
+        from models.entrevista import Entrevista
+        from models.documento import Documento
+        from models.carga_documento import CargaDocumento
+        from models.recluta_estado_historial import ReclutaEstadoHistorial
+        
+        ids = db.select(cls.id).where(*condiciones)
+        
+        rutas = list(db.session.scalars(
+            db.select(cls.foto_url).where(*condiciones, cls.foto_url.isnot(None))
+        ))
+        rutas.extend(db.session.scalars(
+            db.select(Documento.url).where(Documento.recluta_id.in_(ids))
+        ))
+        
+        # Sin cascada del ORM: primero las tablas hijas
+        for modelo in (Entrevista, Documento, CargaDocumento, ReclutaEstadoHistorial):
+            db.session.execute(
+                db.delete(modelo)
+                .where(modelo.recluta_id.in_(ids))
+                .execution_options(synchronize_session=False)
+            )
+        eliminados = db.session.execute(
+            db.delete(cls).where(*condiciones).execution_options(synchronize_session=False)
+        ).rowcount
         
-        # Retornar con paginación
-        return query.paginate(page=page, per_page=per_page, error_out=False)
\ No newline at end of file
+        return eliminados, rutas
\ No newline at end of file
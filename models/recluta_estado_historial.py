@@ -0,0 +1,50 @@
+from datetime import datetime
+from models import db
+
+class ReclutaEstadoHistorial(db.Model):
+    """
+    Modelo para el historial de estados de un recluta (sólo se agregan filas).
+
+    Cada fila registra un cambio de estado: el estado anterior (None en el
+    alta), el nuevo y cuándo ocurrió. Se escribe automáticamente al guardar
+    un recluta (ver utils/historial.py) y en las actualizaciones en lote.
+    """
+    __tablename__ = 'recluta_estado_historial'
+
+    id = db.Column(db.Integer, primary_key=True)
+    recluta_id = db.Column(db.Integer, db.ForeignKey('recluta.id'), nullable=False)
+    estado_anterior = db.Column(db.String(20), nullable=True)
+    estado = db.Column(db.String(20), nullable=False)
+    fecha = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    usuario_id = db.Column(db.Integer, db.ForeignKey('usuario.id', ondelete='SET NULL'), nullable=True)
+    reconstruido = db.Column(db.Boolean, nullable=False, default=False)  # Generado por `flask historial-reconstruir`
+
+    # La timeline y el tiempo por etapa leen rangos por recluta ordenados por fecha
+    __table_args__ = (
+        db.Index('ix_recluta_estado_historial_recluta_fecha', 'recluta_id', 'fecha'),
+    )
+
+    def serialize(self):
+        """Retorna una representación serializable del cambio de estado"""
+        return {
+            'id': self.id,
+            'recluta_id': self.recluta_id,
+            'estado_anterior': self.estado_anterior,
+            'estado': self.estado,
+            'fecha': self.fecha,
+            'usuario_id': self.usuario_id,
+            'reconstruido': self.reconstruido
+        }
+
+    @classmethod
+    def por_recluta(cls, recluta_id):
+        """
+        Obtiene los cambios de estado de un recluta en orden cronológico.
+
+        Es una lectura de rango sobre el índice (recluta_id, fecha).
+        """
+        return db.session.execute(
+            db.select(cls.estado_anterior, cls.estado, cls.fecha)
+            .where(cls.recluta_id == recluta_id)
+            .order_by(cls.fecha, cls.id)
+        ).all()
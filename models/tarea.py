@@ -0,0 +1,58 @@
+import json
+from datetime import datetime
+from models import db
+
+class Tarea(db.Model):
+    """
+    Modelo para las tareas en segundo plano.
+
+    La tabla funciona como cola persistente: si el proceso se cae con tareas
+    pendientes o a medio ejecutar, se vuelven a despachar al reiniciar.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    tipo = db.Column(db.String(50), nullable=False)
+    parametros = db.Column(db.Text, nullable=True)  # JSON
+    estado = db.Column(db.String(20), nullable=False, default='pendiente', index=True)  # pendiente, en_proceso, completada, fallida
+    intentos = db.Column(db.Integer, nullable=False, default=0)
+    progreso = db.Column(db.Integer, nullable=True)  # Porcentaje 0-100 que reporta el manejador
+    resultado = db.Column(db.Text, nullable=True)  # JSON
+    error = db.Column(db.Text, nullable=True)
+    usuario_id = db.Column(db.Integer, db.ForeignKey('usuario.id', ondelete='SET NULL'), nullable=True, index=True)  # Quien la encoló
+    fecha_creacion = db.Column(db.DateTime, default=datetime.utcnow)
+    fecha_inicio = db.Column(db.DateTime, nullable=True)
+    fecha_fin = db.Column(db.DateTime, nullable=True)
+
+    def serialize(self):
+        """Retorna una representación serializable de la tarea"""
+        return {
+            'id': self.id,
+            'tipo': self.tipo,
+            'estado': self.estado,
+            'intentos': self.intentos,
+            'progreso': self.progreso,
+            'resultado': json.loads(self.resultado) if self.resultado else None,
+            'error': self.error,
+            'usuario_id': self.usuario_id,
+            'fecha_creacion': self.fecha_creacion,
+            'fecha_inicio': self.fecha_inicio,
+            'fecha_fin': self.fecha_fin
+        }
+
+    @classmethod
+    def get_by_id(cls, tarea_id):
+        """Obtiene una tarea por su ID"""
+        return cls.query.get(tarea_id)
+
+    @classmethod
+    def get_for_user(cls, tarea_id, current_user):
+        """
+        Obtiene una tarea por su ID, sólo si la encoló el usuario o éste es administrador.
+
+        Los parámetros y el resultado pueden incluir datos de reclutas de otros
+        asesores; las tareas sin usuario (anteriores o del sistema) sólo las ven
+        los administradores.
+        """
+        query = cls.query.filter_by(id=tarea_id)
+        if getattr(current_user, 'rol', None) != 'admin':
+            query = query.filter_by(usuario_id=current_user.id)
+        return query.first()
@@ -32,11 +32,11 @@ class UserSession(db.Model):
             "usuario_id": self.usuario_id,
             "ip_address": self.ip_address,
             "user_agent": self.user_agent,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-            "expires_at": self.expires_at.isoformat() if self.expires_at else None,
+            "created_at": self.created_at,
+            "expires_at": self.expires_at,
             "is_valid": self.is_valid,
             "is_expired": self.is_expired,
-            "last_activity": self.last_activity.isoformat() if self.last_activity else None
+            "last_activity": self.last_activity
         }
     
     def save(self):
@@ -2,6 +2,8 @@ from flask_login import UserMixin
 from datetime import datetime
 import bcrypt
 from models import db, DatabaseError
+from flask import current_app
+from utils.imagenes import urls_foto
 
 class Usuario(db.Model, UserMixin):
     """
@@ -17,6 +19,9 @@ class Usuario(db.Model, UserMixin):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     last_login = db.Column(db.DateTime, nullable=True)
     rol = db.Column(db.String(20), default='asesor')  # 'admin' o 'asesor'
+    
+    # Columnas que devuelve el listado de asesores (además de foto_variantes)
+    COLUMNAS_LISTADO = ('id', 'email', 'nombre', 'telefono', 'rol', 'foto_url', 'created_at', 'last_login')
 
     
     @property
@@ -41,16 +46,35 @@ class Usuario(db.Model, UserMixin):
 
     def serialize(self):
         """Retorna una representación serializable del usuario"""
+        foto_url, foto_variantes = urls_foto('usuario', self.id, self.foto_url, current_app.root_path)
         return {
             "id": self.id,
             "email": self.email,
             "nombre": self.nombre,
             "telefono": self.telefono,
-            "foto_url": self.foto_url,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-            "last_login": self.last_login.isoformat() if self.last_login else None
+            "rol": self.rol,
+            "foto_url": foto_url,
+            "foto_variantes": foto_variantes,
+            "created_at": self.created_at,
+            "last_login": self.last_login
         }
     
+    @classmethod
+    def listar_activos(cls):
+        """
+        Obtiene los usuarios activos como filas de columnas, sin construir objetos del ORM.
+        
+        Returns:
+            Lista de diccionarios con la misma forma que serialize()
+        """
+        consulta = db.select(*[getattr(cls, columna) for columna in cls.COLUMNAS_LISTADO]).where(cls.is_active.is_(True))
+        usuarios = []
+        for fila in db.session.execute(consulta).mappings():
+            datos = dict(fila)
+            datos['foto_url'], datos['foto_variantes'] = urls_foto('usuario', datos['id'], datos['foto_url'], current_app.root_path)
+            usuarios.append(datos)
+        return usuarios
+    
     def save(self):
         """Guarda el usuario en la base de datos de forma segura"""
         try:
@@ -1,15 +1,32 @@
-from flask import Blueprint, jsonify, request, current_app
+from flask import Blueprint, jsonify, request, current_app, Response, abort
 from flask_login import login_required, current_user
 from werkzeug.utils import secure_filename
+from werkzeug.exceptions import HTTPException
 from models import db, DatabaseError
 from models.recluta import Recluta
 from models import Documento
 from models.usuario import Usuario
 from models.entrevista import Entrevista  # Importación específica desde el módulo
-from utils.helpers import guardar_archivo, eliminar_archivo
+from utils.helpers import guardar_archivo
+from utils.almacenamiento import ruta_absoluta, ruta_carga, escribir_fragmento, calcular_sha256, almacenar_contenido
+from utils.tareas import encolar
+from utils.descargas import enviar_archivo
+from utils.imagenes import rutas_variantes
+from utils.batch import ejecutar_subpeticion
+from utils.calendario import resumen_mes
+from utils.agenda import buscar_conflictos, reporte_conflictos, disponibilidad
+from utils.eventos import obtener_bus, flujo_eventos
+from utils.historial import construir_timeline, tiempo_en_etapa
+from utils.estadisticas import resumen as resumen_estadisticas, desglose_asesores
+from utils.auth_helpers import admin_required
+from models.tarea import Tarea
+from models.carga_documento import CargaDocumento
 from utils.validators import validate_recluta_data, validate_entrevista_data, ValidationError
-from datetime import datetime
+from datetime import datetime, timedelta
 import os
+import re
+import uuid
+import mimetypes
 
 api_bp = Blueprint('api', __name__)
 
@@ -22,11 +39,9 @@ def get_asesores():
     Obtiene la lista de usuarios que pueden ser asesores.
     """
     try:
-        asesores = Usuario.query.filter_by(is_active=True).all()
-        
         return jsonify({
             "success": True,
-            "asesores": [a.serialize() for a in asesores]
+            "asesores": Usuario.listar_activos()
         })
     except Exception as e:
         current_app.logger.error(f"Error al obtener asesores: {str(e)}")
@@ -47,29 +62,43 @@ def get_reclutas():
         sort_by = request.args.get('sort_by', 'id')
         sort_order = request.args.get('sort_order', 'asc')
         
+        # Proyección: campos pedidos con fields=a,b,c (o 'all'); por defecto la compacta, sin notas
+        try:
+            campos = Recluta.validar_campos(request.args.get('fields', ''))
+        except ValueError as e:
+            return jsonify({"success": False, "message": str(e)}), 400
+        
         # Limitar el tamaño de página para prevenir abuso
         per_page = min(per_page, current_app.config['MAX_PAGE_SIZE'])
         
-        # Obtener reclutas paginados, pasando el usuario actual para el filtrado por rol
-        pagination = Recluta.get_all(
+        # Obtener reclutas paginados como filas de columnas, pasando el usuario actual para el filtrado por rol
+        reclutas, total = Recluta.listar(
             page=page,
             per_page=per_page,
             search=search,
             estado=estado,
             sort_by=sort_by,
             sort_order=sort_order,
-            current_user=current_user
+            current_user=current_user,
+            campos=campos
         )
+        pages = (total + per_page - 1) // per_page if per_page > 0 else 0
+        
+        # Conteo opcional de documentos para toda la página en una sola consulta
+        if request.args.get('documentos_count', '').lower() in ('1', 'true'):
+            conteos = Documento.contar_por_recluta([r['id'] for r in reclutas])
+            for recluta in reclutas:
+                recluta['documentos_count'] = conteos.get(recluta['id'], 0)
         
         return jsonify({
             "success": True,
-            "reclutas": [r.serialize() for r in pagination.items],
-            "total": pagination.total,
-            "pages": pagination.pages,
+            "reclutas": reclutas,
+            "total": total,
+            "pages": pages,
             "page": page,
             "per_page": per_page,
-            "has_next": pagination.has_next,
-            "has_prev": pagination.has_prev
+            "has_next": page < pages,
+            "has_prev": page > 1
         })
     except Exception as e:
         current_app.logger.error(f"Error al obtener reclutas: {str(e)}")
@@ -96,6 +125,41 @@ def get_recluta(id):
         current_app.logger.error(f"Error al obtener recluta {id}: {str(e)}")
         return jsonify({"success": False, "message": f"Error al obtener recluta: {str(e)}"}), 500
 
+def _enviar_foto(ruta):
+    """
+    Envía una foto subida (o la variante pedida en ?variante=) una vez verificados los permisos.
+    """
+    if not ruta or ruta.startswith('http'):
+        abort(404)
+    
+    variante = request.args.get('variante')
+    if variante:
+        variantes = rutas_variantes(ruta) or {}
+        if variante not in variantes:
+            abort(404)
+        ruta = variantes[variante]
+    
+    return enviar_archivo(ruta, mimetype=mimetypes.guess_type(ruta)[0])
+
+@api_bp.route('/reclutas/<int:id>/foto', methods=['GET'])
+@login_required
+def get_recluta_foto(id):
+    """
+    Descarga la foto de un recluta (o una variante con ?variante=thumb|medium),
+    verificando permisos sobre el recluta.
+    """
+    try:
+        recluta = Recluta.get_by_id(id, current_user=current_user)
+        if not recluta:
+            return jsonify({"success": False, "message": "Recluta no encontrado o sin permisos para acceder"}), 404
+        
+        return _enviar_foto(recluta.foto_url)
+    except HTTPException:
+        raise
+    except Exception as e:
+        current_app.logger.error(f"Error al descargar la foto del recluta {id}: {str(e)}")
+        return jsonify({"success": False, "message": f"Error: {str(e)}"}), 500
+
 @api_bp.route('/reclutas', methods=['POST'])
 @login_required
 def add_recluta():
@@ -128,6 +192,8 @@ def add_recluta():
                 ruta_relativa = guardar_archivo(archivo, 'recluta')
                 if ruta_relativa:
                     nuevo.foto_url = ruta_relativa
+                    # Las miniaturas se generan después de responder
+                    encolar('procesar_imagen', ruta=ruta_relativa)
         
         # Guardar en base de datos
         try:
@@ -180,13 +246,13 @@ def update_recluta(id):
         if 'foto' in request.files:
             archivo = request.files['foto']
             if archivo and archivo.filename:
-                # Eliminar foto anterior si existe
-                if recluta.foto_url:
-                    eliminar_archivo(recluta.foto_url)
-                    
                 ruta_relativa = guardar_archivo(archivo, 'recluta')
                 if ruta_relativa:
+                    # La foto anterior se elimina en segundo plano tras el commit
+                    if recluta.foto_url:
+                        encolar('eliminar_archivos', rutas=[recluta.foto_url])
                     recluta.foto_url = ruta_relativa
+                    encolar('procesar_imagen', ruta=ruta_relativa)
         
         # Guardar cambios
         try:
@@ -216,9 +282,11 @@ def delete_recluta(id):
         # Guardar información antes de eliminar para el log
         recluta_info = f"ID: {recluta.id}, Nombre: {recluta.nombre}, Email: {recluta.email}"
         
-        # Eliminar foto si existe
-        if recluta.foto_url:
-            eliminar_archivo(recluta.foto_url)
+        # Eliminar foto y documentos (en segundo plano, una vez confirmado el borrado)
+        rutas = [recluta.foto_url] if recluta.foto_url else []
+        rutas.extend(documento.url for documento in recluta.documentos)
+        if rutas:
+            encolar('eliminar_archivos', rutas=rutas)
         
         # Eliminar recluta
         try:
@@ -232,8 +300,186 @@ def delete_recluta(id):
         current_app.logger.error(f"Error al eliminar recluta {id}: {str(e)}")
         return jsonify({"success": False, "message": f"Error al eliminar recluta: {str(e)}"}), 500
         
+def _condiciones_lote(data):
+    """
+    Obtiene las condiciones de selección de una operación en lote.
+    
+    Acepta una lista de IDs ("ids") o un filtro como el del listado
+    ("filtro": {"search": ..., "estado": ...}); siempre se aplica la
+    restricción por rol del usuario actual.
+    
+    Returns:
+        tuple: (condiciones, mensaje de error o None)
+    """
+    ids = data.get('ids')
+    filtro = data.get('filtro')
+    
+    if ids is not None:
+        if not isinstance(ids, list) or not ids:
+            return None, "ids debe ser una lista no vacía"
+        if len(ids) > current_app.config['BULK_MAX_IDS']:
+            return None, f"Máximo {current_app.config['BULK_MAX_IDS']} IDs por operación"
+        try:
+            ids = [int(i) for i in ids]
+        except (ValueError, TypeError):
+            return None, "ids debe contener sólo enteros"
+        condiciones = Recluta.condiciones_filtro(current_user=current_user)
+        condiciones.append(Recluta.id.in_(ids))
+        return condiciones, None
+    
+    if isinstance(filtro, dict) and (filtro.get('search') or filtro.get('estado')):
+        condiciones = Recluta.condiciones_filtro(
+            search=filtro.get('search'),
+            estado=filtro.get('estado'),
+            current_user=current_user
+        )
+        return condiciones, None
+    
+    return None, "Se requiere una lista de ids o un filtro con search o estado"
+
+@api_bp.route('/reclutas/bulk', methods=['PATCH'])
+@login_required
+def bulk_update_reclutas():
+    """
+    Actualiza estado, asesor o puesto de varios reclutas con un solo UPDATE.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        
+        condiciones, error = _condiciones_lote(data)
+        if error:
+            return jsonify({"success": False, "message": error}), 400
+        
+        cambios = {k: v for k, v in (data.get('cambios') or {}).items() if k in ('estado', 'asesor_id', 'puesto')}
+        if not cambios:
+            return jsonify({"success": False, "message": "Indique al menos un cambio (estado, asesor_id o puesto)"}), 400
+        
+        # Validar datos
+        try:
+            validated_data = validate_recluta_data(cambios, is_update=True)
+        except ValidationError as e:
+            return jsonify({"success": False, "message": "Error de validación", "errors": e.args[0]}), 400
+        
+        # asesor_id nulo desasigna los reclutas (validate_recluta_data omite los nulos)
+        if 'asesor_id' in cambios and cambios['asesor_id'] in (None, ''):
+            validated_data['asesor_id'] = None
+        
+        # Si es asesor, asegurar que no puede reasignar ni desasignar sus reclutas
+        if hasattr(current_user, 'rol') and current_user.rol == 'asesor':
+            if 'asesor_id' in validated_data and validated_data['asesor_id'] != current_user.id:
+                return jsonify({"success": False, "message": "No tienes permisos para asignar reclutas a otro asesor"}), 403
+        
+        try:
+            actualizados = Recluta.actualizar_en_lote(condiciones, validated_data)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise DatabaseError(f"Error al actualizar reclutas: {str(e)}")
+        
+        current_app.logger.info(f"Actualización en lote de reclutas: {actualizados} filas, cambios {validated_data}")
+        return jsonify({"success": True, "actualizados": actualizados})
+    except DatabaseError as e:
+        return jsonify({"success": False, "message": str(e)}), 500
+    except Exception as e:
+        current_app.logger.error(f"Error en actualización en lote de reclutas: {str(e)}")
+        return jsonify({"success": False, "message": f"Error al actualizar reclutas: {str(e)}"}), 500
+
+@api_bp.route('/reclutas/bulk', methods=['DELETE'])
+@login_required
+def bulk_delete_reclutas():
+    """
+    Elimina varios reclutas (con sus entrevistas y documentos) con sentencias DELETE en lote.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        
+        condiciones, error = _condiciones_lote(data)
+        if error:
+            return jsonify({"success": False, "message": error}), 400
+        
+        try:
+            eliminados, rutas = Recluta.eliminar_en_lote(condiciones)
+            # Los archivos se liberan en segundo plano, una vez confirmado el borrado
+            if rutas:
+                encolar('eliminar_archivos', rutas=rutas)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise DatabaseError(f"Error al eliminar reclutas: {str(e)}")
+        
+        current_app.logger.info(f"Eliminación en lote de reclutas: {eliminados} filas, {len(rutas)} archivos")
+        return jsonify({"success": True, "eliminados": eliminados, "archivos": len(rutas)})
+    except DatabaseError as e:
+        return jsonify({"success": False, "message": str(e)}), 500
+    except Exception as e:
+        current_app.logger.error(f"Error en eliminación en lote de reclutas: {str(e)}")
+        return jsonify({"success": False, "message": f"Error al eliminar reclutas: {str(e)}"}), 500
+
+@api_bp.route('/reclutas/tiempo-en-etapa', methods=['GET'])
+@login_required
+def get_tiempo_en_etapa():
+    """
+    Tiempo que pasan los reclutas en cada estado, calculado sobre el historial de estados.
+    
+    Query params:
+        desde: Contar estancias iniciadas desde esta fecha YYYY-MM-DD (opcional)
+        hasta: Contar estancias iniciadas hasta esta fecha YYYY-MM-DD, incluida (opcional)
+        asesor_id: Limitar a los reclutas de un asesor (los asesores sólo ven los suyos)
+    """
+    try:
+        try:
+            desde = datetime.strptime(request.args['desde'], '%Y-%m-%d').date() if request.args.get('desde') else None
+            hasta = datetime.strptime(request.args['hasta'], '%Y-%m-%d').date() if request.args.get('hasta') else None
+        except ValueError:
+            return jsonify({"success": False, "message": "Las fechas deben tener el formato YYYY-MM-DD"}), 400
+        
+        asesor_id = request.args.get('asesor_id', type=int)
+        if hasattr(current_user, 'rol') and current_user.rol == 'asesor':
+            asesor_id = current_user.id
+        
+        return jsonify({
+            "success": True,
+            "desde": desde,
+            "hasta": hasta,
+            "asesor_id": asesor_id,
+            "estados": tiempo_en_etapa(desde, hasta, asesor_id)
+        })
+    except Exception as e:
+        current_app.logger.error(f"Error al calcular el tiempo por etapa: {str(e)}")
+        return jsonify({"success": False, "message": f"Error al calcular el tiempo por etapa: {str(e)}"}), 500
+
 # ----- API DE ENTREVISTAS -----
 
+# Campos de una entrevista que determinan si choca con otras
+CAMPOS_AGENDA = ('recluta_id', 'fecha', 'hora', 'duracion', 'tipo', 'ubicacion', 'estado')
+
+def _verificar_conflictos(datos, forzar, excluir_id=None):
+    """
+    Comprueba si una entrevista pendiente se solapa con otras del mismo asesor o sala.
+    
+    Args:
+        datos: Valores finales de la entrevista (CAMPOS_AGENDA)
+        forzar: Aceptar el horario aunque haya conflictos
+        excluir_id: ID de la entrevista que se está editando
+        
+    Returns:
+        tuple: (conflictos, respuesta 409 o None)
+    """
+    if (datos.get('estado') or 'pendiente') != 'pendiente':
+        return [], None
+    
+    conflictos = buscar_conflictos(
+        datos['fecha'], datos['hora'], datos.get('duracion'), datos['recluta_id'],
+        datos.get('tipo'), datos.get('ubicacion'), excluir_id
+    )
+    if conflictos and not forzar:
+        return conflictos, (jsonify({
+            "success": False,
+            "message": "El horario se solapa con otras entrevistas. Envíe forzar=true para programarla de todos modos",
+            "conflictos": conflictos
+        }), 409)
+    return conflictos, None
+
 @api_bp.route('/entrevistas', methods=['GET'])
 @login_required
 def get_entrevistas():
@@ -244,19 +490,175 @@ def get_entrevistas():
         # Filtro opcional por recluta_id
         recluta_id = request.args.get('recluta_id', type=int)
         
-        if recluta_id:
-            entrevistas = Entrevista.get_for_recluta(recluta_id)
-        else:
-            entrevistas = Entrevista.query.all()
-            
         return jsonify({
             "success": True,
-            "entrevistas": [e.serialize() for e in entrevistas]
+            "entrevistas": Entrevista.listar(recluta_id)
         })
     except Exception as e:
         current_app.logger.error(f"Error al obtener entrevistas: {str(e)}")
         return jsonify({"success": False, "message": f"Error al obtener entrevistas: {str(e)}"}), 500
 
+@api_bp.route('/entrevistas/conflictos', methods=['GET'])
+@login_required
+def get_conflictos_entrevistas():
+    """
+    Reporte de entrevistas pendientes solapadas (mismo asesor o misma sala) en un rango de fechas.
+    
+    Query params:
+        desde: Fecha inicial YYYY-MM-DD (por defecto hoy)
+        hasta: Fecha final YYYY-MM-DD, incluida (por defecto 30 días después de desde)
+    """
+    try:
+        try:
+            desde = datetime.strptime(request.args['desde'], '%Y-%m-%d').date() if request.args.get('desde') else datetime.now().date()
+            hasta = datetime.strptime(request.args['hasta'], '%Y-%m-%d').date() if request.args.get('hasta') else desde + timedelta(days=30)
+        except ValueError:
+            return jsonify({"success": False, "message": "Las fechas deben tener el formato YYYY-MM-DD"}), 400
+        
+        max_dias = current_app.config['AGENDA_MAX_DIAS_REPORTE']
+        if hasta < desde or (hasta - desde).days > max_dias:
+            return jsonify({"success": False, "message": f"El rango debe ser válido y de máximo {max_dias} días"}), 400
+        
+        # Los asesores sólo ven los conflictos de sus reclutas
+        asesor_id = current_user.id if hasattr(current_user, 'rol') and current_user.rol == 'asesor' else None
+        
+        conflictos = reporte_conflictos(desde, hasta, asesor_id)
+        return jsonify({
+            "success": True,
+            "desde": desde,
+            "hasta": hasta,
+            "total": len(conflictos),
+            "conflictos": conflictos
+        })
+    except Exception as e:
+        current_app.logger.error(f"Error al obtener conflictos de entrevistas: {str(e)}")
+        return jsonify({"success": False, "message": f"Error al obtener conflictos: {str(e)}"}), 500
+
+@api_bp.route('/entrevistas/programacion', methods=['POST'])
+@login_required
+def programar_entrevistas_masivo():
+    """
+    Programa en segundo plano una entrevista para cada recluta indicado.
+    
+    Body JSON:
+        recluta_ids: Lista de IDs, en orden de prioridad
+        desde, hasta: Rango de fechas YYYY-MM-DD (incluido)
+        duracion: Minutos por entrevista (por defecto 60)
+        asesor_ids: Asesores disponibles (por defecto, los de los reclutas)
+        ubicaciones: Salas disponibles (opcional)
+        tipo: Tipo de entrevista (por defecto presencial)
+        
+    Returns:
+        202 con el ID de la tarea; el avance se consulta en /api/tareas/<id>
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        
+        recluta_ids = data.get('recluta_ids')
+        if not isinstance(recluta_ids, list) or not recluta_ids:
+            return jsonify({"success": False, "message": "recluta_ids debe ser una lista no vacía"}), 400
+        if len(recluta_ids) > current_app.config['PROGRAMACION_MAX_RECLUTAS']:
+            return jsonify({"success": False, "message": f"Máximo {current_app.config['PROGRAMACION_MAX_RECLUTAS']} reclutas por programación"}), 400
+        
+        try:
+            recluta_ids = [int(i) for i in recluta_ids]
+            asesor_ids = [int(i) for i in data['asesor_ids']] if data.get('asesor_ids') else None
+            desde = datetime.strptime(data.get('desde', ''), '%Y-%m-%d').date()
+            hasta = datetime.strptime(data.get('hasta', ''), '%Y-%m-%d').date()
+            duracion = int(data.get('duracion') or 60)
+        except (ValueError, TypeError):
+            return jsonify({"success": False, "message": "Datos inválidos: se requieren IDs enteros, desde/hasta YYYY-MM-DD y una duración numérica"}), 400
+        
+        max_dias = current_app.config['PROGRAMACION_MAX_DIAS']
+        if hasta < desde or (hasta - desde).days >= max_dias:
+            return jsonify({"success": False, "message": f"El rango debe ser válido y de máximo {max_dias} días"}), 400
+        if not 5 <= duracion <= 480:
+            return jsonify({"success": False, "message": "La duración debe estar entre 5 y 480 minutos"}), 400
+        
+        tipo = data.get('tipo') or 'presencial'
+        if tipo not in ('presencial', 'virtual', 'telefonica'):
+            return jsonify({"success": False, "message": "El tipo debe ser presencial, virtual o telefonica"}), 400
+        
+        ubicaciones = data.get('ubicaciones') or []
+        if not isinstance(ubicaciones, list) or not all(isinstance(u, str) for u in ubicaciones):
+            return jsonify({"success": False, "message": "ubicaciones debe ser una lista de textos"}), 400
+        
+        # Un asesor sólo puede programar a sus reclutas y en su propia agenda
+        if hasattr(current_user, 'rol') and current_user.rol == 'asesor':
+            asesor_ids = [current_user.id]
+            propios = set(db.session.scalars(
+                db.select(Recluta.id).where(Recluta.id.in_(recluta_ids), Recluta.asesor_id == current_user.id)
+            ))
+            if len(propios) != len(set(recluta_ids)):
+                return jsonify({"success": False, "message": "Sólo puedes programar entrevistas de tus reclutas"}), 403
+        
+        try:
+            nueva = encolar(
+                'programar_entrevistas',
+                recluta_ids=recluta_ids,
+                desde=desde.isoformat(),
+                hasta=hasta.isoformat(),
+                duracion=duracion,
+                asesor_ids=asesor_ids,
+                salas=ubicaciones,
+                tipo=tipo
+            )
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise DatabaseError(f"Error al encolar la programación: {str(e)}")
+        
+        current_app.logger.info(f"Programación masiva encolada: tarea {nueva.id}, {len(recluta_ids)} reclutas, {desde} a {hasta}")
+        return jsonify({"success": True, "tarea_id": nueva.id}), 202
+    except DatabaseError as e:
+        return jsonify({"success": False, "message": str(e)}), 500
+    except Exception as e:
+        current_app.logger.error(f"Error al programar entrevistas: {str(e)}")
+        return jsonify({"success": False, "message": f"Error al programar entrevistas: {str(e)}"}), 500
+
+@api_bp.route('/disponibilidad', methods=['GET'])
+@login_required
+def get_disponibilidad():
+    """
+    Huecos libres de un asesor según el horario laboral y sus entrevistas pendientes.
+    
+    Query params:
+        asesor_id: ID del asesor (los asesores sólo pueden consultar el suyo)
+        desde: Fecha inicial YYYY-MM-DD (por defecto hoy)
+        hasta: Fecha final YYYY-MM-DD, incluida (por defecto 6 días después de desde)
+        duracion: Duración mínima del hueco en minutos (por defecto 60)
+    """
+    try:
+        asesor_id = request.args.get('asesor_id', type=int)
+        if hasattr(current_user, 'rol') and current_user.rol == 'asesor':
+            asesor_id = current_user.id
+        if not asesor_id:
+            return jsonify({"success": False, "message": "Se requiere asesor_id"}), 400
+        
+        try:
+            desde = datetime.strptime(request.args['desde'], '%Y-%m-%d').date() if request.args.get('desde') else datetime.now().date()
+            hasta = datetime.strptime(request.args['hasta'], '%Y-%m-%d').date() if request.args.get('hasta') else desde + timedelta(days=6)
+        except ValueError:
+            return jsonify({"success": False, "message": "Las fechas deben tener el formato YYYY-MM-DD"}), 400
+        
+        max_dias = current_app.config['DISPONIBILIDAD_MAX_DIAS']
+        if hasta < desde or (hasta - desde).days >= max_dias:
+            return jsonify({"success": False, "message": f"El rango debe ser válido y de máximo {max_dias} días"}), 400
+        
+        duracion = request.args.get('duracion', 60, type=int)
+        if duracion <= 0:
+            return jsonify({"success": False, "message": "La duración debe ser un número positivo"}), 400
+        
+        return jsonify({
+            "success": True,
+            "asesor_id": asesor_id,
+            "duracion": duracion,
+            "dias": disponibilidad(asesor_id, desde, hasta, duracion)
+        })
+    except Exception as e:
+        current_app.logger.error(f"Error al obtener disponibilidad: {str(e)}")
+        return jsonify({"success": False, "message": f"Error al obtener disponibilidad: {str(e)}"}), 500
+
 @api_bp.route('/entrevistas/<int:id>', methods=['GET'])
 @login_required
 def get_entrevista(id):
@@ -295,6 +697,11 @@ def add_entrevista():
         if 'fecha' in validated_data and isinstance(validated_data['fecha'], str):
             validated_data['fecha'] = datetime.strptime(validated_data['fecha'], '%Y-%m-%d').date()
         
+        # Rechazar horarios solapados salvo que se fuerce
+        conflictos, respuesta = _verificar_conflictos(validated_data, data.get('forzar'))
+        if respuesta:
+            return respuesta
+        
         # Crear nueva entrevista
         nueva = Entrevista(**validated_data)
         
@@ -302,7 +709,7 @@ def add_entrevista():
         try:
             nueva.save()
             current_app.logger.info(f"Entrevista creada: {nueva.id} - Recluta: {nueva.recluta_id} - Fecha: {nueva.fecha}")
-            return jsonify({"success": True, "entrevista": nueva.serialize()}), 201
+            return jsonify({"success": True, "entrevista": nueva.serialize(), "conflictos": conflictos}), 201
         except DatabaseError as e:
             return jsonify({"success": False, "message": str(e)}), 500
             
@@ -333,6 +740,14 @@ def update_entrevista(id):
         if 'fecha' in validated_data and isinstance(validated_data['fecha'], str):
             validated_data['fecha'] = datetime.strptime(validated_data['fecha'], '%Y-%m-%d').date()
         
+        # Si cambia el horario, el recluta, la sala o el estado, comprobar solapamientos
+        conflictos = []
+        if any(campo in validated_data for campo in CAMPOS_AGENDA):
+            propuesta = {campo: validated_data.get(campo, getattr(entrevista, campo)) for campo in CAMPOS_AGENDA}
+            conflictos, respuesta = _verificar_conflictos(propuesta, data.get('forzar'), excluir_id=entrevista.id)
+            if respuesta:
+                return respuesta
+        
         # Actualizar campos
         for key, value in validated_data.items():
             setattr(entrevista, key, value)
@@ -341,7 +756,7 @@ def update_entrevista(id):
         try:
             entrevista.save()
             current_app.logger.info(f"Entrevista actualizada: {entrevista.id} - Fecha: {entrevista.fecha}")
-            return jsonify({"success": True, "entrevista": entrevista.serialize()})
+            return jsonify({"success": True, "entrevista": entrevista.serialize(), "conflictos": conflictos})
         except DatabaseError as e:
             return jsonify({"success": False, "message": str(e)}), 500
             
@@ -375,53 +790,107 @@ def delete_entrevista(id):
         current_app.logger.error(f"Error al eliminar entrevista {id}: {str(e)}")
         return jsonify({"success": False, "message": f"Error al eliminar entrevista: {str(e)}"}), 500
 
+@api_bp.route('/calendario', methods=['GET'])
+@login_required
+def get_calendario():
+    """
+    Resumen del calendario de un mes: total de entrevistas por día y un
+    resumen compacto de cada una.
+    
+    Query params:
+        mes: Mes en formato YYYY-MM (por defecto el actual)
+        asesor_id: Limitar a los reclutas de un asesor (los asesores sólo ven los suyos)
+    """
+    try:
+        mes = request.args.get('mes') or datetime.now().strftime('%Y-%m')
+        if not re.fullmatch(r'\d{4}-\d{2}', mes) or not 1 <= int(mes[5:]) <= 12:
+            return jsonify({"success": False, "message": "El mes debe tener el formato YYYY-MM"}), 400
+        
+        asesor_id = request.args.get('asesor_id', type=int)
+        if hasattr(current_user, 'rol') and current_user.rol == 'asesor':
+            asesor_id = current_user.id
+        
+        return jsonify({
+            "success": True,
+            "mes": mes,
+            "asesor_id": asesor_id,
+            **resumen_mes(mes, asesor_id)
+        })
+    except Exception as e:
+        current_app.logger.error(f"Error al obtener calendario: {str(e)}")
+        return jsonify({"success": False, "message": f"Error al obtener calendario: {str(e)}"}), 500
+
+# ----- EVENTOS EN VIVO -----
+
+@api_bp.route('/eventos', methods=['GET'])
+@login_required
+def get_eventos():
+    """
+    Flujo de Server-Sent Events con los cambios de reclutas y entrevistas.
+    
+    Los asesores sólo reciben eventos de sus reclutas. Al reconectarse, el
+    navegador envía Last-Event-ID y se reenvían los eventos perdidos (o un
+    evento 'recarga' si ya no están disponibles).
+    """
+    try:
+        bus = obtener_bus()
+        if len(bus) >= current_app.config['EVENTOS_MAX_CONEXIONES']:
+            return jsonify({"success": False, "message": "Demasiadas conexiones de eventos"}), 503, {'Retry-After': '30'}
+        
+        asesor_id = current_user.id if hasattr(current_user, 'rol') and current_user.rol == 'asesor' else None
+        response = Response(
+            flujo_eventos(
+                bus, asesor_id, request.headers.get('Last-Event-ID'),
+                heartbeat=current_app.config['EVENTOS_HEARTBEAT'],
+                duracion_maxima=current_app.config['EVENTOS_DURACION_MAXIMA'],
+                reintento_ms=current_app.config['EVENTOS_REINTENTO_MS']
+            ),
+            mimetype='text/event-stream'
+        )
+        response.headers['Cache-Control'] = 'no-cache'
+        response.headers['X-Accel-Buffering'] = 'no'  # Sin buffer en nginx
+        return response
+    except Exception as e:
+        current_app.logger.error(f"Error al abrir el flujo de eventos: {str(e)}")
+        return jsonify({"success": False, "message": f"Error al abrir el flujo de eventos: {str(e)}"}), 500
+
 # ----- API DE ESTADÍSTICAS -----
 
 @api_bp.route('/estadisticas', methods=['GET'])
 @login_required
 def get_estadisticas():
     """
-    Obtiene estadísticas generales del sistema.
+    Obtiene estadísticas del sistema.
+    
+    Los asesores sólo ven las de sus reclutas; los administradores ven las
+    globales o, con ?asesor_id=, las de un asesor.
     """
     try:
-        # Contar reclutas por estado
-        total_reclutas = Recluta.query.count()
-        reclutas_activos = Recluta.query.filter_by(estado='Activo').count()
-        reclutas_proceso = Recluta.query.filter_by(estado='En proceso').count()
-        reclutas_rechazados = Recluta.query.filter_by(estado='Rechazado').count()
-        
-        # Contar entrevistas por estado
-        entrevistas_pendientes = Entrevista.query.filter_by(estado='pendiente').count()
-        entrevistas_completadas = Entrevista.query.filter_by(estado='completada').count()
-        entrevistas_canceladas = Entrevista.query.filter_by(estado='cancelada').count()
-        
-        # Obtener entrevistas próximas
-        entrevistas_proximas = Entrevista.get_upcoming(limit=5)
-        
-        # Obtener distribución de entrevistas por mes para el año actual
-        year = datetime.now().year
-        entrevistas_por_mes = Entrevista.count_by_month(year)
+        asesor_id = request.args.get('asesor_id', type=int)
+        if hasattr(current_user, 'rol') and current_user.rol == 'asesor':
+            asesor_id = current_user.id
         
         return jsonify({
             "success": True,
-            "reclutas": {
-                "total": total_reclutas,
-                "activos": reclutas_activos,
-                "en_proceso": reclutas_proceso,
-                "rechazados": reclutas_rechazados
-            },
-            "entrevistas": {
-                "pendientes": entrevistas_pendientes,
-                "completadas": entrevistas_completadas,
-                "canceladas": entrevistas_canceladas,
-                "proximas": [e.serialize() for e in entrevistas_proximas],
-                "por_mes": entrevistas_por_mes
-            }
+            "asesor_id": asesor_id,
+            **resumen_estadisticas(asesor_id)
         })
     except Exception as e:
         current_app.logger.error(f"Error al obtener estadísticas: {str(e)}")
         return jsonify({"success": False, "message": f"Error al obtener estadísticas: {str(e)}"}), 500
 
+@api_bp.route('/estadisticas/asesores', methods=['GET'])
+@admin_required
+def get_estadisticas_asesores():
+    """
+    Obtiene los reclutas por estado de cada asesor (sólo administradores).
+    """
+    try:
+        return jsonify({"success": True, "asesores": desglose_asesores()})
+    except Exception as e:
+        current_app.logger.error(f"Error al obtener estadísticas por asesor: {str(e)}")
+        return jsonify({"success": False, "message": f"Error al obtener estadísticas por asesor: {str(e)}"}), 500
+
 # ----- API DE SEGUIMIENTO DE FOLIOS -----
 
 @api_bp.route('/tracking/<folio>', methods=['GET'])
@@ -474,75 +943,8 @@ def get_timeline_folio(folio):
         if not recluta:
             return jsonify({"success": False, "message": "Folio no encontrado"}), 404
         
-        # Mapear estado del sistema a estado de la timeline
-        estados_timeline = {
-            'En proceso': 'revision',
-            'Activo': 'finalizada',
-            'Rechazado': 'finalizada'
-        }
-        
-        estado_timeline = estados_timeline.get(recluta.estado, 'recibida')
-        
-        # Definir la estructura completa de la timeline
-        timeline_items = [
-            {
-                "id": "recibida",
-                "title": "Recibida",
-                "description": "Documentación recibida y registrada en el sistema.",
-                "completed": True,
-                "active": estado_timeline == 'recibida',
-                "date": recluta.fecha_registro.strftime('%d/%m/%Y') if recluta.fecha_registro else None
-            },
-            {
-                "id": "revision",
-                "title": "En revisión",
-                "description": "Evaluación inicial de requisitos y perfil.",
-                "completed": estado_timeline in ['revision', 'entrevista', 'evaluacion', 'finalizada'],
-                "active": estado_timeline == 'revision',
-                "date": recluta.ultima_actualizacion.strftime('%d/%m/%Y') if recluta.ultima_actualizacion and estado_timeline != 'recibida' else None
-            },
-            {
-                "id": "entrevista",
-                "title": "Entrevista",
-                "description": "Programación y realización de entrevistas.",
-                "completed": estado_timeline in ['entrevista', 'evaluacion', 'finalizada'],
-                "active": estado_timeline == 'entrevista',
-                "date": None
-            },
-            {
-                "id": "evaluacion",
-                "title": "Evaluación",
-                "description": "Análisis de resultados y toma de decisiones.",
-                "completed": estado_timeline in ['evaluacion', 'finalizada'],
-                "active": estado_timeline == 'evaluacion',
-                "date": None
-            },
-            {
-                "id": "finalizada",
-                "title": "Finalizada",
-                "description": "Proceso completado con decisión final.",
-                "completed": estado_timeline == 'finalizada',
-                "active": estado_timeline == 'finalizada',
-                "date": None
-            }
-        ]
-        
-        # Obtener fechas de entrevistas si existen
-        entrevistas = Entrevista.query.filter_by(recluta_id=recluta.id).order_by(Entrevista.fecha).all()
-        
-        for entrevista in entrevistas:
-            # Si hay entrevista y está en estado completada, actualizar la fecha del ítem de entrevista
-            if entrevista.estado == 'completada':
-                for item in timeline_items:
-                    if item["id"] == "entrevista":
-                        item["date"] = entrevista.fecha.strftime('%d/%m/%Y')
-                        break
-        
-        # Verificar si el estado es "finalizada" y actualizar la fecha correspondiente
-        if estado_timeline == 'finalizada':
-            for item in timeline_items:
-                if item["id"] == "finalizada":
-                    item["date"] = recluta.ultima_actualizacion.strftime('%d/%m/%Y') if recluta.ultima_actualizacion else None
+        # Etapas y fechas a partir del historial de estados
+        estado_timeline, timeline_items = construir_timeline(recluta)
         
         return jsonify({
             "success": True,
@@ -620,13 +1022,13 @@ def update_perfil():
         if 'foto' in request.files:
             archivo = request.files['foto']
             if archivo and archivo.filename:
-                # Eliminar foto anterior si existe
-                if usuario.foto_url:
-                    eliminar_archivo(usuario.foto_url)
-                    
                 ruta_relativa = guardar_archivo(archivo, 'usuario')
                 if ruta_relativa:
+                    # La foto anterior se elimina en segundo plano tras el commit
+                    if usuario.foto_url:
+                        encolar('eliminar_archivos', rutas=[usuario.foto_url])
                     usuario.foto_url = ruta_relativa
+                    encolar('procesar_imagen', ruta=ruta_relativa)
         
         # Guardar cambios
         try:
@@ -643,6 +1045,25 @@ def update_perfil():
         current_app.logger.error(f"Error al actualizar perfil: {str(e)}")
         return jsonify({"success": False, "message": f"Error al actualizar perfil: {str(e)}"}), 500
 
+@api_bp.route('/usuarios/<int:id>/foto', methods=['GET'])
+@login_required
+def get_usuario_foto(id):
+    """
+    Descarga la foto de perfil de un usuario (o una variante con ?variante=thumb|medium).
+    Sólo para usuarios autenticados.
+    """
+    try:
+        usuario = db.session.get(Usuario, id)
+        if not usuario:
+            return jsonify({"success": False, "message": "Usuario no encontrado"}), 404
+        
+        return _enviar_foto(usuario.foto_url)
+    except HTTPException:
+        raise
+    except Exception as e:
+        current_app.logger.error(f"Error al descargar la foto del usuario {id}: {str(e)}")
+        return jsonify({"success": False, "message": f"Error: {str(e)}"}), 500
+
 @api_bp.route('/usuario', methods=['GET'])
 @login_required
 def get_usuario_actual():
@@ -712,8 +1133,8 @@ def upload_documento_recluta(id):
         if not archivo.filename.lower().endswith('.pdf'):
             return jsonify({"success": False, "message": "Solo se permiten archivos PDF"}), 400
         
-        # Guardar archivo
-        ruta_relativa = guardar_archivo(archivo, f'reclutas/{id}/documentos', tipos_permitidos=['pdf'])
+        # Guardar archivo (el almacenamiento por contenido deduplica entre reclutas)
+        ruta_relativa = guardar_archivo(archivo, 'documentos', tipos_permitidos=['pdf'])
         
         if ruta_relativa:
             # Crear registro en base de datos
@@ -722,15 +1143,21 @@ def upload_documento_recluta(id):
                 nombre=secure_filename(archivo.filename),
                 url=ruta_relativa,
                 tipo='pdf',
-                tamaño=archivo.content_length
+                tamaño=os.path.getsize(ruta_absoluta(ruta_relativa)),
+                estado='procesando'
             )
             
             db.session.add(nuevo_documento)
+            db.session.flush()
+            
+            # Validación y extracción de metadatos después de responder
+            tarea = encolar('procesar_documento', documento_id=nuevo_documento.id)
             db.session.commit()
             
             return jsonify({
                 "success": True,
-                "documento": nuevo_documento.serialize()
+                "documento": nuevo_documento.serialize(),
+                "tarea_id": tarea.id
             }), 201
         else:
             return jsonify({"success": False, "message": "Error al guardar el archivo"}), 500
@@ -739,6 +1166,272 @@ def upload_documento_recluta(id):
         current_app.logger.error(f"Error al subir documento: {str(e)}")
         return jsonify({"success": False, "message": f"Error: {str(e)}"}), 500
 
+# ----- API DE CARGA DE DOCUMENTOS POR FRAGMENTOS -----
+
+@api_bp.route('/reclutas/<int:id>/documentos/cargas', methods=['POST'])
+@login_required
+def iniciar_carga_documento(id):
+    """
+    Inicia una carga reanudable de un documento PDF.
+    Espera JSON con nombre, tamaño y sha256 del archivo completo.
+    """
+    try:
+        recluta = Recluta.get_by_id(id, current_user=current_user)
+        if not recluta:
+            return jsonify({"success": False, "message": "Recluta no encontrado o sin permisos para acceder"}), 404
+        
+        data = request.get_json() or {}
+        nombre = secure_filename(data.get('nombre', ''))
+        sha256 = (data.get('sha256') or '').lower() or None
+        
+        # Validar datos
+        errors = {}
+        if not nombre.lower().endswith('.pdf'):
+            errors['nombre'] = 'Solo se permiten archivos PDF'
+        try:
+            tamaño = int(data.get('tamaño'))
+            if tamaño <= 0 or tamaño > current_app.config['MAX_DOCUMENTO_SIZE']:
+                errors['tamaño'] = f"El tamaño debe estar entre 1 byte y {current_app.config['MAX_DOCUMENTO_SIZE'] // (1024*1024)}MB"
+        except (ValueError, TypeError):
+            errors['tamaño'] = 'El tamaño del archivo es requerido'
+        if not sha256:
+            errors['sha256'] = 'El checksum SHA-256 del archivo es requerido'
+        elif not re.match(r'^[0-9a-f]{64}$', sha256):
+            errors['sha256'] = 'El checksum debe ser un SHA-256 en hexadecimal'
+        if errors:
+            return jsonify({"success": False, "message": "Error de validación", "errors": errors}), 400
+        
+        carga = CargaDocumento(
+            id=uuid.uuid4().hex,
+            recluta_id=recluta.id,
+            usuario_id=current_user.id,
+            nombre=nombre,
+            tamaño_total=tamaño,
+            sha256=sha256
+        )
+        
+        # Crear el archivo parcial vacío
+        ruta = ruta_carga(carga.id)
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        open(ruta, 'wb').close()
+        
+        db.session.add(carga)
+        db.session.commit()
+        
+        return jsonify({
+            "success": True,
+            "carga": carga.serialize(),
+            "tamaño_fragmento": current_app.config['CARGAS_TAMANO_FRAGMENTO']
+        }), 201
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error al iniciar carga de documento: {str(e)}")
+        return jsonify({"success": False, "message": f"Error: {str(e)}"}), 500
+
+@api_bp.route('/cargas/<carga_id>', methods=['GET'])
+@login_required
+def get_carga(carga_id):
+    """
+    Obtiene el estado de una carga (bytes confirmados), para reanudarla.
+    """
+    carga = CargaDocumento.get_for_user(carga_id, current_user.id)
+    if not carga:
+        return jsonify({"success": False, "message": "Carga no encontrada"}), 404
+    
+    return jsonify({
+        "success": True,
+        "carga": carga.serialize(),
+        "tamaño_fragmento": current_app.config['CARGAS_TAMANO_FRAGMENTO']
+    })
+
+@api_bp.route('/cargas/<carga_id>', methods=['PUT'])
+@login_required
+def subir_fragmento(carga_id):
+    """
+    Recibe un fragmento de la carga en el cuerpo de la petición (bytes crudos).
+    El parámetro offset debe coincidir con los bytes ya confirmados.
+    """
+    try:
+        carga = CargaDocumento.get_for_user(carga_id, current_user.id)
+        if not carga:
+            return jsonify({"success": False, "message": "Carga no encontrada"}), 404
+        
+        offset = request.args.get('offset', type=int)
+        if offset != carga.recibido:
+            # El cliente debe continuar desde lo que el servidor tiene confirmado
+            return jsonify({
+                "success": False,
+                "message": "El offset no coincide con los bytes recibidos",
+                "carga": carga.serialize()
+            }), 409
+        
+        escritos = escribir_fragmento(ruta_carga(carga.id), offset, request.stream, carga.tamaño_total - offset)
+        
+        # Confirmar sólo si nadie más avanzó la carga mientras tanto
+        actualizada = db.session.execute(
+            db.update(CargaDocumento)
+            .where(CargaDocumento.id == carga.id, CargaDocumento.recibido == offset)
+            .values(recibido=offset + escritos, ultima_actividad=datetime.utcnow())
+        ).rowcount
+        db.session.commit()
+        db.session.refresh(carga)
+        
+        if not actualizada:
+            return jsonify({"success": False, "message": "Fragmento duplicado", "carga": carga.serialize()}), 409
+        
+        return jsonify({"success": True, "carga": carga.serialize()})
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error al recibir fragmento de la carga {carga_id}: {str(e)}")
+        return jsonify({"success": False, "message": f"Error: {str(e)}"}), 500
+
+def _descartar_carga(carga_id, ruta):
+    """Elimina una carga por fragmentos y su archivo parcial (si aún existe)"""
+    try:
+        os.remove(ruta)
+    except FileNotFoundError:
+        pass
+    db.session.execute(
+        db.delete(CargaDocumento)
+        .where(CargaDocumento.id == carga_id)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+
+@api_bp.route('/cargas/<carga_id>/finalizar', methods=['POST'])
+@login_required
+def finalizar_carga(carga_id):
+    """
+    Verifica el checksum de una carga completa, mueve el archivo a su ruta
+    definitiva y crea el Documento en la misma transacción.
+    
+    La carga se reclama con un DELETE condicionado antes de mover el archivo:
+    de dos finalizaciones simultáneas sólo una lo mueve. Si el archivo
+    parcial ya no existe (la transacción que lo movió falló), la carga se
+    descarta y el cliente debe empezar de nuevo.
+    """
+    try:
+        carga = CargaDocumento.get_for_user(carga_id, current_user.id)
+        if not carga:
+            return jsonify({"success": False, "message": "Carga no encontrada"}), 404
+        
+        if carga.recibido < carga.tamaño_total:
+            return jsonify({"success": False, "message": "La carga está incompleta", "carga": carga.serialize()}), 400
+        
+        ruta = ruta_carga(carga.id)
+        if not carga.sha256:
+            # Cargas iniciadas antes de que el checksum fuera obligatorio: no se pueden verificar
+            _descartar_carga(carga.id, ruta)
+            return jsonify({"success": False, "message": "La carga no tiene checksum, vuelva a subir el archivo"}), 400
+        
+        try:
+            sha256 = calcular_sha256(ruta)
+        except FileNotFoundError:
+            _descartar_carga(carga.id, ruta)
+            return jsonify({"success": False, "message": "El archivo de la carga ya no existe, vuelva a subir el archivo"}), 410
+        
+        if sha256 != carga.sha256:
+            # El contenido está corrupto: descartar para que el cliente empiece de nuevo
+            _descartar_carga(carga.id, ruta)
+            return jsonify({"success": False, "message": "El checksum no coincide, vuelva a subir el archivo"}), 400
+        
+        recluta_id, nombre, tamaño_total = carga.recluta_id, carga.nombre, carga.tamaño_total
+        reclamada = db.session.execute(
+            db.delete(CargaDocumento)
+            .where(CargaDocumento.id == carga.id)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if not reclamada:
+            db.session.rollback()
+            return jsonify({"success": False, "message": "La carga ya fue finalizada"}), 409
+        
+        # Renombrado atómico a la ruta por contenido
+        try:
+            ruta_relativa = almacenar_contenido(ruta, sha256, tamaño_total, 'documentos', 'pdf')
+        except FileNotFoundError:
+            # Revertir también la referencia sumada al contenido
+            db.session.rollback()
+            _descartar_carga(carga_id, ruta)
+            return jsonify({"success": False, "message": "El archivo de la carga ya no existe, vuelva a subir el archivo"}), 410
+        
+        nuevo_documento = Documento(
+            recluta_id=recluta_id,
+            nombre=nombre,
+            url=ruta_relativa,
+            tipo='pdf',
+            tamaño=tamaño_total,
+            estado='procesando'
+        )
+        db.session.add(nuevo_documento)
+        db.session.flush()
+        
+        tarea = encolar('procesar_documento', documento_id=nuevo_documento.id)
+        db.session.commit()
+        
+        return jsonify({
+            "success": True,
+            "documento": nuevo_documento.serialize(),
+            "tarea_id": tarea.id
+        }), 201
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error al finalizar la carga {carga_id}: {str(e)}")
+        return jsonify({"success": False, "message": f"Error: {str(e)}"}), 500
+
+@api_bp.route('/documentos', methods=['GET'])
+@login_required
+def get_documentos_reclutas():
+    """
+    Obtiene los documentos de varios reclutas (?recluta_ids=1,2,3), agrupados por recluta.
+    """
+    try:
+        try:
+            recluta_ids = [int(i) for i in request.args.get('recluta_ids', '').split(',') if i.strip()]
+        except ValueError:
+            return jsonify({"success": False, "message": "recluta_ids debe ser una lista de enteros separados por comas"}), 400
+        
+        if not recluta_ids:
+            return jsonify({"success": False, "message": "Se requiere al menos un ID en recluta_ids"}), 400
+        
+        if len(recluta_ids) > current_app.config['MAX_PAGE_SIZE']:
+            return jsonify({
+                "success": False,
+                "message": f"Máximo {current_app.config['MAX_PAGE_SIZE']} reclutas por consulta"
+            }), 400
+        
+        agrupados = {recluta_id: [] for recluta_id in recluta_ids}
+        for documento in Documento.get_by_reclutas(recluta_ids, current_user=current_user):
+            agrupados[documento.recluta_id].append(documento.serialize())
+        
+        return jsonify({
+            "success": True,
+            "documentos": agrupados
+        })
+    except Exception as e:
+        current_app.logger.error(f"Error al obtener documentos de reclutas: {str(e)}")
+        return jsonify({"success": False, "message": f"Error: {str(e)}"}), 500
+
+@api_bp.route('/documentos/<int:id>/contenido', methods=['GET'])
+@login_required
+def get_documento_contenido(id):
+    """
+    Descarga el contenido de un documento, verificando permisos sobre el recluta.
+    Soporta peticiones Range y condicionales.
+    """
+    try:
+        documento = Documento.query.get(id)
+        if not documento or not Recluta.get_by_id(documento.recluta_id, current_user=current_user):
+            return jsonify({"success": False, "message": "Documento no encontrado o sin permisos para acceder"}), 404
+        
+        return enviar_archivo(documento.url, nombre_descarga=documento.nombre, mimetype='application/pdf')
+    except HTTPException:
+        raise
+    except Exception as e:
+        current_app.logger.error(f"Error al descargar documento {id}: {str(e)}")
+        return jsonify({"success": False, "message": f"Error: {str(e)}"}), 500
+
 @api_bp.route('/documentos/<int:id>', methods=['DELETE'])
 @login_required
 def delete_documento(id):
@@ -752,9 +1445,9 @@ def delete_documento(id):
         if not documento:
             return jsonify({"success": False, "message": "Documento no encontrado"}), 404
         
-        # Eliminar archivo físico
+        # Eliminar archivo físico (en segundo plano, tras el commit)
         if documento.url:
-            eliminar_archivo(documento.url)
+            encolar('eliminar_archivos', rutas=[documento.url])
         
         # Eliminar registro
         db.session.delete(documento)
@@ -766,6 +1459,67 @@ def delete_documento(id):
         current_app.logger.error(f"Error al eliminar documento {id}: {str(e)}")
         return jsonify({"success": False, "message": f"Error: {str(e)}"}), 500
 
+@api_bp.route('/tareas/<int:id>', methods=['GET'])
+@login_required
+def get_tarea(id):
+    """
+    Obtiene el estado de una tarea en segundo plano.
+    Sólo la ve quien la encoló o un administrador.
+    """
+    try:
+        tarea = Tarea.get_for_user(id, current_user)
+        if not tarea:
+            return jsonify({"success": False, "message": "Tarea no encontrada"}), 404
+        
+        return jsonify({
+            "success": True,
+            "tarea": tarea.serialize()
+        })
+    except Exception as e:
+        current_app.logger.error(f"Error al obtener tarea {id}: {str(e)}")
+        return jsonify({"success": False, "message": f"Error: {str(e)}"}), 500
+
+@api_bp.route('/batch', methods=['POST'])
+def batch():
+    """
+    Ejecuta varias peticiones GET en una sola llamada.
+    
+    Espera {"peticiones": [{"id": "...", "url": "/api/...", "method": "GET"}, ...]}
+    y responde con el estado y el cuerpo de cada una, en el mismo orden. Cada
+    sub-petición aplica sus propios requisitos de autenticación.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        peticiones = data.get('peticiones')
+        
+        if not isinstance(peticiones, list) or not peticiones:
+            return jsonify({"success": False, "message": "Se requiere una lista de peticiones"}), 400
+        
+        if len(peticiones) > current_app.config['BATCH_MAX_PETICIONES']:
+            return jsonify({
+                "success": False,
+                "message": f"Máximo {current_app.config['BATCH_MAX_PETICIONES']} peticiones por batch"
+            }), 400
+        
+        respuestas = []
+        for indice, peticion in enumerate(peticiones):
+            if not isinstance(peticion, dict):
+                peticion = {}
+            status, cuerpo = ejecutar_subpeticion(peticion.get('url'), peticion.get('method', 'GET'))
+            respuestas.append({
+                "id": peticion.get('id', indice),
+                "status": status,
+                "body": cuerpo
+            })
+        
+        return jsonify({
+            "success": True,
+            "respuestas": respuestas
+        })
+    except Exception as e:
+        current_app.logger.error(f"Error al ejecutar batch: {str(e)}")
+        return jsonify({"success": False, "message": f"Error al ejecutar batch: {str(e)}"}), 500
+
 @api_bp.route('/recuperar-folio', methods=['POST'])
 def recuperar_folio():
     """
@@ -1,29 +1,97 @@
-from flask import Blueprint, render_template, send_file, current_app, redirect, url_for, request, jsonify
+from flask import Blueprint, render_template, send_file, current_app, redirect, url_for, request, jsonify, Response
 from flask_login import login_required
+from functools import lru_cache
+import hashlib
 import io
+import logging
 from PIL import Image, ImageDraw
 from models.recluta import Recluta
+from utils.cache import cachear_pagina
 
 main_bp = Blueprint('main', __name__)
 
+# Número máximo de tamaños de placeholder distintos que se mantienen en memoria
+PLACEHOLDER_CACHE_SIZE = 256
+
+# Las imágenes generadas sólo dependen de la URL, así que se pueden cachear un año
+IMAGENES_GENERADAS_MAX_AGE = 365 * 24 * 3600
+
+def _generar_favicon():
+    """
+    Genera un favicon básico codificado en formato ICO.
+    
+    Returns:
+        bytes de la imagen ICO
+    """
+    empty_ico = io.BytesIO()
+    img = Image.new('RGB', (16, 16), color=(255, 255, 255))
+    img.save(empty_ico, 'ICO')
+    return empty_ico.getvalue()
+
+@lru_cache(maxsize=PLACEHOLDER_CACHE_SIZE)
+def _generar_placeholder(width, height):
+    """
+    Genera una imagen placeholder PNG. El resultado se memoiza por tamaño.
+    
+    Args:
+        width: Ancho de la imagen en píxeles
+        height: Alto de la imagen en píxeles
+        
+    Returns:
+        bytes de la imagen PNG
+    """
+    # Crear una imagen gris con las dimensiones especificadas
+    img = Image.new('RGB', (width, height), color=(200, 200, 200))
+    draw = ImageDraw.Draw(img)
+    
+    # Dibujar un borde
+    draw.rectangle([(0, 0), (width-1, height-1)], outline=(150, 150, 150))
+    
+    # Añadir texto con el tamaño
+    text = f"{width}x{height}"
+    draw.text((width//2-20, height//2-10), text, fill=(100, 100, 100))
+    
+    # Convertir a bytes para enviar
+    img_io = io.BytesIO()
+    img.save(img_io, 'PNG')
+    return img_io.getvalue()
+
+def _respuesta_imagen_cacheable(contenido, mimetype):
+    """
+    Construye una respuesta para una imagen generada con ETag y caché de larga duración.
+    
+    Args:
+        contenido: bytes de la imagen
+        mimetype: Tipo MIME de la imagen
+        
+    Returns:
+        Response (304 si el cliente ya tiene la misma versión)
+    """
+    response = Response(contenido, mimetype=mimetype)
+    response.set_etag(hashlib.sha1(contenido).hexdigest())
+    response.cache_control.public = True
+    response.cache_control.max_age = IMAGENES_GENERADAS_MAX_AGE
+    response.cache_control.immutable = True
+    return response.make_conditional(request)
+
+# El favicon no cambia nunca: se genera una sola vez al cargar la aplicación
+try:
+    FAVICON_ICO = _generar_favicon()
+except Exception as e:
+    logging.getLogger(__name__).error(f"Error al generar favicon: {str(e)}")
+    FAVICON_ICO = None
+
 @main_bp.route('/favicon.ico')
 def favicon():
     """
-    Genera un favicon básico.
+    Sirve el favicon básico generado al inicio.
     
     Returns:
         Imagen ICO como favicon
     """
-    try:
-        # Crear un favicon vacío
-        empty_ico = io.BytesIO()
-        img = Image.new('RGB', (16, 16), color=(255, 255, 255))
-        img.save(empty_ico, 'ICO')
-        empty_ico.seek(0)
-        return send_file(empty_ico, mimetype='image/x-icon')
-    except Exception as e:
-        current_app.logger.error(f"Error al generar favicon: {str(e)}")
+    if FAVICON_ICO is None:
         return "", 204  # No content
+    return _respuesta_imagen_cacheable(FAVICON_ICO, 'image/x-icon')
 
 @main_bp.route('/dashboard')
 @login_required
@@ -48,6 +116,7 @@ def perfil():
     return render_template('perfil.html')
 
 @main_bp.route('/seguimiento')
+@cachear_pagina()
 def seguimiento():
     """
     Página pública para que los candidatos consulten su estado.
@@ -91,6 +160,7 @@ def estado_folio(folio):
     return render_template('seguimiento.html', folio=folio, auto_consulta=True)
 
 @main_bp.route('/cliente')
+@cachear_pagina()
 def portal_cliente():
     """
     Portal principal para clientes, con acceso a diferentes opciones
@@ -134,6 +204,7 @@ def page_not_found(e):
     return render_template('404.html'), 404
 
 @main_bp.route('/')
+@cachear_pagina()
 def index():
     """
     Ruta principal. Muestra la página de inicio/login.
@@ -155,28 +226,12 @@ def placeholder(width, height):
     Returns:
         Imagen PNG generada dinámicamente
     """
-    # Limitar tamaños para evitar problemas de recursos
-    width = min(width, 800)
-    height = min(height, 800)
+    # Limitar tamaños para evitar problemas de recursos (y acotar las entradas en caché)
+    width = max(1, min(width, 800))
+    height = max(1, min(height, 800))
     
     try:
-        # Crear una imagen gris con las dimensiones especificadas
-        img = Image.new('RGB', (width, height), color=(200, 200, 200))
-        draw = ImageDraw.Draw(img)
-        
-        # Dibujar un borde
-        draw.rectangle([(0, 0), (width-1, height-1)], outline=(150, 150, 150))
-        
-        # Añadir texto con el tamaño
-        text = f"{width}x{height}"
-        draw.text((width//2-20, height//2-10), text, fill=(100, 100, 100))
-        
-        # Convertir a bytes para enviar
-        img_io = io.BytesIO()
-        img.save(img_io, 'PNG')
-        img_io.seek(0)
-        
-        return send_file(img_io, mimetype='image/png')
+        return _respuesta_imagen_cacheable(_generar_placeholder(width, height), 'image/png')
     except Exception as e:
         current_app.logger.error(f"Error al generar placeholder: {str(e)}")
         # Devolver una imagen más pequeña en caso de error
@@ -0,0 +1,35 @@
+/**
+ * Utilidades para agrupar peticiones a la API
+ */
+import CONFIG from './config.js';
+
+/**
+ * Ejecuta varias peticiones GET en una sola llamada a /api/batch
+ * @param {Object} peticiones - Mapa {id: url} de las peticiones a ejecutar
+ * @returns {Promise<Object>} - Mapa {id: {status, body}} con cada respuesta
+ */
+export async function batch(peticiones) {
+    const response = await fetch(`${CONFIG.API_URL}/batch`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            'Accept': 'application/json'
+        },
+        body: JSON.stringify({
+            peticiones: Object.entries(peticiones).map(([id, url]) => ({ id, url, method: 'GET' }))
+        })
+    });
+
+    if (!response.ok) {
+        throw new Error(`Error ${response.status}: ${response.statusText}`);
+    }
+
+    const data = await response.json();
+    if (!data.success) {
+        throw new Error(data.message || 'Error al ejecutar batch');
+    }
+
+    return Object.fromEntries(data.respuestas.map(respuesta => [respuesta.id, respuesta]));
+}
+
+export default { batch };
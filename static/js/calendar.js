@@ -4,12 +4,17 @@
 import CONFIG from './config.js';
 import { showNotification, showError, showSuccess } from './notifications.js';
 import UI from './ui.js';
+import Auth from './auth.js';
+import Eventos from './eventos.js';
 
 const Calendar = {
     currentDate: new Date(),
     currentMonth: new Date().getMonth(),
     currentYear: new Date().getFullYear(),
     calendarEvents: [],
+    calendarDays: {},
+    maxEventsPerDay: 3,
+    loadToken: 0,
     monthNames: ['Enero', 'Febrero', 'Marzo', 'Abril', 'Mayo', 'Junio', 'Julio', 'Agosto', 'Septiembre', 'Octubre', 'Noviembre', 'Diciembre'],
     dayNames: ['Dom', 'Lun', 'Mar', 'Mié', 'Jue', 'Vie', 'Sáb'],
     monthShortNames: ['ENE', 'FEB', 'MAR', 'ABR', 'MAY', 'JUN', 'JUL', 'AGO', 'SEP', 'OCT', 'NOV', 'DIC'],
@@ -29,8 +34,8 @@ const Calendar = {
         // Generar días del calendario
         this.generateCalendarDays();
         
-        // Cargar eventos guardados
-        this.loadSavedEvents();
+        // Cargar entrevistas del mes desde el servidor
+        this.loadMonthEvents();
         
         // Configurar navegación del calendario
         this.setupCalendarNavigation();
@@ -159,40 +164,244 @@ const Calendar = {
         
         // Regenerar días y recargar eventos
         this.generateCalendarDays();
-        this.loadSavedEvents();
+        this.loadMonthEvents();
     },
     
     /**
-     * Carga y muestra eventos guardados
+     * Carga del servidor el resumen del mes mostrado y lo pinta en el calendario
      */
-    loadSavedEvents: function() {
+    loadMonthEvents: async function() {
+        // Descartar respuestas de meses por los que ya se navegó
+        const token = ++this.loadToken;
+        const mes = `${this.currentYear}-${String(this.currentMonth + 1).padStart(2, '0')}`;
+        
         try {
-            // Obtener eventos del almacenamiento local
-            const savedEvents = localStorage.getItem(CONFIG.STORAGE_KEYS.CALENDAR_EVENTS);
-            if (!savedEvents) return;
+            const response = await fetch(`${CONFIG.API_URL}/calendario?mes=${mes}`, {
+                headers: { 'Accept': 'application/json' }
+            });
+            if (!response.ok) {
+                throw new Error(`Error ${response.status}: ${response.statusText}`);
+            }
             
-            const allEvents = JSON.parse(savedEvents);
-            this.calendarEvents = allEvents;
+            const data = await response.json();
+            if (!data.success) {
+                throw new Error(data.message || 'Error al obtener el calendario');
+            }
+            if (token !== this.loadToken) return;
             
-            // Filtrar eventos del mes actual
-            const currentMonthEvents = allEvents.filter(event => {
-                const eventDate = new Date(event.date);
-                return eventDate.getMonth() === this.currentMonth && 
-                       eventDate.getFullYear() === this.currentYear;
-            });
+            this.calendarDays = data.dias;
+            this.calendarEvents = Object.entries(data.dias).flatMap(([fecha, dia]) =>
+                dia.entrevistas.map(entrevista => this.toCalendarEvent(entrevista, fecha))
+            );
             
-            // Mostrar eventos en el calendario
-            currentMonthEvents.forEach(event => {
-                this.displayEventInCalendar(event);
+            // Mostrar las primeras entrevistas de cada día y el resto como contador
+            Object.entries(data.dias).forEach(([fecha, dia]) => {
+                this.calendarEvents
+                    .filter(event => event.date === fecha)
+                    .slice(0, this.maxEventsPerDay)
+                    .forEach(event => this.displayEventInCalendar(event));
+                
+                if (dia.total > this.maxEventsPerDay) {
+                    this.displayMoreIndicator(fecha, dia.total - this.maxEventsPerDay);
+                }
             });
             
             // Actualizar lista de próximas entrevistas
             this.updateUpcomingEventsList();
         } catch (error) {
-            console.error('Error al cargar eventos guardados:', error);
+            console.error('Error al cargar el calendario:', error);
+            showError('No se pudo cargar el calendario');
+        }
+    },
+    
+    /**
+     * Convierte el resumen de una entrevista devuelto por la API en un evento del calendario
+     * @param {Object} entrevista - Resumen de la entrevista
+     * @param {string} fecha - Fecha YYYY-MM-DD
+     * @returns {Object} - Evento del calendario
+     */
+    toCalendarEvent: function(entrevista, fecha) {
+        return {
+            id: entrevista.id,
+            candidateId: entrevista.recluta_id,
+            candidateName: entrevista.recluta_nombre,
+            date: fecha,
+            time: entrevista.hora,
+            duration: entrevista.duracion,
+            type: entrevista.tipo,
+            location: entrevista.ubicacion,
+            estado: entrevista.estado
+        };
+    },
+    
+    /**
+     * Muestra en un día el número de entrevistas que no caben en la casilla
+     * @param {string} fecha - Fecha YYYY-MM-DD
+     * @param {number} restantes - Número de entrevistas no mostradas
+     */
+    displayMoreIndicator: function(fecha, restantes) {
+        const dayCell = document.querySelector(`.calendar-day[data-date="${fecha}"]`);
+        if (!dayCell) return;
+        
+        const moreElement = document.createElement('div');
+        moreElement.className = 'calendar-event calendar-event-more';
+        moreElement.textContent = `+${restantes} más`;
+        dayCell.appendChild(moreElement);
+    },
+    
+    /**
+     * Aplica al mes mostrado un cambio de entrevista recibido por el canal de eventos
+     * @param {string} tipo - 'creada', 'actualizada' o 'eliminada'
+     * @param {Object} datos - Resumen de la entrevista ({id} si se eliminó)
+     */
+    applyDelta: function(tipo, datos) {
+        const mes = `${this.currentYear}-${String(this.currentMonth + 1).padStart(2, '0')}`;
+        const anterior = this.calendarEvents.find(event => event.id === datos.id);
+        const fechas = new Set(anterior ? [anterior.date] : []);
+        
+        this.calendarEvents = this.calendarEvents.filter(event => event.id !== datos.id);
+        if (tipo !== 'eliminada' && datos.fecha && datos.fecha.startsWith(mes)) {
+            this.calendarEvents.push(this.toCalendarEvent(datos, datos.fecha));
+            fechas.add(datos.fecha);
+        }
+        
+        if (fechas.size === 0) return;
+        fechas.forEach(fecha => this.renderDay(fecha));
+        this.updateUpcomingEventsList();
+    },
+    
+    /**
+     * Aplica al calendario el cambio de un recluta (nombre o asesor asignado)
+     * @param {Object} datos - Fila del recluta
+     */
+    applyReclutaDelta: function(datos) {
+        const usuario = Auth.currentUser;
+        if (usuario && usuario.rol === 'asesor' && datos.asesor_anterior_id !== undefined) {
+            // Reasignado desde o hacia este asesor: sus entrevistas entran o salen del calendario
+            this.refreshCalendarEvents();
+            return;
+        }
+        
+        const fechas = new Set();
+        this.calendarEvents.forEach(event => {
+            if (event.candidateId === datos.id && event.candidateName !== datos.nombre) {
+                event.candidateName = datos.nombre;
+                fechas.add(event.date);
+            }
+        });
+        fechas.forEach(fecha => this.renderDay(fecha));
+        if (fechas.size > 0) this.updateUpcomingEventsList();
+    },
+    
+    /**
+     * Vuelve a pintar las entrevistas de un día
+     * @param {string} fecha - Fecha YYYY-MM-DD
+     */
+    renderDay: function(fecha) {
+        const dayCell = document.querySelector(`.calendar-day[data-date="${fecha}"]`);
+        if (!dayCell) return;
+        
+        dayCell.querySelectorAll('.calendar-event').forEach(el => el.remove());
+        
+        const eventos = this.calendarEvents
+            .filter(event => event.date === fecha)
+            .sort((a, b) => this.convertTimeToMinutes(a.time) - this.convertTimeToMinutes(b.time));
+        eventos.slice(0, this.maxEventsPerDay).forEach(event => this.displayEventInCalendar(event));
+        if (eventos.length > this.maxEventsPerDay) {
+            this.displayMoreIndicator(fecha, eventos.length - this.maxEventsPerDay);
         }
     },
     
+    /**
+     * Envía una petición de escritura sobre entrevistas a la API
+     * @param {string} method - Método HTTP
+     * @param {string} path - Ruta relativa a la API
+     * @param {Object} body - Datos a enviar (opcional)
+     * @returns {Promise<Object>} - Respuesta JSON
+     */
+    sendInterviewRequest: async function(method, path, body) {
+        const response = await fetch(`${CONFIG.API_URL}${path}`, {
+            method,
+            headers: {
+                'Content-Type': 'application/json',
+                'Accept': 'application/json'
+            },
+            body: body ? JSON.stringify(body) : undefined
+        });
+        
+        const data = await response.json().catch(() => ({}));
+        if (!response.ok || !data.success) {
+            const errores = data.errors ? Object.values(data.errors).join(', ') : null;
+            const error = new Error(errores || data.message || `Error ${response.status}`);
+            error.status = response.status;
+            error.conflictos = data.conflictos || [];
+            throw error;
+        }
+        return data;
+    },
+    
+    /**
+     * Guarda una entrevista; si el servidor detecta solapamientos (409) pide
+     * confirmación y, si se acepta, la guarda forzando el horario
+     * @param {string} method - POST o PUT
+     * @param {string} path - Ruta relativa a la API
+     * @param {Object} payload - Datos de la entrevista
+     * @returns {Promise<Object|null>} - Respuesta JSON, o null si el usuario cancela
+     */
+    saveWithConflictCheck: async function(method, path, payload) {
+        try {
+            return await this.sendInterviewRequest(method, path, payload);
+        } catch (error) {
+            if (error.status !== 409) throw error;
+            
+            const confirmado = await this.confirmConflicts(error.conflictos);
+            if (!confirmado) return null;
+            return await this.sendInterviewRequest(method, path, { ...payload, forzar: true });
+        }
+    },
+    
+    /**
+     * Muestra las entrevistas que chocan con el horario y espera la decisión del usuario
+     * @param {Array} conflictos - Entrevistas en conflicto devueltas por la API
+     * @returns {Promise<boolean>} - true si el usuario decide programar de todos modos
+     */
+    confirmConflicts: function(conflictos) {
+        return new Promise(resolve => {
+            const detalle = conflictos.map(c =>
+                `${c.hora} ${c.recluta_nombre} (${c.motivo === 'ubicacion' ? 'misma ubicación' : 'mismo asesor'})`
+            ).join(', ');
+            
+            // Cerrar con la X equivale a cancelar
+            const closeButton = document.querySelector('#confirm-modal .close-modal');
+            if (closeButton) closeButton.addEventListener('click', () => resolve(false), { once: true });
+            
+            UI.showConfirmModal({
+                title: 'Horario ocupado',
+                message: `La entrevista se solapa con: ${detalle}. ¿Deseas guardarla de todos modos?`,
+                confirmText: 'Guardar de todos modos',
+                confirmButtonClass: 'btn-primary',
+                onConfirm: () => resolve(true),
+                onCancel: () => resolve(false)
+            });
+        });
+    },
+    
+    /**
+     * Convierte un evento del calendario en los campos que espera la API de entrevistas
+     * @param {Object} event - Evento del calendario
+     * @returns {Object} - Datos de la entrevista
+     */
+    toInterviewPayload: function(event) {
+        return {
+            fecha: event.date,
+            hora: event.time,
+            duracion: parseInt(event.duration, 10) || 60,
+            tipo: event.type || 'presencial',
+            ubicacion: event.location || '',
+            notas: event.notes || ''
+        };
+    },
+    
     /**
      * Muestra un evento en el calendario
      * @param {Object} event - Evento a mostrar
@@ -389,7 +598,7 @@ const Calendar = {
      * Abre el modal para editar un evento
      * @param {Object} event - Evento a editar
      */
-    editEvent: function(event) {
+    editEvent: async function(event) {
         const modalId = 'schedule-interview-modal';
         const modal = document.getElementById(modalId);
         if (!modal) {
@@ -397,6 +606,15 @@ const Calendar = {
             return;
         }
         
+        // El resumen del calendario no incluye las notas: obtener la entrevista completa
+        try {
+            const data = await this.sendInterviewRequest('GET', `/entrevistas/${event.id}`);
+            event = { ...event, notes: data.entrevista.notas || '' };
+        } catch (error) {
+            showError(`No se pudo cargar la entrevista: ${error.message}`);
+            return;
+        }
+        
         // Elementos del formulario
         const formElements = {
             dateInput: document.getElementById('interview-date'),
@@ -486,26 +704,8 @@ const Calendar = {
             sendInvitation: formElements.sendInvitation ? formElements.sendInvitation.checked : false
         };
         
-        // Verificar solapamientos si cambia la fecha o la hora
-        if (updatedEventData.date !== originalEvent.date || updatedEventData.time !== originalEvent.time) {
-            this.checkTimeOverlap(updatedEventData, (hasOverlap, conflictEvent) => {
-                if (hasOverlap) {
-                    showError(`La entrevista se solapa con "${conflictEvent.candidateName}" a las ${conflictEvent.time}`);
-                    
-                    if (formElements.saveButton) {
-                        formElements.saveButton.innerHTML = '<i class="fas fa-save"></i> Guardar Cambios';
-                        formElements.saveButton.disabled = false;
-                    }
-                    return;
-                }
-                
-                // No hay solapamiento, actualizar
-                this.completeEventUpdate(updatedEventData, originalEvent);
-            });
-        } else {
-            // Si no cambia fecha ni hora, actualizar directamente
-            this.completeEventUpdate(updatedEventData, originalEvent);
-        }
+        // Los solapamientos los comprueba el servidor al guardar
+        this.completeEventUpdate(updatedEventData, originalEvent);
     },
     
     /**
@@ -513,9 +713,24 @@ const Calendar = {
      * @param {Object} updatedEventData - Datos actualizados
      * @param {Object} originalEvent - Evento original
      */
-    completeEventUpdate: function(updatedEventData, originalEvent) {
-        // Actualizar evento en el almacenamiento
-        this.updateStoredEvent(updatedEventData);
+    completeEventUpdate: async function(updatedEventData, originalEvent) {
+        // Guardar los cambios en el servidor
+        let data = null;
+        try {
+            data = await this.saveWithConflictCheck('PUT', `/entrevistas/${originalEvent.id}`, this.toInterviewPayload(updatedEventData));
+        } catch (error) {
+            console.error('Error al actualizar entrevista:', error);
+            showError(`Error al actualizar la entrevista: ${error.message}`);
+        }
+        
+        if (!data) {
+            const saveButton = document.querySelector('#schedule-interview-modal .btn-primary');
+            if (saveButton) {
+                saveButton.innerHTML = '<i class="fas fa-save"></i> Guardar Cambios';
+                saveButton.disabled = false;
+            }
+            return;
+        }
         
         // Actualizar las vistas
         this.refreshCalendarEvents();
@@ -555,153 +770,21 @@ const Calendar = {
      * Elimina un evento
      * @param {Object} event - Evento a eliminar
      */
-    deleteEvent: function(event) {
-        // Eliminar del almacenamiento
-        this.removeStoredEvent(event);
-        
-        // Actualizar vistas
-        this.refreshCalendarEvents();
-        
-        // Mostrar notificación
-        showSuccess('Entrevista eliminada correctamente');
-    },
-    
-    /**
-     * Actualiza un evento en el almacenamiento local
-     * @param {Object} eventData - Datos del evento
-     */
-    updateStoredEvent: function(eventData) {
+    deleteEvent: async function(event) {
+        // Eliminar en el servidor
         try {
-            // Obtener eventos guardados
-            let events = [];
-            const savedEvents = localStorage.getItem(CONFIG.STORAGE_KEYS.CALENDAR_EVENTS);
-            
-            if (savedEvents) {
-                events = JSON.parse(savedEvents);
-                
-                // Buscar si ya existe este evento
-                const index = events.findIndex(event => 
-                    event.id === eventData.id || 
-                    (event.candidateId === eventData.candidateId && 
-                     event.date === eventData.date && 
-                     event.time === eventData.time)
-                );
-                
-                if (index !== -1) {
-                    // Actualizar evento existente
-                    events[index] = eventData;
-                } else {
-                    // Añadir nuevo evento
-                    eventData.id = eventData.id || Date.now();
-                    events.push(eventData);
-                }
-            } else {
-                // Primera vez, crear array con este evento
-                eventData.id = eventData.id || Date.now();
-                events = [eventData];
-            }
-            
-            // Guardar en localStorage
-            localStorage.setItem(CONFIG.STORAGE_KEYS.CALENDAR_EVENTS, JSON.stringify(events));
-            
-            // Actualizar lista de eventos en memoria
-            this.calendarEvents = events;
-        } catch (error) {
-            console.error('Error al guardar evento:', error);
-            throw error;
-        }
-    },
-    
-    /**
-     * Elimina un evento del almacenamiento local
-     * @param {Object} eventData - Datos del evento a eliminar
-     */
-    removeStoredEvent: function(eventData) {
-        try {
-            // Obtener eventos guardados
-            const savedEvents = localStorage.getItem(CONFIG.STORAGE_KEYS.CALENDAR_EVENTS);
-            if (!savedEvents) return;
-            
-            let events = JSON.parse(savedEvents);
-            
-            // Filtrar para eliminar este evento
-            events = events.filter(event => 
-                event.id !== eventData.id && 
-                !(event.candidateId === eventData.candidateId && 
-                  event.date === eventData.date && 
-                  event.time === eventData.time)
-            );
-            
-            // Guardar lista actualizada
-            localStorage.setItem(CONFIG.STORAGE_KEYS.CALENDAR_EVENTS, JSON.stringify(events));
-            
-            // Actualizar lista de eventos en memoria
-            this.calendarEvents = events;
+            await this.sendInterviewRequest('DELETE', `/entrevistas/${event.id}`);
         } catch (error) {
-            console.error('Error al eliminar evento:', error);
-            throw error;
-        }
-    },
-    
-    /**
-     * Comprueba si hay solapamiento de horarios entre eventos
-     * @param {Object} newEvent - Nuevo evento a comprobar
-     * @param {Function} callback - Función de callback con el resultado
-     */
-    checkTimeOverlap: function(newEvent, callback) {
-        // Obtener todos los eventos del mismo día
-        const eventsOnSameDay = this.getEventsForDate(newEvent.date);
-        
-        // Si no hay eventos ese día, no hay solapamiento
-        if (eventsOnSameDay.length === 0) {
-            callback(false);
+            console.error('Error al eliminar entrevista:', error);
+            showError(`Error al eliminar la entrevista: ${error.message}`);
             return;
         }
         
-        // Convertir la hora del nuevo evento a minutos para comparar
-        const newStartTime = this.convertTimeToMinutes(newEvent.time);
-        const newDuration = parseInt(newEvent.duration, 10) || 60;
-        const newEndTime = newStartTime + newDuration;
-        
-        // Comprobar cada evento existente
-        for (const event of eventsOnSameDay) {
-            // No comparar con el mismo evento (para ediciones)
-            if (event.id === newEvent.id) continue;
-            
-            const eventStartTime = this.convertTimeToMinutes(event.time);
-            const eventDuration = parseInt(event.duration, 10) || 60;
-            const eventEndTime = eventStartTime + eventDuration;
-            
-            // Comprobar si hay solapamiento
-            if ((newStartTime >= eventStartTime && newStartTime < eventEndTime) ||
-                (newEndTime > eventStartTime && newEndTime <= eventEndTime) ||
-                (newStartTime <= eventStartTime && newEndTime >= eventEndTime)) {
-                
-                // Hay solapamiento, devolver el evento conflictivo
-                callback(true, event);
-                return;
-            }
-        }
-        
-        // No hay solapamiento
-        callback(false);
-    },
-    
-    /**
-     * Obtiene todos los eventos para una fecha específica
-     * @param {string} dateString - Fecha en formato YYYY-MM-DD
-     * @returns {Array} - Lista de eventos para esa fecha
-     */
-    getEventsForDate: function(dateString) {
-        const targetDate = new Date(dateString);
-        const formattedDate = this.formatDateForDataset(targetDate);
+        // Actualizar vistas
+        this.refreshCalendarEvents();
         
-        // Filtrar eventos por fecha
-        return this.calendarEvents.filter(event => {
-            const eventDate = new Date(event.date);
-            const formattedEventDate = this.formatDateForDataset(eventDate);
-            return formattedEventDate === formattedDate;
-        });
+        // Mostrar notificación
+        showSuccess('Entrevista eliminada correctamente');
     },
     
     /**
@@ -816,7 +899,7 @@ const Calendar = {
         });
         
         // Volver a cargar y mostrar eventos
-        this.loadSavedEvents();
+        this.loadMonthEvents();
     },
     
     /**
@@ -893,7 +976,7 @@ const Calendar = {
                 const badgeClass = CONFIG.ESTADOS_RECLUTA.find(e => e.value === recluta.estado)?.badgeClass || 'badge-secondary';
                 
                 // Determinar la URL de la foto
-                const fotoUrl = recluta.foto_url || '/api/placeholder/40/40';
+                const fotoUrl = recluta.foto_variantes ? `/${recluta.foto_variantes.thumb}` : (recluta.foto_url || '/api/placeholder/40/40');
                 
                 row.innerHTML = `
                     <td><img src="${fotoUrl}" alt="${recluta.nombre}" class="recluta-foto"></td>
@@ -996,7 +1079,7 @@ const Calendar = {
     /**
      * Guarda una nueva entrevista
      */
-    saveInterview: function() {
+    saveInterview: async function() {
         const formElements = {
             dateInput: document.getElementById('interview-date'),
             timeInput: document.getElementById('interview-time'),
@@ -1031,7 +1114,6 @@ const Calendar = {
         
         // Crear objeto de evento
         const eventData = {
-            id: Date.now(),
             candidateId: reclutaId,
             candidateName: reclutaName,
             date: formElements.dateInput.value,
@@ -1043,42 +1125,32 @@ const Calendar = {
             sendInvitation: formElements.sendInvitation ? formElements.sendInvitation.checked : false
         };
         
-        // Verificar solapamientos
-        this.checkTimeOverlap(eventData, (hasOverlap, conflictEvent) => {
-            if (hasOverlap) {
-                showError(`La entrevista se solapa con "${conflictEvent.candidateName}" a las ${conflictEvent.time}`);
-                
-                if (formElements.saveButton) {
-                    formElements.saveButton.innerHTML = '<i class="fas fa-calendar-check"></i> Programar';
-                    formElements.saveButton.disabled = false;
-                }
-                return;
-            }
+        try {
+            // Guardar en el servidor (que comprueba los solapamientos)
+            const data = await this.saveWithConflictCheck('POST', '/entrevistas', {
+                recluta_id: parseInt(eventData.candidateId, 10),
+                ...this.toInterviewPayload(eventData)
+            });
+            if (!data) return;
             
-            // No hay solapamiento, guardar
-            try {
-                // Guardar en almacenamiento local
-                this.updateStoredEvent(eventData);
-                
-                // Actualizar vistas
-                this.refreshCalendarEvents();
-                
-                // Cerrar modal
-                UI.closeModal('schedule-interview-modal');
-                
-                // Mostrar notificación
-                showSuccess('Entrevista programada correctamente');
-            } catch (error) {
-                console.error('Error al guardar entrevista:', error);
-                showError('Error al programar la entrevista');
-            } finally {
-                // Restaurar botón
-                if (formElements.saveButton) {
-                    formElements.saveButton.innerHTML = '<i class="fas fa-calendar-check"></i> Programar';
-                    formElements.saveButton.disabled = false;
-                }
+            // Actualizar vistas
+            this.refreshCalendarEvents();
+            
+            // Cerrar modal
+            UI.closeModal('schedule-interview-modal');
+            
+            // Mostrar notificación
+            showSuccess('Entrevista programada correctamente');
+        } catch (error) {
+            console.error('Error al guardar entrevista:', error);
+            showError(`Error al programar la entrevista: ${error.message}`);
+        } finally {
+            // Restaurar botón
+            if (formElements.saveButton) {
+                formElements.saveButton.innerHTML = '<i class="fas fa-calendar-check"></i> Programar';
+                formElements.saveButton.disabled = false;
             }
-        });
+        }
     },
     
     /**
@@ -1119,9 +1191,21 @@ const Calendar = {
             }
         }
         
-        // Registrarse para eventos de cambio de sección
+        // Cambios de otros usuarios recibidos por el canal de eventos
+        Eventos.on('entrevista.creada', datos => this.applyDelta('creada', datos));
+        Eventos.on('entrevista.actualizada', datos => this.applyDelta('actualizada', datos));
+        Eventos.on('entrevista.eliminada', datos => this.applyDelta('eliminada', datos));
+        Eventos.on('recluta.actualizado', datos => this.applyReclutaDelta(datos));
+        Eventos.on('recarga', datos => {
+            if (!datos.recurso || datos.recurso === 'entrevistas' || datos.recurso === 'reclutas') {
+                this.refreshCalendarEvents();
+            }
+        });
+        
+        // Registrarse para eventos de cambio de sección (con el canal de eventos
+        // abierto el mes mostrado ya está al día)
         document.addEventListener('sectionChanged', (e) => {
-            if (e.detail.section === 'calendario-section') {
+            if (e.detail.section === 'calendario-section' && !Eventos.isConnected()) {
                 this.refreshCalendarEvents();
             }
         });
@@ -9,13 +9,16 @@ const CONFIG = {
     
     // Configuración general
     MAX_UPLOAD_SIZE: 5 * 1024 * 1024, // 5MB
+    MAX_DOCUMENT_SIZE: 100 * 1024 * 1024, // 100MB (los documentos se suben por fragmentos)
+    UPLOAD_MAX_RETRIES: 5,
+    UPLOAD_HASH_CHUNK_SIZE: 4 * 1024 * 1024, // Bloques de lectura para el checksum de los documentos
     DEFAULT_PAGE_SIZE: 10,
     
     // Claves para almacenamiento local
     STORAGE_KEYS: {
         THEME: 'darkMode',
         PRIMARY_COLOR: 'primaryColor',
-        CALENDAR_EVENTS: 'calendarEvents'
+        CARGAS: 'cargaDocumento' // Prefijo de las cargas por fragmentos en curso (para reanudarlas)
     },
     
     // Valores por defecto
@@ -0,0 +1,104 @@
+/**
+ * Canal de eventos en vivo del servidor (Server-Sent Events en /api/eventos)
+ */
+import CONFIG from './config.js';
+
+// Tipos de evento que envía el servidor
+const TIPOS_EVENTO = [
+    'recluta.creado', 'recluta.actualizado', 'recluta.eliminado',
+    'entrevista.creada', 'entrevista.actualizada', 'entrevista.eliminada',
+    'recarga'
+];
+
+const Eventos = {
+    source: null,
+    handlers: {},
+    reconnectDelay: 0,
+    reconnectTimer: null,
+
+    /**
+     * Registra un manejador para un tipo de evento
+     * @param {string} tipo - Tipo de evento (ej. 'recluta.actualizado')
+     * @param {Function} handler - Recibe los datos del evento ya parseados
+     */
+    on: function(tipo, handler) {
+        (this.handlers[tipo] = this.handlers[tipo] || []).push(handler);
+    },
+
+    /**
+     * Abre la conexión con el servidor (si el navegador soporta EventSource)
+     */
+    connect: function() {
+        if (this.source || typeof EventSource === 'undefined') return;
+
+        const source = new EventSource(`${CONFIG.API_URL}/eventos`);
+        TIPOS_EVENTO.forEach(tipo => {
+            source.addEventListener(tipo, (e) => this.dispatch(tipo, e.data));
+        });
+        source.onopen = () => {
+            this.reconnectDelay = 0;
+        };
+        source.onerror = () => {
+            // El navegador reintenta solo tras un corte; si el servidor respondió
+            // con error (503, 401) la conexión queda cerrada y se reintenta aquí
+            if (source.readyState === EventSource.CLOSED) {
+                this.source = null;
+                this.scheduleReconnect();
+            }
+        };
+        this.source = source;
+    },
+
+    /**
+     * Programa un nuevo intento de conexión con espera creciente (máximo 60s)
+     */
+    scheduleReconnect: function() {
+        clearTimeout(this.reconnectTimer);
+        this.reconnectDelay = Math.min((this.reconnectDelay || 2500) * 2, 60000);
+        this.reconnectTimer = setTimeout(() => this.connect(), this.reconnectDelay);
+    },
+
+    /**
+     * Cierra la conexión (al cerrar sesión)
+     */
+    disconnect: function() {
+        clearTimeout(this.reconnectTimer);
+        if (this.source) {
+            this.source.close();
+            this.source = null;
+        }
+        this.reconnectDelay = 0;
+    },
+
+    /**
+     * Indica si la conexión está abierta, es decir, si los datos en pantalla se mantienen al día
+     * @returns {boolean}
+     */
+    isConnected: function() {
+        return !!this.source && this.source.readyState === EventSource.OPEN;
+    },
+
+    /**
+     * Entrega un evento a sus manejadores
+     * @param {string} tipo - Tipo de evento
+     * @param {string} data - Datos JSON del evento
+     */
+    dispatch: function(tipo, data) {
+        let datos;
+        try {
+            datos = JSON.parse(data);
+        } catch (error) {
+            console.error(`Evento ${tipo} con datos inválidos:`, error);
+            return;
+        }
+        (this.handlers[tipo] || []).forEach(handler => {
+            try {
+                handler(datos);
+            } catch (error) {
+                console.error(`Error al aplicar el evento ${tipo}:`, error);
+            }
+        });
+    }
+};
+
+export default Eventos;
@@ -9,6 +9,8 @@ import UI from './ui.js';
 import Calendar from './calendar.js';
 import Client from './client.js';
 import Timeline from './timeline.js';
+import { batch } from './api.js';
+import Eventos from './eventos.js';
 import { showNotification, showError, showSuccess } from './notifications.js';
 
 // Estado global de la aplicación
@@ -17,6 +19,12 @@ let appState = {
     currentSection: 'reclutas-section'
 };
 
+// Respuestas obtenidas en la carga inicial agrupada (se consumen una sola vez)
+let datosPrecargados = {};
+
+// Temporizador para agrupar las recargas de estadísticas provocadas por eventos
+let estadisticasTimer = null;
+
 /**
  * Inicializa los componentes de timeline en la interfaz
  */
@@ -98,7 +106,7 @@ document.addEventListener('DOMContentLoaded', async function() {
     
     // Comprobar si hay una sesión activa
     try {
-        const user = await Auth.checkAuth();
+        const user = await cargarDatosIniciales();
         if (user) {
             // Usuario autenticado, mostrar dashboard
             loginSuccess(user);
@@ -266,9 +274,13 @@ function loginSuccess(usuario) {
                 console.error('Error al cargar estadísticas:', e);
             }
             
+            initEventos();
             appState.initialized = true;
         }
         
+        // Recibir los cambios en vivo mientras la sesión esté abierta
+        Eventos.connect();
+        
         // Mostrar notificación de bienvenida
         showSuccess(`¡Bienvenido ${usuario.nombre || usuario.email}!`);
     } catch (error) {
@@ -297,7 +309,9 @@ function updateUserInfo(usuario) {
     // Foto de perfil
     const profilePic = document.getElementById('dashboard-profile-pic');
     if (profilePic) {
-        profilePic.src = usuario.foto_url || '/api/placeholder/100/100';
+        profilePic.src = usuario.foto_variantes
+            ? `/${usuario.foto_variantes.medium}`
+            : (usuario.foto_url || '/api/placeholder/100/100');
     }
     
     // Campos del formulario de perfil
@@ -524,19 +538,76 @@ function getEntrevistaType(tipo) {
     }
 }
 
+/**
+ * Obtiene en una sola llamada a /api/batch la sesión y los datos iniciales del dashboard
+ * @returns {Promise<Object|null>} - Datos del usuario o null si no hay sesión
+ */
+async function cargarDatosIniciales() {
+    try {
+        const respuestas = await batch({
+            auth: `${CONFIG.AUTH_URL}/check-auth`,
+            reclutas: `${CONFIG.API_URL}/reclutas?${Reclutas.buildQueryParams()}`,
+            asesores: `${CONFIG.API_URL}/asesores`,
+            estadisticas: `${CONFIG.API_URL}/estadisticas`
+        });
+
+        const auth = respuestas.auth?.body;
+        if (!auth || !auth.authenticated) {
+            Auth.currentUser = null;
+            return null;
+        }
+
+        Auth.currentUser = auth.usuario;
+        Reclutas.precargar({
+            reclutas: respuestas.reclutas?.body,
+            asesores: respuestas.asesores?.body
+        });
+        datosPrecargados.estadisticas = respuestas.estadisticas?.body;
+        return auth.usuario;
+    } catch (error) {
+        // Si el batch falla, cargar por separado como antes
+        console.error('Error en la carga inicial agrupada:', error);
+        return Auth.checkAuth();
+    }
+}
+
+/**
+ * Registra los manejadores de eventos en vivo que no pertenecen a un módulo
+ */
+function initEventos() {
+    // Los contadores son globales: se vuelven a pedir, agrupando ráfagas de cambios
+    ['recluta.creado', 'recluta.actualizado', 'recluta.eliminado',
+     'entrevista.creada', 'entrevista.actualizada', 'entrevista.eliminada', 'recarga'
+    ].forEach(tipo => Eventos.on(tipo, scheduleEstadisticasRefresh));
+}
+
+/**
+ * Programa una recarga de las estadísticas unos segundos después del último cambio
+ */
+function scheduleEstadisticasRefresh() {
+    clearTimeout(estadisticasTimer);
+    estadisticasTimer = setTimeout(loadEstadisticas, 2000);
+}
+
 /**
  * Carga las estadísticas del sistema
  */
 async function loadEstadisticas() {
     try {
         console.log('Cargando estadísticas...');
-        const response = await fetch(`${CONFIG.API_URL}/estadisticas`);
+        let data = datosPrecargados.estadisticas;
+        datosPrecargados.estadisticas = null;
         
-        if (!response.ok) {
-            throw new Error(`Error ${response.status}: ${response.statusText}`);
+        if (!data || !data.success) {
+            const response = await fetch(`${CONFIG.API_URL}/estadisticas`);
+            
+            if (!response.ok) {
+                throw new Error(`Error ${response.status}: ${response.statusText}`);
+            }
+            
+            data = await response.json();
         }
         
-        const data = await response.json();
         if (data.success) {
             updateEstadisticasUI(data);
             console.log('Estadísticas cargadas correctamente');
@@ -596,6 +667,8 @@ async function logout() {
     try {
         await Auth.logout();
         Auth.currentUser = null;
+        Eventos.disconnect();
+        clearTimeout(estadisticasTimer);
         
         // Cambiar a la pantalla de login
         showLoginScreen();
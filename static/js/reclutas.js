@@ -4,6 +4,9 @@
 import CONFIG from './config.js';
 import { showNotification, showError, showSuccess } from './notifications.js';
 import UI from './ui.js';
+import Auth from './auth.js';
+import Eventos from './eventos.js';
+import Sha256 from './sha256.js';
 
 const Reclutas = {
     reclutas: [],
@@ -18,6 +21,32 @@ const Reclutas = {
     },
     currentReclutaId: null,
     asesores: [], // Añadido para almacenar la lista de asesores
+    precargado: {}, // Respuestas de la carga inicial agrupada (/api/batch)
+    loaded: false, // La página actual ya se cargó y se mantiene con los eventos del servidor
+
+    /**
+     * Guarda respuestas ya obtenidas para que la primera carga no repita la petición
+     * @param {Object} datos - Cuerpos de respuesta {reclutas, asesores}
+     */
+    precargar: function(datos) {
+        this.precargado = datos || {};
+    },
+
+    /**
+     * Construye los parámetros de consulta del listado según página y filtros
+     * @returns {URLSearchParams} - Parámetros para /api/reclutas
+     */
+    buildQueryParams: function() {
+        return new URLSearchParams({
+            page: this.currentPage,
+            per_page: this.itemsPerPage,
+            search: this.filters.search,
+            estado: this.filters.estado !== 'todos' ? this.filters.estado : '',
+            sort_by: this.filters.sortBy,
+            sort_order: this.filters.sortOrder,
+            documentos_count: 1
+        });
+    },
 
     init: async function() {
     try {
@@ -53,9 +82,20 @@ const Reclutas = {
             this.populateAsesorSelectors();
         }
 
-        // Registrarse para eventos de cambio de sección
+        // Cambios de otros usuarios recibidos por el canal de eventos
+        Eventos.on('recluta.creado', datos => this.applyDelta('creado', datos));
+        Eventos.on('recluta.actualizado', datos => this.applyDelta('actualizado', datos));
+        Eventos.on('recluta.eliminado', datos => this.applyDelta('eliminado', datos));
+        Eventos.on('recarga', datos => {
+            if (!datos.recurso || datos.recurso === 'reclutas') {
+                this.loadAndDisplayReclutas();
+            }
+        });
+
+        // Registrarse para eventos de cambio de sección (con el canal de eventos
+        // abierto la lista ya está al día y no hace falta volver a pedirla)
         document.addEventListener('sectionChanged', (e) => {
-            if (e.detail.section === 'reclutas-section') {
+            if (e.detail.section === 'reclutas-section' && !(this.loaded && Eventos.isConnected())) {
                 this.loadAndDisplayReclutas();
             }
         });
@@ -71,6 +111,13 @@ const Reclutas = {
      */
     loadAsesores: async function() {
         try {
+            const precargado = this.precargado.asesores;
+            this.precargado.asesores = null;
+            if (precargado && precargado.success) {
+                this.asesores = precargado.asesores;
+                return this.asesores;
+            }
+
             const response = await fetch(`${CONFIG.API_URL}/asesores`);
 
             if (!response.ok) {
@@ -98,14 +145,16 @@ const Reclutas = {
      */
     loadReclutas: async function() {
         try {
-            const queryParams = new URLSearchParams({
-                page: this.currentPage,
-                per_page: this.itemsPerPage,
-                search: this.filters.search,
-                estado: this.filters.estado !== 'todos' ? this.filters.estado : '',
-                sort_by: this.filters.sortBy,
-                sort_order: this.filters.sortOrder
-            });
+            const precargado = this.precargado.reclutas;
+            this.precargado.reclutas = null;
+            if (precargado && precargado.success) {
+                this.reclutas = precargado.reclutas;
+                this.totalPages = precargado.pages || 1;
+                this.loaded = true;
+                return this.reclutas;
+            }
+
+            const queryParams = this.buildQueryParams();
 
             // Añadir verificación para asegurarnos que CONFIG.API_URL existe
             if (!CONFIG || !CONFIG.API_URL) {
@@ -141,6 +190,7 @@ const Reclutas = {
             if (data.success) {
                 this.reclutas = data.reclutas;
                 this.totalPages = data.pages || 1;
+                this.loaded = true;
                 return this.reclutas;
             } else {
                 throw new Error(data.message || 'Error al obtener reclutas');
@@ -221,7 +271,9 @@ displayDocumentos: function(documentos) {
     docsList.innerHTML = documentos.map(doc => `
         <div class="documento-item" style="display: flex; align-items: center; margin-bottom: 8px;">
             <i class="fas fa-file-pdf" style="color: #dc3545; margin-right: 8px;"></i>
-            <a href="${doc.url}" target="_blank" style="flex: 1;">${doc.nombre}</a>
+            <a href="${CONFIG.API_URL}/documentos/${doc.id}/contenido" target="_blank" style="flex: 1;">${doc.nombre}</a>
+            ${doc.estado === 'procesando' ? '<small style="color: var(--text-light); margin-right: 8px;">Procesando...</small>' : ''}
+            ${doc.estado === 'error' ? '<small style="color: #dc3545; margin-right: 8px;">PDF inválido</small>' : ''}
             <button class="action-btn" onclick="Reclutas.deleteDocumento(${doc.id})" title="Eliminar">
                 <i class="fas fa-trash-alt"></i>
             </button>
@@ -253,14 +305,11 @@ uploadDocumento: async function() {
     }
     
     // Validar tamaño
-    if (file.size > CONFIG.MAX_UPLOAD_SIZE) {
-        showError(`El archivo es demasiado grande. Máximo ${CONFIG.MAX_UPLOAD_SIZE / (1024 * 1024)}MB`);
+    if (file.size > CONFIG.MAX_DOCUMENT_SIZE) {
+        showError(`El archivo es demasiado grande. Máximo ${CONFIG.MAX_DOCUMENT_SIZE / (1024 * 1024)}MB`);
         return;
     }
     
-    const formData = new FormData();
-    formData.append('documento', file);
-    
     const uploadBtn = document.querySelector('#upload-document-modal .btn-primary');
     if (uploadBtn) {
         uploadBtn.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Subiendo...';
@@ -268,24 +317,16 @@ uploadDocumento: async function() {
     }
     
     try {
-        const response = await fetch(`${CONFIG.API_URL}/reclutas/${this.currentReclutaId}/documentos`, {
-            method: 'POST',
-            body: formData
+        await this.uploadPorFragmentos(this.currentReclutaId, file, (progreso, fase) => {
+            if (uploadBtn) {
+                const texto = fase === 'checksum' ? 'Verificando' : 'Subiendo';
+                uploadBtn.innerHTML = `<i class="fas fa-spinner fa-spin"></i> ${texto}... ${Math.round(progreso * 100)}%`;
+            }
         });
         
-        if (!response.ok) {
-            const errorData = await response.json();
-            throw new Error(errorData.message || `Error ${response.status}`);
-        }
-        
-        const data = await response.json();
-        if (data.success) {
-            showSuccess('Documento subido correctamente');
-            UI.closeModal('upload-document-modal');
-            this.loadDocumentos(this.currentReclutaId);
-        } else {
-            throw new Error(data.message || 'Error al subir documento');
-        }
+        showSuccess('Documento subido correctamente');
+        UI.closeModal('upload-document-modal');
+        this.loadDocumentos(this.currentReclutaId);
     } catch (error) {
         console.error('Error al subir documento:', error);
         showError('Error al subir documento: ' + error.message);
@@ -297,6 +338,159 @@ uploadDocumento: async function() {
     }
 },
 
+/**
+ * Calcula el SHA-256 de un archivo en hexadecimal, leyéndolo por bloques
+ * (no se carga entero en memoria y funciona también sin Web Crypto)
+ * @param {File} file - Archivo a procesar
+ * @param {Function} [onProgress] - Callback con el progreso (0 a 1)
+ * @returns {Promise<string>} - Hash
+ */
+calcularSha256: async function(file, onProgress = () => {}) {
+    const hash = new Sha256();
+    const tamañoBloque = CONFIG.UPLOAD_HASH_CHUNK_SIZE;
+    
+    for (let offset = 0; offset < file.size; offset += tamañoBloque) {
+        const bloque = await file.slice(offset, offset + tamañoBloque).arrayBuffer();
+        hash.update(new Uint8Array(bloque));
+        onProgress(Math.min(offset + tamañoBloque, file.size) / file.size);
+    }
+    return hash.hexDigest();
+},
+
+/**
+ * Clave de localStorage de la carga en curso de un archivo para un recluta.
+ * Identifica el archivo por nombre, tamaño y fecha de modificación, de modo
+ * que al volver a elegirlo tras recargar la página se reanude la misma carga.
+ * @param {number} reclutaId - ID del recluta
+ * @param {File} file - Archivo
+ * @returns {string}
+ */
+claveCarga: function(reclutaId, file) {
+    return `${CONFIG.STORAGE_KEYS.CARGAS}:${reclutaId}:${file.name}:${file.size}:${file.lastModified}`;
+},
+
+/**
+ * Busca en el servidor la carga guardada en localStorage para este archivo
+ * @param {string} clave - Clave de localStorage (ver claveCarga)
+ * @returns {Promise<Object|null>} - {carga, sha256, tamañoFragmento} o null si no hay nada que reanudar
+ */
+buscarCargaGuardada: async function(clave) {
+    let guardada;
+    try {
+        guardada = JSON.parse(localStorage.getItem(clave));
+    } catch (e) {
+        guardada = null;
+    }
+    if (!guardada || !guardada.id || !guardada.sha256) return null;
+    
+    try {
+        const response = await fetch(`${CONFIG.API_URL}/cargas/${guardada.id}`);
+        const data = await response.json();
+        if (response.ok && data.success) {
+            return { carga: data.carga, sha256: guardada.sha256, tamañoFragmento: data['tamaño_fragmento'] };
+        }
+        if (response.status === 404) {
+            // La carga ya no existe (finalizada, descartada o abandonada)
+            localStorage.removeItem(clave);
+        }
+    } catch (e) {
+        console.warn('No se pudo consultar la carga guardada:', e);
+    }
+    return null;
+},
+
+/**
+ * Sube un documento con el protocolo de carga por fragmentos:
+ * iniciar -> PUT de cada fragmento con su offset -> finalizar.
+ * Ante un fallo consulta el offset confirmado y reanuda desde ahí. El ID de
+ * la carga se guarda en localStorage, así que si se recarga la página y se
+ * vuelve a elegir el mismo archivo, la subida continúa donde quedó.
+ * @param {number} reclutaId - ID del recluta
+ * @param {File} file - Archivo PDF
+ * @param {Function} [onProgress] - Callback con el progreso (0 a 1) y la fase ('checksum' o 'subida')
+ * @returns {Promise<Object>} - Documento creado
+ */
+uploadPorFragmentos: async function(reclutaId, file, onProgress = () => {}) {
+    const clave = this.claveCarga(reclutaId, file);
+    let response;
+    let data;
+    let cargaId;
+    let tamañoFragmento;
+    let offset;
+    
+    const guardada = await this.buscarCargaGuardada(clave);
+    if (guardada) {
+        cargaId = guardada.carga.id;
+        tamañoFragmento = guardada.tamañoFragmento;
+        offset = guardada.carga.recibido;
+    } else {
+        const sha256 = await this.calcularSha256(file, (progreso) => onProgress(progreso, 'checksum'));
+        
+        response = await fetch(`${CONFIG.API_URL}/reclutas/${reclutaId}/documentos/cargas`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ nombre: file.name, 'tamaño': file.size, sha256 })
+        });
+        data = await response.json();
+        if (!response.ok || !data.success) {
+            throw new Error(data.message || `Error ${response.status}`);
+        }
+        
+        cargaId = data.carga.id;
+        tamañoFragmento = data['tamaño_fragmento'];
+        offset = data.carga.recibido;
+        localStorage.setItem(clave, JSON.stringify({ id: cargaId, sha256 }));
+    }
+    
+    onProgress(offset / file.size, 'subida');
+    let intentos = 0;
+    
+    while (offset < file.size) {
+        try {
+            response = await fetch(`${CONFIG.API_URL}/cargas/${cargaId}?offset=${offset}`, {
+                method: 'PUT',
+                headers: { 'Content-Type': 'application/octet-stream' },
+                body: file.slice(offset, offset + tamañoFragmento)
+            });
+            data = await response.json();
+            
+            if (response.ok && data.success) {
+                offset = data.carga.recibido;
+                intentos = 0;
+                onProgress(offset / file.size, 'subida');
+            } else if (response.status === 409 && data.carga) {
+                // El servidor tiene otro offset confirmado: continuar desde ahí
+                offset = data.carga.recibido;
+            } else {
+                throw new Error(data.message || `Error ${response.status}`);
+            }
+        } catch (error) {
+            if (++intentos > CONFIG.UPLOAD_MAX_RETRIES) throw error;
+            await new Promise(resolve => setTimeout(resolve, 1000 * intentos));
+            
+            // Reanudar desde lo que el servidor tiene confirmado
+            try {
+                const estado = await fetch(`${CONFIG.API_URL}/cargas/${cargaId}`);
+                const estadoData = await estado.json();
+                if (estadoData.success) offset = estadoData.carga.recibido;
+            } catch (e) {
+                console.warn('No se pudo consultar el estado de la carga:', e);
+            }
+        }
+    }
+    
+    response = await fetch(`${CONFIG.API_URL}/cargas/${cargaId}/finalizar`, { method: 'POST' });
+    data = await response.json();
+    if (response.ok || [404, 409, 410].includes(response.status) || (response.status === 400 && !data.carga)) {
+        // Creada, descartada (checksum o archivo perdido) o inexistente: ya no hay nada que reanudar
+        localStorage.removeItem(clave);
+    }
+    if (!response.ok || !data.success) {
+        throw new Error(data.message || `Error ${response.status}`);
+    }
+    return data.documento;
+},
+
 /**
  * Elimina un documento
  * @param {number} documentoId - ID del documento a eliminar
@@ -653,6 +847,77 @@ loadAndDisplayReclutas: async function() {
     },
 
 
+    /**
+     * Aplica a la página cargada un cambio recibido por el canal de eventos,
+     * sin volver a pedir el listado
+     * @param {string} tipo - 'creado', 'actualizado' o 'eliminado'
+     * @param {Object} datos - Fila del recluta ({id} si se eliminó)
+     */
+    applyDelta: function(tipo, datos) {
+        if (!this.loaded) return;
+
+        const index = this.reclutas.findIndex(r => r.id === datos.id);
+        const visible = tipo !== 'eliminado' && this.matchesView(datos);
+
+        if (index !== -1 && visible) {
+            // Conservar los campos que no viajan en el evento (ej. documentos_count)
+            this.reclutas[index] = { ...this.reclutas[index], ...datos };
+            this.sortReclutas();
+        } else if (index !== -1) {
+            this.reclutas.splice(index, 1);
+        } else if (visible && tipo === 'creado' && this.currentPage === 1) {
+            this.reclutas.unshift(datos);
+            this.sortReclutas();
+            this.reclutas = this.reclutas.slice(0, this.itemsPerPage);
+        } else {
+            return;
+        }
+
+        const container = document.getElementById('reclutas-list');
+        if (container) {
+            this.renderReclutasTable(container);
+        }
+    },
+
+    /**
+     * Indica si un recluta entra en la vista actual (rol, búsqueda y estado),
+     * con los mismos criterios que el filtro del servidor
+     * @param {Object} recluta - Fila del recluta
+     * @returns {boolean}
+     */
+    matchesView: function(recluta) {
+        const usuario = Auth.currentUser;
+        if (usuario && usuario.rol === 'asesor' && recluta.asesor_id !== usuario.id) {
+            return false;
+        }
+        if (this.filters.estado !== 'todos' && recluta.estado !== this.filters.estado) {
+            return false;
+        }
+        const search = this.filters.search.trim().toLowerCase();
+        if (search) {
+            return ['nombre', 'email', 'telefono', 'puesto'].some(campo =>
+                String(recluta[campo] || '').toLowerCase().includes(search)
+            );
+        }
+        return true;
+    },
+
+    /**
+     * Ordena la página cargada según el orden activo
+     */
+    sortReclutas: function() {
+        const campo = this.filters.sortBy;
+        const direccion = this.filters.sortOrder === 'desc' ? -1 : 1;
+        this.reclutas.sort((a, b) => {
+            const va = a[campo] ?? '';
+            const vb = b[campo] ?? '';
+            const comparacion = typeof va === 'number' && typeof vb === 'number'
+                ? va - vb
+                : String(va).localeCompare(String(vb));
+            return comparacion * direccion;
+        });
+    },
+
     /**
      * Filtra los reclutas según los criterios especificados
      * @param {Object} filters - Filtros a aplicar
@@ -722,21 +987,27 @@ loadAndDisplayReclutas: async function() {
     this.reclutas.forEach(recluta => {
         const row = document.createElement('tr');
 
-        // Determinar URL de la foto
-        const fotoUrl = recluta.foto_url ?
+        // Determinar URL de la foto (miniatura si existe, la original como respaldo)
+        const fotoOriginal = recluta.foto_url ?
             (recluta.foto_url.startsWith('http') ?
                 recluta.foto_url :
                 (recluta.foto_url === 'default_profile.jpg' ?
                     "/api/placeholder/40/40" :
                     `/${recluta.foto_url}`)) :
             "/api/placeholder/40/40";
+        const fotoUrl = recluta.foto_variantes ? `/${recluta.foto_variantes.thumb}` : fotoOriginal;
+
+        // Indicador de documentos subidos
+        const documentosBadge = recluta.documentos_count ?
+            ` <span class="badge badge-info" title="${recluta.documentos_count} documento(s)"><i class="fas fa-file-pdf"></i> ${recluta.documentos_count}</span>` : '';
 
         // Crear badge de estado
         const estadoBadge = UI.createBadge(recluta.estado, CONFIG.ESTADOS_RECLUTA);
 
         row.innerHTML = `
-            <td><img src="${fotoUrl}" alt="${recluta.nombre}" class="recluta-foto"></td>
-            <td>${recluta.nombre}</td>
+            <td><img src="${fotoUrl}" alt="${recluta.nombre}" class="recluta-foto" loading="lazy"
+                     onerror="if (this.src !== '${fotoOriginal}') this.src = '${fotoOriginal}';"></td>
+            <td>${recluta.nombre}${documentosBadge}</td>
             <td>${recluta.email}</td>
             <td>${recluta.telefono}</td>
             <td><code>${recluta.folio || 'Sin folio'}</code></td>
@@ -835,7 +1106,11 @@ loadAndDisplayReclutas: async function() {
                         recluta.foto_url :
                         `/${recluta.foto_url}`) :
                     "/api/placeholder/150/150";
-                elements.foto.src = fotoUrl;
+                elements.foto.onerror = () => {
+                    elements.foto.onerror = null;
+                    elements.foto.src = fotoUrl;
+                };
+                elements.foto.src = recluta.foto_variantes ? `/${recluta.foto_variantes.medium}` : fotoUrl;
                 elements.foto.alt = recluta.nombre || 'Foto de recluta';
             }
 
@@ -0,0 +1,129 @@
+/**
+ * SHA-256 incremental (FIPS 180-4) para calcular el checksum de archivos por bloques.
+ *
+ * Web Crypto (crypto.subtle.digest) sólo acepta el buffer completo y no está
+ * disponible fuera de contextos seguros (HTTP sin TLS); esta implementación
+ * procesa el archivo por partes sin cargarlo entero en memoria.
+ */
+
+// Constantes de ronda: primeros 32 bits de la parte fraccionaria de las raíces cúbicas de los 64 primeros primos
+const K = new Uint32Array([
+    0x428a2f98, 0x71374491, 0xb5c0fbcf, 0xe9b5dba5, 0x3956c25b, 0x59f111f1, 0x923f82a4, 0xab1c5ed5,
+    0xd807aa98, 0x12835b01, 0x243185be, 0x550c7dc3, 0x72be5d74, 0x80deb1fe, 0x9bdc06a7, 0xc19bf174,
+    0xe49b69c1, 0xefbe4786, 0x0fc19dc6, 0x240ca1cc, 0x2de92c6f, 0x4a7484aa, 0x5cb0a9dc, 0x76f988da,
+    0x983e5152, 0xa831c66d, 0xb00327c8, 0xbf597fc7, 0xc6e00bf3, 0xd5a79147, 0x06ca6351, 0x14292967,
+    0x27b70a85, 0x2e1b2138, 0x4d2c6dfc, 0x53380d13, 0x650a7354, 0x766a0abb, 0x81c2c92e, 0x92722c85,
+    0xa2bfe8a1, 0xa81a664b, 0xc24b8b70, 0xc76c51a3, 0xd192e819, 0xd6990624, 0xf40e3585, 0x106aa070,
+    0x19a4c116, 0x1e376c08, 0x2748774c, 0x34b0bcb5, 0x391c0cb3, 0x4ed8aa4a, 0x5b9cca4f, 0x682e6ff3,
+    0x748f82ee, 0x78a5636f, 0x84c87814, 0x8cc70208, 0x90befffa, 0xa4506ceb, 0xbef9a3f7, 0xc67178f2
+]);
+
+class Sha256 {
+    constructor() {
+        this.estado = new Uint32Array([
+            0x6a09e667, 0xbb67ae85, 0x3c6ef372, 0xa54ff53a, 0x510e527f, 0x9b05688c, 0x1f83d9ab, 0x5be0cd19
+        ]);
+        this.w = new Uint32Array(64);
+        this.pendiente = new Uint8Array(64);
+        this.largoPendiente = 0;
+        this.total = 0;
+    }
+
+    /**
+     * Agrega datos al hash
+     * @param {Uint8Array} datos - Bytes a procesar
+     * @returns {Sha256} - La misma instancia, para encadenar llamadas
+     */
+    update(datos) {
+        let i = 0;
+        this.total += datos.length;
+
+        // Completar el bloque que quedó a medias en la llamada anterior
+        if (this.largoPendiente > 0) {
+            i = Math.min(64 - this.largoPendiente, datos.length);
+            this.pendiente.set(datos.subarray(0, i), this.largoPendiente);
+            this.largoPendiente += i;
+            if (this.largoPendiente < 64) return this;
+            this.procesarBloque(this.pendiente, 0);
+            this.largoPendiente = 0;
+        }
+
+        for (; i + 64 <= datos.length; i += 64) {
+            this.procesarBloque(datos, i);
+        }
+        if (i < datos.length) {
+            this.pendiente.set(datos.subarray(i));
+            this.largoPendiente = datos.length - i;
+        }
+        return this;
+    }
+
+    /**
+     * Procesa un bloque de 64 bytes
+     * @param {Uint8Array} datos - Bytes de entrada
+     * @param {number} offset - Inicio del bloque dentro de datos
+     */
+    procesarBloque(datos, offset) {
+        const w = this.w;
+        for (let t = 0; t < 16; t++) {
+            const j = offset + t * 4;
+            w[t] = (datos[j] << 24) | (datos[j + 1] << 16) | (datos[j + 2] << 8) | datos[j + 3];
+        }
+        for (let t = 16; t < 64; t++) {
+            const x = w[t - 15];
+            const y = w[t - 2];
+            const s0 = ((x >>> 7) | (x << 25)) ^ ((x >>> 18) | (x << 14)) ^ (x >>> 3);
+            const s1 = ((y >>> 17) | (y << 15)) ^ ((y >>> 19) | (y << 13)) ^ (y >>> 10);
+            w[t] = w[t - 16] + s0 + w[t - 7] + s1;
+        }
+
+        const h = this.estado;
+        let a = h[0], b = h[1], c = h[2], d = h[3], e = h[4], f = h[5], g = h[6], k = h[7];
+        for (let t = 0; t < 64; t++) {
+            const S1 = ((e >>> 6) | (e << 26)) ^ ((e >>> 11) | (e << 21)) ^ ((e >>> 25) | (e << 7));
+            const ch = (e & f) ^ (~e & g);
+            const t1 = (k + S1 + ch + K[t] + w[t]) | 0;
+            const S0 = ((a >>> 2) | (a << 30)) ^ ((a >>> 13) | (a << 19)) ^ ((a >>> 22) | (a << 10));
+            const maj = (a & b) ^ (a & c) ^ (b & c);
+            const t2 = (S0 + maj) | 0;
+            k = g;
+            g = f;
+            f = e;
+            e = (d + t1) | 0;
+            d = c;
+            c = b;
+            b = a;
+            a = (t1 + t2) | 0;
+        }
+
+        // Uint32Array aplica el módulo 2^32 al asignar
+        h[0] += a;
+        h[1] += b;
+        h[2] += c;
+        h[3] += d;
+        h[4] += e;
+        h[5] += f;
+        h[6] += g;
+        h[7] += k;
+    }
+
+    /**
+     * Termina el cálculo (la instancia ya no admite más datos)
+     * @returns {string} - Hash en hexadecimal
+     */
+    hexDigest() {
+        const bits = this.total * 8;
+
+        // Relleno: un bit 1, ceros hasta 56 mod 64 y la longitud en bits (64 bits big-endian)
+        const relleno = new Uint8Array((this.largoPendiente < 56 ? 64 : 128) - this.largoPendiente);
+        relleno[0] = 0x80;
+        const vista = new DataView(relleno.buffer);
+        vista.setUint32(relleno.length - 8, Math.floor(bits / 0x100000000));
+        vista.setUint32(relleno.length - 4, bits >>> 0);
+        this.update(relleno);
+
+        return Array.from(this.estado, x => x.toString(16).padStart(8, '0')).join('');
+    }
+}
+
+export default Sha256;
@@ -0,0 +1,388 @@
+"""
+Detección de entrevistas solapadas.
+
+Un asesor no puede estar en dos entrevistas a la vez y una sala (ubicación de
+una entrevista presencial) tampoco puede ocuparse dos veces. Sólo cuentan las
+entrevistas pendientes.
+
+Al crear o mover una entrevista se cargan las del mismo día que comparten
+asesor o sala en un índice ordenado por hora de inicio y se consulta con
+bisect. El reporte de un rango de fechas recorre cada día y recurso con una
+línea de barrido, en O(n log n) sobre el número de entrevistas del rango.
+
+La disponibilidad de un asesor se obtiene restando a su horario laboral
+(HORARIO_LABORAL) sus entrevistas pendientes, fusionadas y ordenadas.
+"""
+import heapq
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import datetime, timedelta
+from itertools import chain
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from models import db
+from models.entrevista import Entrevista
+from models.recluta import Recluta
+from utils.cache import obtener_cache, invalidar_tras_commit
+
+# Duración asumida cuando una entrevista no la tiene
+DURACION_POR_DEFECTO = 60
+
+# Estado de las entrevistas que ocupan agenda
+ESTADO_ACTIVO = 'pendiente'
+
+# Espacio de nombres de los huecos libres en la caché: ('disponibilidad', fecha, asesor_id)
+PREFIJO_DISPONIBILIDAD = 'disponibilidad'
+
+
+def minutos(hora):
+    """Convierte 'HH:MM' en minutos desde la medianoche"""
+    horas, mins = str(hora).split(':')[:2]
+    return int(horas) * 60 + int(mins)
+
+
+def normalizar_ubicacion(tipo, ubicacion):
+    """
+    Sala que ocupa una entrevista, o None si no ocupa ninguna.
+
+    Las entrevistas virtuales y telefónicas no ocupan sala aunque tengan
+    ubicación (suele ser un enlace).
+    """
+    if (tipo or 'presencial') != 'presencial' or not ubicacion or not ubicacion.strip():
+        return None
+    return ubicacion.strip().lower()
+
+
+class IndiceIntervalos:
+    """
+    Intervalos [inicio, fin) ordenados por inicio para consultar solapamientos.
+
+    Como los intervalos guardados pueden solaparse entre sí, la búsqueda usa
+    la duración máxima para acotar desde dónde pueden empezar los candidatos:
+    sólo se revisan los que empiezan en [inicio - duración máxima, fin).
+    """
+
+    def __init__(self):
+        self._inicios = []
+        self._intervalos = []
+        self._duracion_maxima = 0
+
+    def agregar(self, inicio, fin, valor):
+        """Inserta un intervalo manteniendo el orden"""
+        posicion = bisect_right(self._inicios, inicio)
+        self._inicios.insert(posicion, inicio)
+        self._intervalos.insert(posicion, (inicio, fin, valor))
+        self._duracion_maxima = max(self._duracion_maxima, fin - inicio)
+
+    def solapados(self, inicio, fin):
+        """Retorna los valores de los intervalos que se solapan con [inicio, fin)"""
+        desde = bisect_right(self._inicios, inicio - self._duracion_maxima)
+        hasta = bisect_left(self._inicios, fin)
+        return [valor for i_inicio, i_fin, valor in self._intervalos[desde:hasta] if i_fin > inicio]
+
+    def __len__(self):
+        return len(self._intervalos)
+
+
+def _consulta_activas():
+    """Consulta base de entrevistas pendientes con el asesor y nombre del recluta"""
+    return (
+        db.select(Entrevista.id, Entrevista.recluta_id, Entrevista.fecha, Entrevista.hora,
+                  Entrevista.duracion, Entrevista.tipo, Entrevista.ubicacion,
+                  Recluta.nombre.label('recluta_nombre'), Recluta.asesor_id)
+        .join(Recluta, Recluta.id == Entrevista.recluta_id)
+        .where(Entrevista.estado == ESTADO_ACTIVO)
+    )
+
+
+def _resumen(fila, motivo):
+    """Datos de una entrevista en conflicto"""
+    return {
+        'id': fila['id'],
+        'recluta_id': fila['recluta_id'],
+        'recluta_nombre': fila['recluta_nombre'],
+        'fecha': fila['fecha'],
+        'hora': fila['hora'],
+        'duracion': fila['duracion'] or DURACION_POR_DEFECTO,
+        'motivo': motivo
+    }
+
+
+def buscar_conflictos(fecha, hora, duracion, recluta_id, tipo=None, ubicacion=None, excluir_id=None):
+    """
+    Busca las entrevistas pendientes que se solapan con un horario propuesto.
+
+    Se comparan las del mismo asesor (el del recluta) y las de la misma sala,
+    cargadas con una sola consulta del día.
+
+    Args:
+        fecha: Día de la entrevista
+        hora: Hora de inicio 'HH:MM'
+        duracion: Duración en minutos
+        recluta_id: Recluta entrevistado (determina el asesor)
+        tipo: Tipo de entrevista
+        ubicacion: Ubicación de la entrevista
+        excluir_id: Entrevista a ignorar (la que se está editando)
+
+    Returns:
+        list: Entrevistas en conflicto, con el motivo ('asesor' o 'ubicacion')
+    """
+    asesor_id = db.session.scalar(db.select(Recluta.asesor_id).where(Recluta.id == recluta_id))
+    sala = normalizar_ubicacion(tipo, ubicacion)
+    if asesor_id is None and sala is None:
+        return []
+
+    criterios = []
+    if asesor_id is not None:
+        criterios.append(Recluta.asesor_id == asesor_id)
+    if sala is not None:
+        criterios.append(db.and_(
+            db.func.lower(db.func.trim(Entrevista.ubicacion)) == sala,
+            db.or_(Entrevista.tipo == 'presencial', Entrevista.tipo.is_(None))
+        ))
+
+    consulta = _consulta_activas().where(Entrevista.fecha == fecha, db.or_(*criterios))
+    if excluir_id:
+        consulta = consulta.where(Entrevista.id != excluir_id)
+
+    por_asesor = IndiceIntervalos()
+    por_sala = IndiceIntervalos()
+    for fila in db.session.execute(consulta).mappings():
+        inicio = minutos(fila['hora'])
+        fin = inicio + (fila['duracion'] or DURACION_POR_DEFECTO)
+        if asesor_id is not None and fila['asesor_id'] == asesor_id:
+            por_asesor.agregar(inicio, fin, fila)
+        if sala is not None and normalizar_ubicacion(fila['tipo'], fila['ubicacion']) == sala:
+            por_sala.agregar(inicio, fin, fila)
+
+    inicio = minutos(hora)
+    fin = inicio + (int(duracion) if duracion else DURACION_POR_DEFECTO)
+
+    conflictos = {}
+    for fila in por_asesor.solapados(inicio, fin):
+        conflictos[fila['id']] = _resumen(fila, 'asesor')
+    for fila in por_sala.solapados(inicio, fin):
+        conflictos.setdefault(fila['id'], _resumen(fila, 'ubicacion'))
+    return sorted(conflictos.values(), key=lambda c: minutos(c['hora']))
+
+
+def reporte_conflictos(desde, hasta, asesor_id=None):
+    """
+    Lista los pares de entrevistas pendientes solapadas en un rango de fechas.
+
+    Las entrevistas se agrupan por (día, recurso), donde el recurso es el
+    asesor o la sala, y cada grupo se recorre en orden de inicio manteniendo
+    en un heap las que siguen en curso: cada entrevista nueva choca con todas
+    las que aún no han terminado.
+
+    Args:
+        desde: Primer día del rango (incluido)
+        hasta: Último día del rango (incluido)
+        asesor_id: Limitar a los reclutas de un asesor (opcional)
+
+    Returns:
+        list: Conflictos {fecha, recurso, valor, entrevistas: [a, b]}
+    """
+    consulta = _consulta_activas().where(Entrevista.fecha >= desde, Entrevista.fecha <= hasta)
+    if asesor_id:
+        consulta = consulta.where(Recluta.asesor_id == asesor_id)
+
+    grupos = defaultdict(list)
+    for fila in db.session.execute(consulta).mappings():
+        inicio = minutos(fila['hora'])
+        intervalo = (inicio, inicio + (fila['duracion'] or DURACION_POR_DEFECTO), fila['id'], fila)
+        if fila['asesor_id'] is not None:
+            grupos[(fila['fecha'], 'asesor', fila['asesor_id'])].append(intervalo)
+        sala = normalizar_ubicacion(fila['tipo'], fila['ubicacion'])
+        if sala is not None:
+            grupos[(fila['fecha'], 'ubicacion', sala)].append(intervalo)
+
+    conflictos = []
+    for (fecha, recurso, valor), intervalos in sorted(grupos.items(), key=lambda g: (g[0][0], g[0][1], str(g[0][2]))):
+        if len(intervalos) < 2:
+            continue
+        intervalos.sort(key=lambda i: (i[0], i[1]))
+        en_curso = []  # heap de (fin, id, fila)
+        for inicio, fin, entrevista_id, fila in intervalos:
+            while en_curso and en_curso[0][0] <= inicio:
+                heapq.heappop(en_curso)
+            for _, otro_id, otra in sorted(en_curso, key=lambda e: e[1]):
+                conflictos.append({
+                    'fecha': fecha,
+                    'recurso': recurso,
+                    'valor': valor,
+                    'entrevistas': [_resumen(otra, recurso), _resumen(fila, recurso)]
+                })
+            heapq.heappush(en_curso, (fin, entrevista_id, fila))
+
+    return conflictos
+
+
+def _formato_hora(total_minutos):
+    """Convierte minutos desde la medianoche en 'HH:MM'"""
+    return f"{total_minutos // 60:02d}:{total_minutos % 60:02d}"
+
+
+def fusionar_intervalos(intervalos):
+    """
+    Une los intervalos [inicio, fin) que se solapan o se tocan.
+
+    Args:
+        intervalos: Iterable de tuplas (inicio, fin)
+
+    Returns:
+        list: Intervalos disjuntos ordenados por inicio
+    """
+    fusionados = []
+    for inicio, fin in sorted(intervalos):
+        if fusionados and inicio <= fusionados[-1][1]:
+            if fin > fusionados[-1][1]:
+                fusionados[-1][1] = fin
+        else:
+            fusionados.append([inicio, fin])
+    return [tuple(intervalo) for intervalo in fusionados]
+
+
+def restar_intervalos(bloques, ocupados):
+    """
+    Resta los intervalos ocupados de los bloques disponibles recorriendo ambas
+    listas ordenadas a la vez.
+
+    Args:
+        bloques: Intervalos disponibles, disjuntos y ordenados
+        ocupados: Intervalos ocupados, disjuntos y ordenados (ver fusionar_intervalos)
+
+    Returns:
+        list: Intervalos libres ordenados
+    """
+    libres = []
+    j = 0
+    for inicio, fin in bloques:
+        # Saltar los ocupados que terminan antes del bloque
+        while j < len(ocupados) and ocupados[j][1] <= inicio:
+            j += 1
+        cursor = inicio
+        k = j
+        while k < len(ocupados) and ocupados[k][0] < fin:
+            if ocupados[k][0] > cursor:
+                libres.append((cursor, ocupados[k][0]))
+            cursor = max(cursor, ocupados[k][1])
+            k += 1
+        if cursor < fin:
+            libres.append((cursor, fin))
+    return libres
+
+
+def horario_laboral(dia):
+    """Bloques de trabajo [inicio, fin) en minutos para un día según HORARIO_LABORAL"""
+    bloques = current_app.config['HORARIO_LABORAL'].get(dia.weekday(), ())
+    return fusionar_intervalos((minutos(inicio), minutos(fin)) for inicio, fin in bloques)
+
+
+def _libres_por_dia(asesor_id, dias):
+    """
+    Calcula los intervalos libres de un asesor en varios días con una sola
+    consulta sobre el rango que los cubre.
+
+    Returns:
+        dict: fecha -> lista de intervalos libres (inicio, fin) en minutos
+    """
+    ocupados = defaultdict(list)
+    consulta = (
+        db.select(Entrevista.fecha, Entrevista.hora, Entrevista.duracion)
+        .join(Recluta, Recluta.id == Entrevista.recluta_id)
+        .where(
+            Recluta.asesor_id == asesor_id,
+            Entrevista.estado == ESTADO_ACTIVO,
+            Entrevista.fecha >= min(dias),
+            Entrevista.fecha <= max(dias)
+        )
+    )
+    for fecha, hora, duracion in db.session.execute(consulta):
+        inicio = minutos(hora)
+        ocupados[fecha].append((inicio, inicio + (duracion or DURACION_POR_DEFECTO)))
+
+    return {
+        dia: restar_intervalos(horario_laboral(dia), fusionar_intervalos(ocupados.get(dia, ())))
+        for dia in dias
+    }
+
+
+def disponibilidad(asesor_id, desde, hasta, duracion=DURACION_POR_DEFECTO, ahora=None):
+    """
+    Huecos libres de un asesor en un rango de días, descontando del horario
+    laboral sus entrevistas pendientes.
+
+    Los intervalos libres de cada día se cachean por (día, asesor); sólo los
+    días que faltan en caché se calculan, con una única consulta de rango.
+
+    Args:
+        asesor_id: ID del asesor
+        desde: Primer día (incluido)
+        hasta: Último día (incluido)
+        duracion: Duración mínima en minutos de un hueco
+        ahora: Momento actual (los huecos de hoy empiezan a partir de él)
+
+    Returns:
+        list: [{'fecha', 'libres': [{'inicio': 'HH:MM', 'fin': 'HH:MM'}]}]
+    """
+    ahora = ahora or datetime.now()
+    cache = obtener_cache()
+    ttl = current_app.config['DISPONIBILIDAD_CACHE_TTL']
+
+    dias = [desde + timedelta(days=i) for i in range((hasta - desde).days + 1)]
+    libres = {}
+    faltantes = []
+    for dia in dias:
+        valor = cache.obtener((PREFIJO_DISPONIBILIDAD, dia.isoformat(), asesor_id))
+        if valor is None:
+            faltantes.append(dia)
+        else:
+            libres[dia] = valor
+
+    if faltantes:
+        for dia, intervalos in _libres_por_dia(asesor_id, faltantes).items():
+            cache.guardar((PREFIJO_DISPONIBILIDAD, dia.isoformat(), asesor_id), intervalos, ttl)
+            libres[dia] = intervalos
+
+    resultado = []
+    minuto_actual = ahora.hour * 60 + ahora.minute
+    for dia in dias:
+        intervalos = libres[dia]
+        if dia == ahora.date():
+            intervalos = [(max(inicio, minuto_actual), fin) for inicio, fin in intervalos if fin > minuto_actual]
+        elif dia < ahora.date():
+            intervalos = []
+        resultado.append({
+            'fecha': dia,
+            'libres': [
+                {'inicio': _formato_hora(inicio), 'fin': _formato_hora(fin)}
+                for inicio, fin in intervalos if fin - inicio >= duracion
+            ]
+        })
+    return resultado
+
+
+@event.listens_for(Session, 'before_flush')
+def _invalidar_disponibilidad(session, flush_context, instances):
+    """Invalida los días afectados por entrevistas nuevas, modificadas o eliminadas"""
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, Entrevista):
+            fechas = {obj.fecha, *db.inspect(obj).attrs.fecha.history.deleted}
+            for fecha in fechas - {None}:
+                invalidar_tras_commit(session, PREFIJO_DISPONIBILIDAD, str(fecha)[:10])
+        elif (isinstance(obj, Recluta) and obj not in session.new
+              and (obj in session.deleted or db.inspect(obj).attrs.asesor_id.history.has_changes())):
+            invalidar_tras_commit(session, PREFIJO_DISPONIBILIDAD)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _invalidar_disponibilidad_en_lote(estado_ejecucion):
+    """Las sentencias INSERT/UPDATE/DELETE en lote pueden tocar cualquier día"""
+    mapper = estado_ejecucion.bind_mapper
+    if mapper is None:
+        return
+    if ((estado_ejecucion.is_update or estado_ejecucion.is_delete) and mapper.class_ in (Entrevista, Recluta)) \
+            or (estado_ejecucion.is_insert and mapper.class_ is Entrevista):
+        invalidar_tras_commit(estado_ejecucion.session, PREFIJO_DISPONIBILIDAD)
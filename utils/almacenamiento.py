@@ -0,0 +1,289 @@
+import os
+import re
+import uuid
+import hashlib
+from datetime import datetime
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+from models import db
+from models.archivo import Archivo
+from utils.imagenes import eliminar_variantes
+
+# Tamaño de bloque para leer y escribir los uploads en streaming
+TAMANO_BLOQUE = 64 * 1024
+
+# Subdirectorio (dentro de uploads) para archivos aún no confirmados
+DIRECTORIO_TEMPORAL = '.tmp'
+
+# Subdirectorio (dentro de uploads) para las cargas por fragmentos en curso
+DIRECTORIO_CARGAS = '.cargas'
+
+# Nombre de archivo direccionado por contenido (SHA-256 hexadecimal)
+PATRON_SHA256 = re.compile(r'[0-9a-f]{64}')
+
+
+def directorio_uploads():
+    """Retorna la ruta absoluta del directorio de uploads"""
+    return os.path.join(current_app.root_path, current_app.config['UPLOAD_FOLDER'])
+
+
+def ruta_absoluta(ruta_relativa):
+    """Convierte una ruta relativa guardada en la BD (static/uploads/...) en absoluta"""
+    return os.path.join(current_app.root_path, ruta_relativa)
+
+
+def ruta_contenido(subdirectorio, sha256, extension):
+    """
+    Calcula la ruta relativa direccionada por contenido de un archivo.
+
+    Los archivos se reparten en dos niveles de subdirectorios según los
+    primeros caracteres del hash (256 x 256 directorios por categoría), para
+    que ningún directorio acumule cientos de miles de entradas.
+
+    Args:
+        subdirectorio: Categoría dentro de uploads (recluta, usuario, documentos...)
+        sha256: Hash hexadecimal del contenido
+        extension: Extensión del archivo sin punto
+
+    Returns:
+        str: Ruta relativa tipo static/uploads/<subdirectorio>/ab/cd/<sha256>.<extension>
+    """
+    return os.path.join('static', 'uploads', subdirectorio, sha256[:2], sha256[2:4], f"{sha256}.{extension}")
+
+
+def es_ruta_contenido(ruta_relativa):
+    """Indica si una ruta relativa ya sigue el esquema particionado de ruta_contenido"""
+    partes = ruta_relativa.replace('\\', '/').split('/')
+    if len(partes) != 6 or partes[:2] != ['static', 'uploads']:
+        return False
+    sha256 = os.path.splitext(partes[5])[0]
+    return PATRON_SHA256.fullmatch(sha256) is not None and partes[3:5] == [sha256[:2], sha256[2:4]]
+
+
+def ruta_carga(carga_id):
+    """Retorna la ruta absoluta del archivo parcial de una carga por fragmentos"""
+    return os.path.join(directorio_uploads(), DIRECTORIO_CARGAS, f"{carga_id}.part")
+
+
+def escribir_fragmento(ruta, offset, stream, limite):
+    """
+    Escribe un fragmento recibido en streaming en la posición indicada de un archivo.
+
+    Args:
+        ruta: Ruta absoluta del archivo parcial (debe existir)
+        offset: Posición en bytes donde empieza el fragmento
+        stream: Objeto tipo archivo con método read()
+        limite: Número máximo de bytes a aceptar
+
+    Returns:
+        int: Bytes escritos
+
+    Raises:
+        ValueError: Si el fragmento supera el límite
+    """
+    escritos = 0
+    with open(ruta, 'r+b') as destino:
+        destino.seek(offset)
+        while True:
+            bloque = stream.read(TAMANO_BLOQUE)
+            if not bloque:
+                break
+            escritos += len(bloque)
+            if escritos > limite:
+                raise ValueError("El fragmento excede el tamaño declarado del archivo")
+            destino.write(bloque)
+    return escritos
+
+
+def calcular_sha256(ruta):
+    """Calcula el SHA-256 de un archivo leyéndolo por bloques"""
+    sha = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(TAMANO_BLOQUE), b''):
+            sha.update(bloque)
+    return sha.hexdigest()
+
+
+def escribir_temporal(stream, max_size=None):
+    """
+    Copia un stream a un archivo temporal calculando SHA-256 y tamaño en una sola pasada.
+
+    Args:
+        stream: Objeto tipo archivo con método read()
+        max_size: Tamaño máximo permitido en bytes (None para no limitar)
+
+    Returns:
+        tuple: (ruta absoluta del temporal, sha256 hexadecimal, tamaño en bytes)
+
+    Raises:
+        ValueError: Si el contenido supera max_size
+    """
+    directorio = os.path.join(directorio_uploads(), DIRECTORIO_TEMPORAL)
+    os.makedirs(directorio, exist_ok=True)
+    ruta_temporal = os.path.join(directorio, uuid.uuid4().hex)
+
+    sha = hashlib.sha256()
+    tamaño = 0
+    try:
+        with open(ruta_temporal, 'wb') as destino:
+            while True:
+                bloque = stream.read(TAMANO_BLOQUE)
+                if not bloque:
+                    break
+                tamaño += len(bloque)
+                if max_size is not None and tamaño > max_size:
+                    raise ValueError(f"Archivo demasiado grande. Máximo {max_size / (1024*1024):.1f}MB")
+                sha.update(bloque)
+                destino.write(bloque)
+    except Exception:
+        if os.path.exists(ruta_temporal):
+            os.remove(ruta_temporal)
+        raise
+
+    return ruta_temporal, sha.hexdigest(), tamaño
+
+
+def _registrar_archivo(sha256, ruta_relativa, tamaño):
+    """
+    Crea el registro de un archivo con cero referencias si aún no existe.
+
+    Dos subidas simultáneas del mismo contenido intentan crearlo a la vez: en
+    SQLite y PostgreSQL se usa INSERT ... ON CONFLICT DO NOTHING y en otros
+    motores la que pierde la carrera descarta su INSERT con un savepoint.
+    """
+    fila = {
+        'sha256': sha256, 'ruta': ruta_relativa, 'tamaño': tamaño,
+        'referencias': 0, 'fecha_creacion': datetime.utcnow()
+    }
+    dialecto = db.session.get_bind().dialect.name
+    if dialecto in ('sqlite', 'postgresql'):
+        if dialecto == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        db.session.execute(insert(Archivo.__table__).values(fila).on_conflict_do_nothing(index_elements=['ruta']))
+        return
+
+    try:
+        with db.session.begin_nested():
+            db.session.execute(db.insert(Archivo.__table__), [fila])
+    except IntegrityError:
+        pass
+
+
+def _sumar_referencias(ruta_relativa, cantidad):
+    """Suma (o resta) referencias con un UPDATE en SQL; retorna el número de filas afectadas"""
+    return db.session.execute(
+        db.update(Archivo)
+        .where(Archivo.ruta == ruta_relativa)
+        .values(referencias=Archivo.referencias + cantidad)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+
+def registrar_referencias(sha256, ruta_relativa, tamaño, cantidad=1):
+    """
+    Crea el registro de un contenido si aún no existe y le suma referencias.
+
+    El commit lo hace quien llama, junto con las filas que guardan las referencias.
+
+    Args:
+        sha256: Hash hexadecimal del contenido
+        ruta_relativa: Ruta relativa (de ruta_contenido)
+        tamaño: Tamaño en bytes
+        cantidad: Referencias a sumar
+    """
+    # Si una purga borra el registro entre el INSERT y el UPDATE, se vuelve a crear
+    for _ in range(3):
+        _registrar_archivo(sha256, ruta_relativa, tamaño)
+        if _sumar_referencias(ruta_relativa, cantidad):
+            return
+    raise RuntimeError(f"No se pudo registrar la referencia a {ruta_relativa}")
+
+
+def almacenar_contenido(ruta_temporal, sha256, tamaño, subdirectorio, extension):
+    """
+    Suma una referencia al contenido y mueve el archivo temporal a su ruta direccionada por contenido.
+
+    El contador se incrementa en SQL (referencias = referencias + 1), así que
+    las subidas simultáneas del mismo contenido no pierden incrementos. El
+    archivo se coloca después del incremento, cuando la fila ya está
+    bloqueada por esta transacción: una purga concurrente (ver purgar_archivo)
+    espera al commit y ya no lo borra. Si el contenido ya existía, el
+    renombrado lo reemplaza por uno idéntico sin copiar datos.
+
+    El commit lo hace quien llama, junto con la fila que guarda la referencia.
+
+    Args:
+        ruta_temporal: Ruta absoluta del archivo temporal
+        sha256: Hash hexadecimal del contenido
+        tamaño: Tamaño en bytes
+        subdirectorio: Categoría dentro de uploads
+        extension: Extensión del archivo sin punto
+
+    Returns:
+        str: Ruta relativa del archivo almacenado
+    """
+    ruta_relativa = ruta_contenido(subdirectorio, sha256, extension)
+    registrar_referencias(sha256, ruta_relativa, tamaño)
+
+    destino = ruta_absoluta(ruta_relativa)
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    os.replace(ruta_temporal, destino)
+    return ruta_relativa
+
+
+def liberar_referencia(ruta_relativa):
+    """
+    Resta una referencia a un archivo almacenado por contenido.
+
+    El archivo no se borra aquí: si ya no quedan referencias hay que llamar
+    a purgar_archivo después del commit de esta transacción.
+
+    Args:
+        ruta_relativa: Ruta relativa del archivo
+
+    Returns:
+        None si el archivo no está registrado (subido antes del almacenamiento
+        por contenido), True si ya no quedan referencias, False si otras filas
+        siguen usándolo
+    """
+    if not _sumar_referencias(ruta_relativa, -1):
+        return None
+
+    # La fila queda bloqueada por el UPDATE: la lectura ve el valor de esta transacción
+    referencias = db.session.scalar(db.select(Archivo.referencias).where(Archivo.ruta == ruta_relativa))
+    return referencias is not None and referencias <= 0
+
+
+def purgar_archivo(ruta_relativa):
+    """
+    Elimina el registro y el archivo (con sus variantes) de un contenido sin referencias.
+
+    Se llama después del commit que dejó el contador en cero y vuelve a
+    comprobarlo bajo el bloqueo de la fila: el DELETE condicionado espera a
+    las subidas del mismo contenido que aún no confirman y, si alguna sumó su
+    referencia, no borra nada. Mientras tanto las subidas nuevas esperan al
+    DELETE, así que colocan su archivo después de que éste se borre.
+
+    Hace su propio commit.
+
+    Returns:
+        bool: True si el archivo se eliminó
+    """
+    eliminado = db.session.execute(
+        db.delete(Archivo)
+        .where(Archivo.ruta == ruta_relativa, Archivo.referencias <= 0)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    try:
+        if eliminado:
+            ruta_completa = ruta_absoluta(ruta_relativa)
+            eliminar_variantes(ruta_completa)
+            if os.path.exists(ruta_completa):
+                os.remove(ruta_completa)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return bool(eliminado)
@@ -0,0 +1,345 @@
+"""
+Empaquetado de los archivos estáticos con nombres con huella de contenido.
+
+`flask assets-build` une los módulos ES de static/js en un solo script, une
+las hojas de estilo, minifica ambos y los escribe en static/dist con el hash
+del contenido en el nombre. El manifiesto (static/dist/manifest.json) lo usa
+la función de plantilla asset_url; como el nombre cambia con el contenido,
+esos archivos se sirven con Cache-Control: immutable.
+"""
+import os
+import re
+import json
+import hashlib
+from flask import request, url_for
+
+# Subdirectorio de static donde se escriben los paquetes
+DIRECTORIO_DIST = 'dist'
+NOMBRE_MANIFIESTO = 'manifest.json'
+
+# Módulo de entrada del paquete JS y hojas de estilo en el orden de base.html
+ENTRADA_JS = 'main.js'
+HOJAS_ESTILO = ('css/styles.css', 'css/fixes.css', 'css/timeline.css')
+
+# Un año: los archivos con huella nunca cambian de contenido
+MAX_AGE_INMUTABLE = 365 * 24 * 3600
+
+PATRON_IMPORT_DEFAULT = re.compile(r"^import\s+([\w$]+)\s+from\s+['\"]\./([\w.-]+)['\"];?", re.M)
+PATRON_IMPORT_NOMBRES = re.compile(r"^import\s*\{([^}]*)\}\s*from\s+['\"]\./([\w.-]+)['\"];?", re.M)
+PATRON_IMPORT_DINAMICO = re.compile(r"import\(\s*['\"]\./([\w.-]+)['\"]\s*\)")
+PATRON_EXPORT_DEFAULT = re.compile(r"^export\s+default\s+", re.M)
+PATRON_EXPORT_FUNCION = re.compile(r"^export\s+((?:async\s+)?function\s*\*?\s*([\w$]+))", re.M)
+PATRON_EXPORT_DECLARACION = re.compile(r"^export\s+((?:const|let|var|class)\s+([\w$]+))", re.M)
+
+# Caracteres y palabras tras los cuales una barra inicia una expresión regular
+PUNTUACION_ANTES_DE_REGEX = set('(,=:[!&|?{};+-*%<>~^')
+PALABRAS_ANTES_DE_REGEX = {'return', 'typeof', 'instanceof', 'in', 'of', 'new', 'delete',
+                           'void', 'throw', 'case', 'do', 'else', 'yield', 'await'}
+
+
+def minificar_js(codigo):
+    """
+    Minificación conservadora de JavaScript: elimina comentarios, indentación,
+    espacios repetidos y líneas vacías, respetando cadenas, plantillas y
+    expresiones regulares. Conserva los saltos de línea (inserción automática de ';').
+    """
+    salida = []
+    pila = []  # 'plantilla', 'expr' (${...}) o 'llave' dentro de una expresión de plantilla
+    ultimo = ''
+    ultima_palabra = ''
+    inicio_linea = True
+    i, n = 0, len(codigo)
+
+    while i < n:
+        c = codigo[i]
+
+        if pila and pila[-1] == 'plantilla':
+            if c == '\\':
+                salida.append(codigo[i:i + 2])
+                i += 2
+            elif c == '`':
+                pila.pop()
+                salida.append(c)
+                ultimo = c
+                i += 1
+            elif codigo.startswith('${', i):
+                pila.append('expr')
+                salida.append('${')
+                ultimo = '{'
+                i += 2
+            else:
+                salida.append(c)
+                i += 1
+            continue
+
+        if c == '\n':
+            while salida and salida[-1] == ' ':
+                salida.pop()
+            if salida and salida[-1] != '\n':
+                salida.append('\n')
+            inicio_linea = True
+            i += 1
+            continue
+
+        if c in ' \t\r':
+            if not inicio_linea and salida and salida[-1] not in (' ', '\n'):
+                salida.append(' ')
+            i += 1
+            continue
+
+        inicio_linea = False
+
+        if c in '\'"':
+            j = i + 1
+            while j < n and codigo[j] != c:
+                j += 2 if codigo[j] == '\\' else 1
+            salida.append(codigo[i:j + 1])
+            ultimo = c
+            i = j + 1
+            continue
+
+        if c == '`':
+            pila.append('plantilla')
+            salida.append(c)
+            i += 1
+            continue
+
+        if codigo.startswith('//', i):
+            fin = codigo.find('\n', i)
+            i = n if fin == -1 else fin
+            continue
+
+        if codigo.startswith('/*', i):
+            fin = codigo.find('*/', i + 2)
+            i = n if fin == -1 else fin + 2
+            continue
+
+        if c == '/' and (ultimo == '' or ultimo in PUNTUACION_ANTES_DE_REGEX
+                         or (ultimo == 'a' and ultima_palabra in PALABRAS_ANTES_DE_REGEX)):
+            j = i + 1
+            en_clase = False
+            while j < n and codigo[j] != '\n':
+                if codigo[j] == '\\':
+                    j += 2
+                    continue
+                if codigo[j] == '[':
+                    en_clase = True
+                elif codigo[j] == ']':
+                    en_clase = False
+                elif codigo[j] == '/' and not en_clase:
+                    break
+                j += 1
+            j += 1
+            while j < n and codigo[j].isalpha():
+                j += 1
+            salida.append(codigo[i:j])
+            ultimo = '/'
+            i = j
+            continue
+
+        if c.isalnum() or c in '_$':
+            j = i
+            while j < n and (codigo[j].isalnum() or codigo[j] in '_$'):
+                j += 1
+            ultima_palabra = codigo[i:j]
+            salida.append(ultima_palabra)
+            ultimo = 'a'
+            i = j
+            continue
+
+        if pila:
+            if c == '{':
+                pila.append('llave')
+            elif c == '}':
+                pila.pop()
+
+        salida.append(c)
+        ultimo = c
+        ultima_palabra = ''
+        i += 1
+
+    return ''.join(salida).strip() + '\n'
+
+
+def minificar_css(codigo):
+    """Minificación de CSS: elimina comentarios y espacios innecesarios"""
+    codigo = re.sub(r'/\*.*?\*/', '', codigo, flags=re.S)
+    codigo = re.sub(r'\s+', ' ', codigo)
+    codigo = re.sub(r'\s*([{};,])\s*', r'\1', codigo)
+    codigo = codigo.replace(';}', '}')
+    return codigo.strip() + '\n'
+
+
+def _transformar_modulo(nombre, codigo):
+    """
+    Convierte un módulo ES en el cuerpo de una función function(exports) { ... }.
+
+    Returns:
+        tuple: (código transformado, módulos de los que depende)
+    """
+    dependencias = set()
+    exportados_al_inicio = []
+    exportados_al_final = []
+
+    def importar_default(m):
+        dependencias.add(m.group(2))
+        return f"const {m.group(1)} = __requerir('{m.group(2)}').default;"
+
+    def importar_nombres(m):
+        dependencias.add(m.group(2))
+        nombres = ', '.join(n.strip().replace(' as ', ': ') for n in m.group(1).split(',') if n.strip())
+        return f"const {{ {nombres} }} = __requerir('{m.group(2)}');"
+
+    def importar_dinamico(m):
+        dependencias.add(m.group(1))
+        return f"Promise.resolve(__requerir('{m.group(1)}'))"
+
+    def exportar_funcion(m):
+        exportados_al_inicio.append(m.group(2))
+        return m.group(1)
+
+    def exportar_declaracion(m):
+        exportados_al_final.append(m.group(2))
+        return m.group(1)
+
+    codigo = PATRON_IMPORT_DEFAULT.sub(importar_default, codigo)
+    codigo = PATRON_IMPORT_NOMBRES.sub(importar_nombres, codigo)
+    codigo = PATRON_IMPORT_DINAMICO.sub(importar_dinamico, codigo)
+    codigo = PATRON_EXPORT_DEFAULT.sub('exports.default = ', codigo)
+    codigo = PATRON_EXPORT_FUNCION.sub(exportar_funcion, codigo)
+    codigo = PATRON_EXPORT_DECLARACION.sub(exportar_declaracion, codigo)
+
+    restante = re.search(r'^\s*(import|export)\b(?!\()', codigo, re.M)
+    if restante:
+        raise ValueError(f"{nombre}: sintaxis de módulo no soportada: {codigo[restante.start():restante.start() + 60]!r}")
+
+    # Las funciones se elevan: se exportan al inicio para soportar dependencias circulares
+    inicio = ''.join(f"exports.{n} = {n};\n" for n in exportados_al_inicio)
+    final = ''.join(f"\nexports.{n} = {n};" for n in exportados_al_final)
+    return inicio + codigo + final, dependencias
+
+
+def empaquetar_js(directorio, entrada=ENTRADA_JS):
+    """
+    Une los módulos ES alcanzables desde la entrada en un script clásico
+    con un registro de módulos mínimo (__requerir).
+
+    Args:
+        directorio: Directorio de los módulos (static/js)
+        entrada: Módulo principal
+
+    Returns:
+        str: Código del paquete (sin minificar)
+    """
+    modulos = {}
+    pendientes = [entrada]
+    while pendientes:
+        nombre = pendientes.pop()
+        if nombre in modulos:
+            continue
+        with open(os.path.join(directorio, nombre), encoding='utf-8') as f:
+            codigo, dependencias = _transformar_modulo(nombre, f.read())
+        modulos[nombre] = codigo
+        pendientes.extend(dependencias - set(modulos))
+
+    partes = [
+        "(function () {\n'use strict';\n",
+        "var __definiciones = {}, __cache = {};\n",
+        "function __requerir(nombre) {\n",
+        "if (!__cache[nombre]) {\nvar exports = __cache[nombre] = {};\n__definiciones[nombre](exports);\n}\n",
+        "return __cache[nombre];\n}\n"
+    ]
+    for nombre in sorted(modulos):
+        partes.append(f"__definiciones['{nombre}'] = function (exports) {{\n{modulos[nombre]}\n}};\n")
+    partes.append(f"__requerir('{entrada}');\n}})();\n")
+    return ''.join(partes)
+
+
+def _escribir_con_huella(directorio, base, extension, contenido):
+    """Escribe un archivo con el hash del contenido en el nombre y retorna su nombre"""
+    datos = contenido.encode('utf-8')
+    nombre = f"{base}.{hashlib.sha256(datos).hexdigest()[:12]}.{extension}"
+    ruta = os.path.join(directorio, nombre)
+    if not os.path.exists(ruta):
+        with open(f"{ruta}.tmp", 'wb') as f:
+            f.write(datos)
+        os.replace(f"{ruta}.tmp", ruta)
+    return nombre
+
+
+def construir_assets(static_folder, log=print):
+    """
+    Genera los paquetes JS y CSS con huella y el manifiesto.
+
+    Los paquetes de compilaciones anteriores se eliminan.
+
+    Returns:
+        dict: Manifiesto {nombre lógico: ruta relativa a static}
+    """
+    destino = os.path.join(static_folder, DIRECTORIO_DIST)
+    os.makedirs(destino, exist_ok=True)
+
+    js = minificar_js(empaquetar_js(os.path.join(static_folder, 'js')))
+
+    hojas = []
+    for hoja in HOJAS_ESTILO:
+        with open(os.path.join(static_folder, hoja), encoding='utf-8') as f:
+            hojas.append(f.read())
+    css = minificar_css('\n'.join(hojas))
+
+    manifiesto = {
+        'app.js': f"{DIRECTORIO_DIST}/{_escribir_con_huella(destino, 'app', 'js', js)}",
+        'app.css': f"{DIRECTORIO_DIST}/{_escribir_con_huella(destino, 'app', 'css', css)}"
+    }
+
+    vigentes = {os.path.basename(ruta) for ruta in manifiesto.values()}
+    for nombre in os.listdir(destino):
+        base = nombre.split('.gz')[0].split('.br')[0]
+        if nombre != NOMBRE_MANIFIESTO and base not in vigentes:
+            os.remove(os.path.join(destino, nombre))
+
+    with open(os.path.join(destino, NOMBRE_MANIFIESTO), 'w', encoding='utf-8') as f:
+        json.dump(manifiesto, f, indent=2)
+
+    for nombre, ruta in manifiesto.items():
+        log(f"{nombre} -> {ruta} ({os.path.getsize(os.path.join(static_folder, ruta))} bytes)")
+    return manifiesto
+
+
+def cargar_manifiesto(app):
+    """Lee el manifiesto, recargándolo sólo si el archivo cambió"""
+    ruta = os.path.join(app.static_folder, DIRECTORIO_DIST, NOMBRE_MANIFIESTO)
+    try:
+        mtime = os.path.getmtime(ruta)
+    except OSError:
+        return {}
+
+    cache = app.extensions.setdefault('assets', {'mtime': None, 'manifiesto': {}})
+    if cache['mtime'] != mtime:
+        with open(ruta, encoding='utf-8') as f:
+            cache['manifiesto'] = json.load(f)
+        cache['mtime'] = mtime
+    return cache['manifiesto']
+
+
+def init_app(app):
+    """Registra la función de plantilla asset_url y la caché inmutable de static/dist"""
+    app.config.setdefault('ASSETS_USAR_BUNDLE', True)
+
+    @app.context_processor
+    def _assets():
+        def asset_url(nombre):
+            """URL del paquete con huella, o None para usar los archivos individuales"""
+            if not app.config['ASSETS_USAR_BUNDLE']:
+                return None
+            ruta = cargar_manifiesto(app).get(nombre)
+            return url_for('static', filename=ruta) if ruta else None
+        return {'asset_url': asset_url}
+
+    @app.after_request
+    def _cache_inmutable(response):
+        filename = (request.view_args or {}).get('filename', '')
+        if (request.endpoint == 'static' and filename.startswith(f"{DIRECTORIO_DIST}/")
+                and not filename.endswith(NOMBRE_MANIFIESTO) and response.status_code in (200, 304)):
+            response.headers['Cache-Control'] = f"public, max-age={MAX_AGE_INMUTABLE}, immutable"
+        return response
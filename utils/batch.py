@@ -0,0 +1,85 @@
+"""
+Ejecución interna de sub-peticiones para el endpoint /api/batch.
+
+Cada sub-petición se despacha con un contexto de petición propio pero dentro
+del contexto de aplicación de la petición original, así que comparte el
+usuario ya autenticado (g._login_user) y la sesión de base de datos: no se
+repite la carga de sesión ni la consulta del user_loader.
+"""
+from urllib.parse import urlsplit
+from flask import current_app, request
+from flask_login import current_user
+from werkzeug.exceptions import HTTPException
+
+# Métodos permitidos en sub-peticiones (sólo lectura)
+METODOS_PERMITIDOS = {'GET', 'HEAD'}
+
+# Endpoint del propio batch, que no puede invocarse recursivamente
+ENDPOINT_BATCH = 'api.batch'
+
+# Endpoints que responden con un flujo abierto y no pueden agruparse
+ENDPOINTS_FLUJO = {'api.get_eventos'}
+
+
+def _error(status, mensaje):
+    """Resultado de error de una sub-petición"""
+    return status, {"success": False, "message": mensaje}
+
+
+def ejecutar_subpeticion(url, metodo='GET'):
+    """
+    Despacha una sub-petición a la vista correspondiente de la aplicación.
+
+    Args:
+        url: Ruta local con query string opcional (ej. /api/reclutas?page=2)
+        metodo: Método HTTP de la sub-petición
+
+    Returns:
+        tuple: (código de estado, cuerpo JSON o texto de la respuesta)
+    """
+    metodo = (metodo or 'GET').upper()
+    if metodo not in METODOS_PERMITIDOS:
+        return _error(405, f"Método no permitido en batch: {metodo}")
+
+    partes = urlsplit(url or '')
+    if partes.scheme or partes.netloc or not partes.path.startswith('/'):
+        return _error(400, "La URL debe ser una ruta local")
+
+    adaptador = current_app.url_map.bind_to_environ(request.environ)
+    try:
+        endpoint, _ = adaptador.match(partes.path, method=metodo)
+    except HTTPException as e:
+        return _error(e.code, e.description)
+    if endpoint == ENDPOINT_BATCH:
+        return _error(400, "No se permiten batch anidados")
+    if endpoint in ENDPOINTS_FLUJO:
+        return _error(406, "Respuesta no soportada en batch")
+
+    # Cargar el usuario en g antes de cambiar de contexto para que se reutilice
+    current_user._get_current_object()
+
+    contexto = current_app.test_request_context(
+        partes.path,
+        method=metodo,
+        query_string=partes.query,
+        base_url=request.host_url,
+        headers={'Cookie': request.headers.get('Cookie', ''), 'Accept': 'application/json'},
+        environ_base={'REMOTE_ADDR': request.remote_addr}
+    )
+    with contexto:
+        try:
+            respuesta = current_app.full_dispatch_request()
+        except Exception as e:
+            current_app.logger.error(f"Error en sub-petición batch {metodo} {url}: {str(e)}")
+            return _error(500, "Error interno del servidor")
+
+        try:
+            if respuesta.is_json:
+                return respuesta.status_code, respuesta.get_json(silent=True)
+            es_texto = (respuesta.mimetype or '').startswith('text/')
+            if not es_texto or respuesta.is_streamed or respuesta.direct_passthrough:
+                # Imágenes, descargas de archivos y streams deben pedirse directamente
+                return _error(406, "Respuesta no soportada en batch")
+            return respuesta.status_code, respuesta.get_data(as_text=True)
+        finally:
+            respuesta.close()
@@ -0,0 +1,292 @@
+"""
+Caché en memoria del proceso: páginas completas, fragmentos de plantilla y
+resultados de consultas.
+
+Todas las entradas viven en un único LRU acotado por número de entradas y con
+caducidad (TTL), así que la memoria usada por worker tiene un límite fijo.
+Las claves son tuplas cuyo primer elemento es el espacio de nombres
+('pagina', 'fragmento', ...), lo que permite invalidar por prefijo.
+
+Las claves de páginas y fragmentos incluyen la versión de despliegue, de modo
+que un despliegue nuevo nunca sirve HTML generado con plantillas anteriores.
+"""
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import wraps
+from flask import current_app, request, make_response
+from flask_login import current_user
+from jinja2 import nodes, FileSystemBytecodeCache
+from jinja2.ext import Extension
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+# Clave de la instancia en app.extensions
+EXTENSION = 'cache'
+
+# Clave en session.info con los prefijos a invalidar tras el commit
+CLAVE_INVALIDACIONES = 'cache_invalidaciones'
+
+# Marcador de ausencia (None es un valor cacheable)
+_AUSENTE = object()
+
+
+class CacheLRU:
+    """
+    Caché LRU con caducidad, segura entre hilos.
+
+    Args:
+        max_entradas: Número máximo de entradas; al superarlo se descarta la menos usada
+        ttl: Segundos de vida por defecto de cada entrada (None = sin caducidad)
+    """
+
+    def __init__(self, max_entradas=512, ttl=300):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def obtener(self, clave, defecto=None):
+        """Retorna el valor de una clave vigente (marcándola como usada) o el valor por defecto"""
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is not None:
+                expira, valor = entrada
+                if expira is None or expira > time.monotonic():
+                    self._datos.move_to_end(clave)
+                    self.aciertos += 1
+                    return valor
+                del self._datos[clave]
+            self.fallos += 1
+            return defecto
+
+    def guardar(self, clave, valor, ttl=_AUSENTE):
+        """Guarda un valor; ttl=None lo mantiene hasta que se invalide o se desaloje"""
+        ttl = self.ttl if ttl is _AUSENTE else ttl
+        expira = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._datos[clave] = (expira, valor)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.max_entradas:
+                self._datos.popitem(last=False)
+
+    def obtener_o_calcular(self, clave, funcion, ttl=_AUSENTE):
+        """
+        Retorna el valor cacheado o lo calcula con funcion() y lo guarda.
+
+        El cálculo se hace fuera del lock: dos hilos pueden calcular la misma
+        clave a la vez, pero ninguno bloquea al resto de la caché.
+        """
+        valor = self.obtener(clave, _AUSENTE)
+        if valor is _AUSENTE:
+            valor = funcion()
+            self.guardar(clave, valor, ttl)
+        return valor
+
+    def invalidar(self, *prefijo):
+        """
+        Elimina las entradas cuya clave empieza por los elementos indicados.
+
+        Ej. invalidar('pagina') borra todas las páginas e
+        invalidar('calendario', '2024-05') sólo ese mes.
+
+        Returns:
+            int: Número de entradas eliminadas
+        """
+        n = len(prefijo)
+        with self._lock:
+            claves = [c for c in self._datos if c[:n] == prefijo]
+            for clave in claves:
+                del self._datos[clave]
+        return len(claves)
+
+    def limpiar(self):
+        """Vacía la caché completa"""
+        with self._lock:
+            self._datos.clear()
+
+    def __len__(self):
+        return len(self._datos)
+
+    def estadisticas(self):
+        """Retorna un resumen del uso de la caché"""
+        total = self.aciertos + self.fallos
+        return {
+            'entradas': len(self._datos),
+            'max_entradas': self.max_entradas,
+            'aciertos': self.aciertos,
+            'fallos': self.fallos,
+            'tasa_aciertos': round(self.aciertos / total, 3) if total else None
+        }
+
+
+def obtener_cache(app=None):
+    """Retorna la caché de la aplicación actual"""
+    return (app or current_app).extensions[EXTENSION]
+
+
+def invalidar_tras_commit(session, *prefijo):
+    """
+    Programa la invalidación de un prefijo de claves para cuando la sesión
+    confirme su transacción. Si se revierte, la caché no se toca.
+
+    Cada worker sólo invalida su propia caché; en los demás la entrada
+    caduca por TTL, por lo que las cachés de consultas usan TTL cortos.
+    """
+    session.info.setdefault(CLAVE_INVALIDACIONES, set()).add(prefijo)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidar_tras_commit(session):
+    """Aplica las invalidaciones acumuladas una vez confirmado el commit"""
+    prefijos = session.info.pop(CLAVE_INVALIDACIONES, None)
+    if prefijos and EXTENSION in current_app.extensions:
+        cache = obtener_cache()
+        for prefijo in prefijos:
+            cache.invalidar(*prefijo)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _descartar_invalidaciones(session):
+    """Descarta las invalidaciones si la transacción se revierte"""
+    session.info.pop(CLAVE_INVALIDACIONES, None)
+
+
+def version_despliegue(app=None):
+    """
+    Identificador del despliegue actual, incluido en las claves de páginas y fragmentos.
+
+    Se toma de CACHE_VERSION (ej. el commit desplegado) y, si no está definida,
+    de la huella del manifiesto de assets, que cambia con cada build.
+    """
+    app = app or current_app
+    version = app.config.get('CACHE_VERSION')
+    if version:
+        return version
+
+    from utils.assets import cargar_manifiesto
+    manifiesto = cargar_manifiesto(app)
+    if not manifiesto:
+        return 'dev'
+    contenido = '|'.join(f"{k}={v}" for k, v in sorted(manifiesto.items()))
+    return hashlib.sha1(contenido.encode('utf-8')).hexdigest()[:12]
+
+
+def _cache_pagina_aplicable():
+    """Sólo se cachean peticiones GET/HEAD de visitantes anónimos sin sesión flash pendiente"""
+    from flask import session
+    return (current_app.config['CACHE_HABILITADA']
+            and request.method in ('GET', 'HEAD')
+            and not current_user.is_authenticated
+            and '_flashes' not in session)
+
+
+def cachear_pagina(ttl=None):
+    """
+    Decorador de vistas públicas que cachea el HTML completo para visitantes anónimos.
+
+    La clave incluye la versión de despliegue, la ruta y los argumentos de la
+    petición. Los usuarios autenticados siempre reciben la página recién
+    renderizada. Las respuestas cacheadas llevan ETag, así que una recarga
+    del navegador se resuelve con un 304.
+
+    Args:
+        ttl: Segundos de vida de la página (por defecto CACHE_PAGINAS_TTL)
+    """
+    def decorador(f):
+        @wraps(f)
+        def envoltura(*args, **kwargs):
+            if not _cache_pagina_aplicable():
+                return f(*args, **kwargs)
+
+            cache = obtener_cache()
+            clave = ('pagina', version_despliegue(), request.path,
+                     tuple(sorted(request.args.items(multi=True))))
+            entrada = cache.obtener(clave)
+
+            if entrada is None:
+                response = make_response(f(*args, **kwargs))
+                datos = response.get_data() if not response.is_streamed else None
+                if (response.status_code != 200 or datos is None
+                        or len(datos) > current_app.config['CACHE_PAGINA_MAX_BYTES']):
+                    return response
+                entrada = (datos, response.mimetype, hashlib.sha1(datos).hexdigest())
+                cache.guardar(clave, entrada, current_app.config['CACHE_PAGINAS_TTL'] if ttl is None else ttl)
+
+            datos, mimetype, etag = entrada
+            response = current_app.response_class(datos, mimetype=mimetype)
+            response.set_etag(etag)
+            return response.make_conditional(request)
+        return envoltura
+    return decorador
+
+
+class ExtensionCacheFragmentos(Extension):
+    """
+    Etiqueta {% cache %} para cachear fragmentos de plantilla.
+
+    Uso:
+        {% cache 'secciones' %} ... {% endcache %}
+        {% cache 'resumen', folio, 60 %} ... {% endcache %}
+
+    Los argumentos forman la clave junto con la plantilla y la línea del
+    bloque; si el último argumento es un entero se usa como TTL en segundos.
+    El contenido del bloque sólo debe depender de esos argumentos.
+    """
+    tags = {'cache'}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        argumentos = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            argumentos.append(parser.parse_expression())
+
+        cuerpo = parser.parse_statements(('name:endcache',), drop_needle=True)
+        identificador = nodes.Const(f"{parser.name}:{lineno}")
+        return nodes.CallBlock(
+            self.call_method('_renderizar', [identificador, nodes.List(argumentos)]),
+            [], [], cuerpo
+        ).set_lineno(lineno)
+
+    def _renderizar(self, identificador, argumentos, caller):
+        app = current_app._get_current_object()
+        if not app.config['CACHE_HABILITADA']:
+            return caller()
+
+        ttl = app.config['CACHE_FRAGMENTOS_TTL']
+        if len(argumentos) > 1 and isinstance(argumentos[-1], int):
+            ttl = argumentos.pop()
+
+        clave = ('fragmento', version_despliegue(app), identificador, tuple(argumentos))
+        return obtener_cache(app).obtener_o_calcular(clave, caller, ttl)
+
+
+def init_app(app):
+    """
+    Crea la caché del proceso, registra la etiqueta {% cache %} y configura
+    la caché de bytecode de Jinja en disco.
+    """
+    app.config.setdefault('CACHE_HABILITADA', True)
+    app.config.setdefault('CACHE_MAX_ENTRADAS', 512)
+    app.config.setdefault('CACHE_TTL', 300)
+    app.config.setdefault('CACHE_PAGINAS_TTL', 600)
+    app.config.setdefault('CACHE_FRAGMENTOS_TTL', 3600)
+    app.config.setdefault('CACHE_PAGINA_MAX_BYTES', 512 * 1024)
+    app.config.setdefault('CACHE_VERSION', None)
+    app.config.setdefault('JINJA_BYTECODE_CACHE_DIR', os.path.join(app.root_path, '.jinja_cache'))
+
+    app.extensions[EXTENSION] = CacheLRU(app.config['CACHE_MAX_ENTRADAS'], app.config['CACHE_TTL'])
+
+    app.jinja_env.add_extension(ExtensionCacheFragmentos)
+
+    # El bytecode compilado se guarda en disco para que los workers nuevos no
+    # tengan que recompilar las plantillas; Jinja lo invalida solo si la
+    # plantilla cambia (compara el checksum del código fuente)
+    directorio = app.config['JINJA_BYTECODE_CACHE_DIR']
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directorio)
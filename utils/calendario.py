@@ -0,0 +1,86 @@
+"""
+Resumen mensual de entrevistas para el calendario, cacheado por mes y asesor.
+
+Las entradas se invalidan tras el commit de cualquier escritura que pueda
+cambiar el resumen: altas, cambios y bajas de entrevistas (incluido el mes
+anterior si se movió la fecha) y cambios de nombre o asesor de un recluta.
+Las operaciones en lote (INSERT/UPDATE/DELETE de varias filas) invalidan todos los meses.
+"""
+from datetime import date
+from itertools import chain
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from models import db
+from models.entrevista import Entrevista
+from models.recluta import Recluta
+from utils.cache import obtener_cache, invalidar_tras_commit
+
+# Espacio de nombres de las claves en la caché
+PREFIJO = 'calendario'
+
+# Campos de un recluta que aparecen en el resumen o en su filtro
+CAMPOS_RECLUTA = ('nombre', 'asesor_id')
+
+
+def rango_mes(mes):
+    """
+    Convierte 'YYYY-MM' en el rango de fechas del mes.
+
+    Returns:
+        tuple: (primer día, primer día del mes siguiente)
+
+    Raises:
+        ValueError: Si el mes no tiene el formato esperado
+    """
+    anio, numero = (int(parte) for parte in mes.split('-'))
+    inicio = date(anio, numero, 1)
+    fin = date(anio + 1, 1, 1) if numero == 12 else date(anio, numero + 1, 1)
+    return inicio, fin
+
+
+def resumen_mes(mes, asesor_id=None):
+    """
+    Resumen por día de las entrevistas de un mes (ver Entrevista.resumen_mes).
+
+    Args:
+        mes: Mes en formato 'YYYY-MM'
+        asesor_id: Limitar a los reclutas de este asesor (opcional)
+    """
+    inicio, fin = rango_mes(mes)
+    return obtener_cache().obtener_o_calcular(
+        (PREFIJO, inicio.strftime('%Y-%m'), asesor_id),
+        lambda: Entrevista.resumen_mes(inicio, fin, asesor_id),
+        current_app.config['CALENDARIO_CACHE_TTL']
+    )
+
+
+def _mes(fecha):
+    """Mes 'YYYY-MM' de una fecha (acepta date o string ISO)"""
+    return str(fecha)[:7] if fecha else None
+
+
+@event.listens_for(Session, 'before_flush')
+def _registrar_cambios(session, flush_context, instances):
+    """Registra los meses afectados por las entrevistas y reclutas modificados"""
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, Entrevista):
+            meses = {_mes(obj.fecha)}
+            meses.update(_mes(f) for f in db.inspect(obj).attrs.fecha.history.deleted)
+            for mes in meses - {None}:
+                invalidar_tras_commit(session, PREFIJO, mes)
+        elif isinstance(obj, Recluta) and obj not in session.new:
+            estado = db.inspect(obj)
+            if obj in session.deleted or any(estado.attrs[campo].history.has_changes() for campo in CAMPOS_RECLUTA):
+                invalidar_tras_commit(session, PREFIJO)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _registrar_cambios_en_lote(estado_ejecucion):
+    """Las sentencias INSERT/UPDATE/DELETE en lote pueden tocar cualquier mes"""
+    mapper = estado_ejecucion.bind_mapper
+    if mapper is None:
+        return
+    if ((estado_ejecucion.is_update or estado_ejecucion.is_delete) and mapper.class_ in (Entrevista, Recluta)) \
+            or (estado_ejecucion.is_insert and mapper.class_ is Entrevista):
+        invalidar_tras_commit(estado_ejecucion.session, PREFIJO)
@@ -0,0 +1,237 @@
+"""
+Compresión de respuestas HTTP (gzip y, si está instalado, brotli).
+
+Las respuestas dinámicas se comprimen en after_request según Accept-Encoding.
+Los archivos estáticos no se comprimen por petición: se sirven sus versiones
+precomprimidas (.br/.gz) generadas una vez con `flask static-comprimir`.
+"""
+import os
+import gzip
+import zlib
+import mimetypes
+from flask import request, send_from_directory, abort
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dependencia opcional
+    brotli = None
+
+# Tipos MIME que vale la pena comprimir (las imágenes y PDF ya van comprimidos)
+MIMETYPES_COMPRIMIBLES = {
+    'application/json', 'application/javascript', 'text/javascript', 'text/css',
+    'text/html', 'text/plain', 'text/csv', 'image/svg+xml', 'application/xml',
+    'text/xml', 'application/manifest+json'
+}
+
+# Extensiones de archivos estáticos para los que se generan versiones precomprimidas
+EXTENSIONES_PRECOMPRIMIBLES = {'.js', '.css', '.html', '.svg', '.json', '.txt', '.map'}
+
+# Codificaciones soportadas, en orden de preferencia, con la extensión de su archivo precomprimido
+CODIFICACIONES = [('br', '.br'), ('gzip', '.gz')] if brotli else [('gzip', '.gz')]
+
+
+class Compresor:
+    """Interfaz común para comprimir por fragmentos con gzip o brotli"""
+
+    def __init__(self, codificacion, nivel):
+        self.codificacion = codificacion
+        if codificacion == 'br':
+            self._brotli = brotli.Compressor(quality=nivel)
+        else:
+            # wbits=31: formato gzip (cabecera y CRC) en lugar de zlib
+            self._zlib = zlib.compressobj(nivel, zlib.DEFLATED, 31)
+
+    def comprimir(self, datos):
+        """Comprime un fragmento y vacía el buffer para que pueda enviarse ya"""
+        if self.codificacion == 'br':
+            return self._brotli.process(datos) + self._brotli.flush()
+        return self._zlib.compress(datos) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finalizar(self):
+        """Retorna los bytes finales del stream comprimido"""
+        if self.codificacion == 'br':
+            return self._brotli.finish()
+        return self._zlib.flush(zlib.Z_FINISH)
+
+
+def comprimir_bytes(datos, codificacion, nivel):
+    """Comprime un contenido completo con la codificación indicada"""
+    if codificacion == 'br':
+        return brotli.compress(datos, quality=nivel)
+    return gzip.compress(datos, compresslevel=nivel, mtime=0)
+
+
+def negociar_codificacion():
+    """
+    Elige la mejor codificación aceptada por el cliente (respetando los valores q).
+
+    Returns:
+        str: 'br', 'gzip' o None si no acepta ninguna de las soportadas
+    """
+    return request.accept_encodings.best_match([c for c, _ in CODIFICACIONES])
+
+
+def _comprimir_stream(iterable, compresor):
+    """Envuelve el iterable de una respuesta en streaming comprimiendo cada fragmento"""
+    try:
+        for fragmento in iterable:
+            if isinstance(fragmento, str):
+                fragmento = fragmento.encode('utf-8')
+            datos = compresor.comprimir(fragmento)
+            if datos:
+                yield datos
+        yield compresor.finalizar()
+    finally:
+        if hasattr(iterable, 'close'):
+            iterable.close()
+
+
+def _es_comprimible(response):
+    """Indica si el tipo de contenido de una respuesta se beneficia de la compresión"""
+    return response.mimetype in MIMETYPES_COMPRIMIBLES
+
+
+def comprimir_respuesta(app, response):
+    """
+    Comprime una respuesta si el cliente lo acepta y vale la pena.
+
+    Se omiten las respuestas ya codificadas, parciales (206), sin cuerpo,
+    de archivos (direct_passthrough, ver servir_estatico) y los streams de
+    eventos, que deben llegar al cliente sin buffers intermedios.
+    """
+    if not app.config['COMPRESION_HABILITADA'] or not _es_comprimible(response):
+        return response
+
+    response.vary.add('Accept-Encoding')
+
+    if (response.status_code < 200 or response.status_code in (204, 206, 304)
+            or 'Content-Encoding' in response.headers
+            or response.direct_passthrough
+            or 'no-transform' in response.headers.get('Cache-Control', '')):
+        return response
+
+    codificacion = negociar_codificacion()
+    if codificacion is None:
+        return response
+
+    nivel = app.config['COMPRESION_NIVEL_BROTLI'] if codificacion == 'br' else app.config['COMPRESION_NIVEL_GZIP']
+
+    if response.is_streamed:
+        response.response = _comprimir_stream(response.response, Compresor(codificacion, nivel))
+        response.headers.pop('Content-Length', None)
+    else:
+        datos = response.get_data()
+        if len(datos) < app.config['COMPRESION_TAMANO_MINIMO']:
+            return response
+        response.set_data(comprimir_bytes(datos, codificacion, nivel))
+
+    response.headers['Content-Encoding'] = codificacion
+
+    # La representación comprimida es distinta: no debe compartir ETag fuerte
+    etag, debil = response.get_etag()
+    if etag:
+        response.set_etag(f"{etag}-{codificacion}", weak=debil)
+
+    return response
+
+
+def _es_upload(app, ruta):
+    """Indica si una ruta absoluta está dentro del directorio de uploads"""
+    uploads = os.path.normcase(os.path.realpath(os.path.join(app.root_path, app.config['UPLOAD_FOLDER'])))
+    ruta = os.path.normcase(os.path.realpath(ruta))
+    return ruta == uploads or ruta.startswith(uploads + os.sep)
+
+
+def servir_estatico(app, filename):
+    """
+    Vista de /static que entrega la versión precomprimida de un archivo
+    (.br o .gz) si existe, es más reciente que el original y el cliente la acepta.
+    No entrega nada del directorio de uploads (responde 404).
+    """
+    codificacion = negociar_codificacion()
+    original = safe_join(app.static_folder, filename)
+
+    # Los archivos subidos sólo se entregan por la API, que verifica permisos
+    if original is not None and _es_upload(app, original):
+        abort(404)
+
+    for nombre, extension in CODIFICACIONES:
+        if nombre != codificacion or original is None or not os.path.isfile(original):
+            continue
+        precomprimido = original + extension
+        if os.path.isfile(precomprimido) and os.path.getmtime(precomprimido) >= os.path.getmtime(original):
+            response = send_from_directory(
+                app.static_folder,
+                filename + extension,
+                mimetype=mimetypes.guess_type(filename)[0],
+                max_age=app.get_send_file_max_age(filename)
+            )
+            response.headers['Content-Encoding'] = nombre
+            response.vary.add('Accept-Encoding')
+            return response
+
+    response = app.send_static_file(filename)
+    if _es_comprimible(response):
+        response.vary.add('Accept-Encoding')
+    return response
+
+
+def precomprimir_directorio(directorio, excluir=(), forzar=False, log=print):
+    """
+    Genera las versiones .gz (y .br) de los archivos estáticos comprimibles.
+
+    Sólo se regeneran las que faltan o son más antiguas que el original.
+
+    Args:
+        directorio: Directorio raíz a recorrer
+        excluir: Subdirectorios de primer nivel a omitir (ej. uploads)
+        forzar: Regenerar aunque estén al día
+        log: Función usada para el reporte
+
+    Returns:
+        int: Número de archivos comprimidos generados
+    """
+    generados = 0
+    for raiz, subdirectorios, archivos in os.walk(directorio):
+        if raiz == directorio:
+            subdirectorios[:] = [d for d in subdirectorios if d not in excluir]
+
+        for nombre in archivos:
+            if os.path.splitext(nombre)[1].lower() not in EXTENSIONES_PRECOMPRIMIBLES:
+                continue
+            original = os.path.join(raiz, nombre)
+            with open(original, 'rb') as f:
+                datos = f.read()
+
+            for codificacion, extension in CODIFICACIONES:
+                destino = original + extension
+                if not forzar and os.path.exists(destino) and os.path.getmtime(destino) >= os.path.getmtime(original):
+                    continue
+                comprimido = comprimir_bytes(datos, codificacion, 11 if codificacion == 'br' else 9)
+                # No vale la pena servir una versión comprimida que no ahorra nada
+                if len(comprimido) >= len(datos):
+                    continue
+                temporal = f"{destino}.tmp"
+                with open(temporal, 'wb') as f:
+                    f.write(comprimido)
+                os.replace(temporal, destino)
+                generados += 1
+                log(f"{os.path.relpath(destino, directorio)}: {len(datos)} -> {len(comprimido)} bytes")
+
+    return generados
+
+
+def init_app(app):
+    """Registra la compresión de respuestas y la vista de estáticos precomprimidos"""
+    app.config.setdefault('COMPRESION_HABILITADA', True)
+    app.config.setdefault('COMPRESION_TAMANO_MINIMO', 500)
+    app.config.setdefault('COMPRESION_NIVEL_GZIP', 6)
+    app.config.setdefault('COMPRESION_NIVEL_BROTLI', 5)
+
+    @app.after_request
+    def _comprimir(response):
+        return comprimir_respuesta(app, response)
+
+    if app.has_static_folder:
+        app.view_functions['static'] = lambda filename: servir_estatico(app, filename)
@@ -0,0 +1,74 @@
+import os
+from flask import current_app, request, send_file, abort, Response
+from werkzeug.utils import send_file as werkzeug_send_file
+from utils.almacenamiento import ruta_absoluta, directorio_uploads
+
+
+def enviar_archivo(ruta_relativa, nombre_descarga=None, mimetype=None):
+    """
+    Envía un archivo subido tras haber verificado los permisos del usuario.
+
+    Soporta peticiones Range y condicionales (ETag / Last-Modified). Según
+    DESCARGAS_OFFLOAD, los bytes los envía Python o el servidor web:
+
+    - None: Flask sirve el archivo directamente.
+    - 'x-sendfile': cabecera X-Sendfile con la ruta absoluta (Apache, lighttpd).
+    - 'x-accel': cabecera X-Accel-Redirect (nginx), con DESCARGAS_X_ACCEL_PREFIX
+      apuntando a una location `internal` cuyo alias es el directorio de uploads:
+
+          location /uploads-protegidos/ {
+              internal;
+              alias /ruta/a/la/app/static/uploads/;
+          }
+
+      Si el servidor web entrega /static/ directamente, debe excluir los
+      uploads (location /static/uploads/ { return 404; }): la vista de
+      estáticos de Flask ya los rechaza, pero nginx no pasaría por ella.
+
+    Args:
+        ruta_relativa: Ruta relativa guardada en la BD (static/uploads/...)
+        nombre_descarga: Nombre de archivo a mostrar al cliente
+        mimetype: Tipo MIME (se deduce del nombre si no se indica)
+
+    Returns:
+        Response con el archivo, 206 para rangos o 304 si no cambió
+    """
+    ruta = ruta_absoluta(ruta_relativa)
+    if not os.path.isfile(ruta):
+        abort(404)
+
+    modo = current_app.config.get('DESCARGAS_OFFLOAD')
+    max_age = current_app.config.get('DESCARGAS_MAX_AGE', 0)
+
+    if modo == 'x-accel':
+        relativa = os.path.relpath(ruta, directorio_uploads()).replace(os.sep, '/')
+        response = Response(mimetype=mimetype or 'application/octet-stream')
+        response.headers['X-Accel-Redirect'] = current_app.config['DESCARGAS_X_ACCEL_PREFIX'] + relativa
+        if nombre_descarga:
+            response.headers.set('Content-Disposition', 'inline', filename=nombre_descarga)
+    elif modo == 'x-sendfile':
+        response = werkzeug_send_file(
+            ruta,
+            request.environ,
+            mimetype=mimetype,
+            download_name=nombre_descarga,
+            conditional=True,
+            etag=True,
+            max_age=max_age,
+            use_x_sendfile=True
+        )
+    else:
+        response = send_file(
+            ruta,
+            mimetype=mimetype,
+            download_name=nombre_descarga,
+            conditional=True,
+            etag=True,
+            max_age=max_age
+        )
+
+    # Contenido autenticado: sólo el navegador del usuario puede guardarlo en caché
+    response.cache_control.private = True
+    response.cache_control.public = False
+    response.headers['Accept-Ranges'] = 'bytes'
+    return response
@@ -0,0 +1,97 @@
+"""
+Actualización del esquema de bases de datos existentes.
+
+db.create_all() crea las tablas que faltan pero no modifica las que ya
+existen: las columnas e índices agregados a un modelo después del primer
+despliegue (ej. Documento.estado y Documento.paginas) no llegarían a las
+instalaciones anteriores y cualquier consulta fallaría con "no such column".
+Este módulo compara el modelo con la base de datos y agrega lo que falta.
+
+Sólo se agregan columnas e índices; los cambios de tipo, los renombrados y
+las restricciones de clave foránea de columnas nuevas no se aplican.
+"""
+from flask import current_app
+from sqlalchemy import inspect
+from sqlalchemy.exc import SQLAlchemyError
+from models import db
+
+
+def _definicion_columna(columna, dialecto):
+    """Definición SQL de una columna para ALTER TABLE ... ADD COLUMN"""
+    preparador = dialecto.identifier_preparer
+    partes = [preparador.quote(columna.name), columna.type.compile(dialect=dialecto)]
+
+    # Un valor por defecto escalar se usa para las filas existentes; sin él la
+    # columna se agrega como nullable, porque no hay valor que darles
+    valor = columna.default.arg if columna.default is not None and columna.default.is_scalar else None
+    if valor is not None:
+        literal = db.literal(valor, columna.type).compile(dialect=dialecto, compile_kwargs={'literal_binds': True})
+        partes.append(f"DEFAULT {literal}")
+        if not columna.nullable:
+            partes.append("NOT NULL")
+    return ' '.join(partes)
+
+
+def cambios_pendientes(conexion):
+    """
+    Compara el modelo con la base de datos.
+
+    Returns:
+        tuple: (lista de (tabla, columna) que faltan, lista de índices que faltan),
+        sólo de tablas que ya existen
+    """
+    inspector = inspect(conexion)
+    tablas = set(inspector.get_table_names())
+    columnas, indices = [], []
+    for tabla in db.metadata.sorted_tables:
+        if tabla.name not in tablas:
+            continue
+        existentes = {c['name'] for c in inspector.get_columns(tabla.name)}
+        columnas.extend((tabla, c) for c in tabla.columns if c.name not in existentes)
+        nombres_indices = {i['name'] for i in inspector.get_indexes(tabla.name)}
+        indices.extend(i for i in tabla.indexes if i.name not in nombres_indices)
+    return columnas, indices
+
+
+def actualizar_esquema(log=None):
+    """
+    Agrega a las tablas existentes las columnas e índices del modelo que no tienen.
+
+    Cada cambio se aplica en su propia transacción. Si falla (por ejemplo,
+    porque otro worker lo aplicó al mismo tiempo) se registra y se continúa.
+
+    Args:
+        log: Función para reportar cada cambio (por defecto, el logger de la app)
+
+    Returns:
+        int: Número de cambios aplicados
+    """
+    log = log or current_app.logger.info
+    with db.engine.connect() as conexion:
+        columnas, indices = cambios_pendientes(conexion)
+
+    dialecto = db.engine.dialect
+    aplicados = 0
+    for tabla, columna in columnas:
+        sentencia = (
+            f"ALTER TABLE {dialecto.identifier_preparer.quote(tabla.name)} "
+            f"ADD COLUMN {_definicion_columna(columna, dialecto)}"
+        )
+        try:
+            with db.engine.begin() as conexion:
+                conexion.exec_driver_sql(sentencia)
+            aplicados += 1
+            log(f"Columna agregada: {tabla.name}.{columna.name}")
+        except SQLAlchemyError as e:
+            current_app.logger.warning(f"No se pudo agregar la columna {tabla.name}.{columna.name}: {str(e)}")
+
+    for indice in indices:
+        try:
+            with db.engine.begin() as conexion:
+                indice.create(bind=conexion)
+            aplicados += 1
+            log(f"Índice creado: {indice.name} en {indice.table.name}")
+        except SQLAlchemyError as e:
+            current_app.logger.warning(f"No se pudo crear el índice {indice.name}: {str(e)}")
+
+    return aplicados
@@ -0,0 +1,164 @@
+"""
+Estadísticas del panel, cacheadas por ámbito: globales, de cada asesor y el
+desglose de todos los asesores para los administradores.
+
+Cada ámbito se invalida por separado tras el commit de las escrituras que
+lo afectan: un cambio en un recluta invalida el global, su asesor (el
+anterior y el nuevo si se reasignó) y el desglose; un cambio en una
+entrevista invalida el global y el asesor de su recluta. Las operaciones
+en lote invalidan todos los ámbitos.
+"""
+from datetime import datetime
+from itertools import chain
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from models import db
+from models.entrevista import Entrevista
+from models.recluta import Recluta
+from models.usuario import Usuario
+from utils.cache import obtener_cache, invalidar_tras_commit
+
+# Espacio de nombres de las claves en la caché
+PREFIJO = 'estadisticas'
+
+# Ámbitos que no son de un asesor concreto
+GLOBAL = 'global'
+ASESORES = 'asesores'
+
+# Campos de un recluta que cambian sus conteos o las próximas entrevistas
+CAMPOS_RECLUTA = ('estado', 'asesor_id', 'nombre')
+
+# Campos de una entrevista que cambian los conteos, el reparto por mes o las próximas
+CAMPOS_ENTREVISTA = ('estado', 'fecha', 'hora', 'recluta_id')
+
+
+def _resumen_reclutas(conteos):
+    """Da al conteo por estado de reclutas la forma que usa el panel"""
+    return {
+        "total": sum(conteos.values()),
+        "activos": conteos.get('Activo', 0),
+        "en_proceso": conteos.get('En proceso', 0),
+        "rechazados": conteos.get('Rechazado', 0)
+    }
+
+
+def _calcular_resumen(asesor_id, hoy):
+    """Consulta las estadísticas de un ámbito (sin caché)"""
+    entrevistas = Entrevista.contar_por_estado(asesor_id)
+    return {
+        "reclutas": _resumen_reclutas(Recluta.contar_por_estado(asesor_id)),
+        "entrevistas": {
+            "pendientes": entrevistas.get('pendiente', 0),
+            "completadas": entrevistas.get('completada', 0),
+            "canceladas": entrevistas.get('cancelada', 0),
+            "proximas": [e.serialize() for e in Entrevista.get_upcoming(limit=5, asesor_id=asesor_id)],
+            "por_mes": Entrevista.count_by_month(hoy.year, asesor_id)
+        }
+    }
+
+
+def resumen(asesor_id=None):
+    """
+    Estadísticas del panel: reclutas y entrevistas por estado, próximas
+    entrevistas y entrevistas por mes del año en curso.
+
+    La clave incluye el día porque las próximas entrevistas dependen de él.
+
+    Args:
+        asesor_id: Limitar a los reclutas de este asesor (opcional)
+    """
+    hoy = datetime.now().date()
+    return obtener_cache().obtener_o_calcular(
+        (PREFIJO, asesor_id or GLOBAL, hoy.isoformat()),
+        lambda: _calcular_resumen(asesor_id, hoy),
+        current_app.config['ESTADISTICAS_CACHE_TTL']
+    )
+
+
+def _calcular_desglose():
+    """Consulta el desglose por asesor (sin caché)"""
+    conteos = {}
+    for asesor_id, estado, total in Recluta.contar_por_asesor_y_estado():
+        conteos.setdefault(asesor_id, {})[estado] = total
+
+    # Todos los asesores, aunque no tengan reclutas, y los demás usuarios con reclutas asignados
+    usuarios = db.session.execute(
+        db.select(Usuario.id, Usuario.nombre, Usuario.email)
+        .where(db.or_(Usuario.rol == 'asesor', Usuario.id.in_([i for i in conteos if i is not None])))
+        .order_by(Usuario.nombre, Usuario.id)
+    ).all()
+
+    desglose = [
+        {
+            "asesor_id": usuario.id,
+            "nombre": usuario.nombre or usuario.email,
+            "reclutas": _resumen_reclutas(conteos.get(usuario.id, {})),
+            "por_estado": conteos.get(usuario.id, {})
+        }
+        for usuario in usuarios
+    ]
+    if None in conteos:
+        desglose.append({
+            "asesor_id": None,
+            "nombre": "Sin asignar",
+            "reclutas": _resumen_reclutas(conteos[None]),
+            "por_estado": conteos[None]
+        })
+    return desglose
+
+
+def desglose_asesores():
+    """
+    Reclutas por estado de cada asesor, con una sola consulta agrupada
+    (más la de los nombres). Incluye una entrada para los no asignados.
+
+    Returns:
+        list: Un diccionario por asesor con asesor_id, nombre, reclutas y por_estado
+    """
+    return obtener_cache().obtener_o_calcular(
+        (PREFIJO, ASESORES),
+        _calcular_desglose,
+        current_app.config['ESTADISTICAS_CACHE_TTL']
+    )
+
+
+def _asesor_de(session, recluta_id):
+    """Asesor de un recluta, del mapa de identidad si ya está cargado"""
+    if recluta_id is None:
+        return None
+    with session.no_autoflush:
+        recluta = session.get(Recluta, recluta_id)
+    return recluta.asesor_id if recluta else None
+
+
+@event.listens_for(Session, 'before_flush')
+def _registrar_cambios(session, flush_context, instances):
+    """Registra los ámbitos afectados por los reclutas y entrevistas modificados"""
+    ambitos = set()
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, Recluta):
+            estado = db.inspect(obj)
+            nuevo_o_baja = obj in session.new or obj in session.deleted
+            if nuevo_o_baja or any(estado.attrs[campo].history.has_changes() for campo in CAMPOS_RECLUTA):
+                ambitos.update((GLOBAL, ASESORES, obj.asesor_id))
+                ambitos.update(estado.attrs.asesor_id.history.deleted)
+        elif isinstance(obj, Entrevista):
+            estado = db.inspect(obj)
+            nuevo_o_baja = obj in session.new or obj in session.deleted
+            if nuevo_o_baja or any(estado.attrs[campo].history.has_changes() for campo in CAMPOS_ENTREVISTA):
+                ambitos.add(GLOBAL)
+                recluta_ids = {obj.recluta_id, *estado.attrs.recluta_id.history.deleted}
+                ambitos.update(_asesor_de(session, recluta_id) for recluta_id in recluta_ids)
+    for ambito in ambitos - {None}:
+        invalidar_tras_commit(session, PREFIJO, ambito)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _registrar_cambios_en_lote(estado_ejecucion):
+    """Las sentencias INSERT/UPDATE/DELETE en lote pueden tocar cualquier ámbito"""
+    mapper = estado_ejecucion.bind_mapper
+    if mapper is None or mapper.class_ not in (Entrevista, Recluta):
+        return
+    if estado_ejecucion.is_insert or estado_ejecucion.is_update or estado_ejecucion.is_delete:
+        invalidar_tras_commit(estado_ejecucion.session, PREFIJO)
@@ -0,0 +1,340 @@
+"""
+Eventos en vivo para el dashboard (Server-Sent Events).
+
+Los cambios de reclutas y entrevistas se recogen al hacer flush y se publican
+en un bus en memoria sólo cuando la transacción se confirma; si se revierte,
+se descartan. Cada conexión de /api/eventos es una suscripción con su propia
+cola acotada: los administradores reciben todos los eventos y cada asesor
+sólo los de sus reclutas (incluido el asesor anterior cuando se reasigna uno).
+
+El bus es por proceso: un cliente sólo recibe los cambios hechos en el
+worker al que está conectado. Para que todos los clientes vean todos los
+cambios, el servidor debe correr un único proceso con hilos o workers
+asíncronos (gevent), que además es lo que conviene para conexiones largas.
+
+Las operaciones en lote (UPDATE/DELETE de varias filas, INSERT masivo de
+entrevistas) no tienen detalle por fila y se publican como un evento
+'recarga' para que el cliente vuelva a pedir el recurso afectado. Lo mismo
+ocurre si la cola de un cliente se llena o si al reconectarse pide eventos
+que ya no están en el historial.
+"""
+import os
+import time
+import queue
+import threading
+from collections import deque
+from itertools import chain
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from models import db
+from models.recluta import Recluta
+from models.entrevista import Entrevista
+from models.usuario import Usuario
+from utils.imagenes import urls_foto
+
+# Clave de la instancia en app.extensions
+EXTENSION = 'eventos'
+
+# Clave en session.info con los eventos a publicar tras el commit
+CLAVE_PENDIENTES = 'eventos_pendientes'
+
+# Prefijo de los IDs de evento: distingue este proceso de otros y de reinicios,
+# así un Last-Event-ID ajeno provoca una recarga en lugar de perder eventos
+ARRANQUE = os.urandom(4).hex()
+
+# Campos de la fila de la tabla de reclutas que viajan en cada evento
+CAMPOS_RECLUTA = ('id', 'nombre', 'email', 'telefono', 'estado', 'puesto', 'folio', 'foto_url', 'asesor_id')
+
+# Campos de la entrevista que usa el calendario (ver Entrevista.COLUMNAS_CALENDARIO)
+CAMPOS_ENTREVISTA = ('fecha',) + Entrevista.COLUMNAS_CALENDARIO
+
+
+class Suscripcion:
+    """
+    Conexión de un cliente al bus.
+
+    Args:
+        asesor_id: Recibir sólo eventos de este asesor (None = todos)
+        capacidad: Eventos que puede acumular la cola antes de desbordarse
+    """
+
+    def __init__(self, asesor_id=None, capacidad=100):
+        self.asesor_id = asesor_id
+        self.cola = queue.Queue(maxsize=capacidad)
+        self.desbordada = False
+
+    def admite(self, evento):
+        """Indica si el evento es visible para esta suscripción"""
+        return (self.asesor_id is None or evento['asesores'] is None
+                or self.asesor_id in evento['asesores'])
+
+    def entregar(self, evento):
+        """Encola un evento sin bloquear; si la cola está llena marca la suscripción para recarga"""
+        try:
+            self.cola.put_nowait(evento)
+        except queue.Full:
+            self.desbordada = True
+
+
+class BusEventos:
+    """
+    Publicación/suscripción en memoria, segura entre hilos.
+
+    Guarda los últimos eventos publicados para que un cliente que se
+    reconecta (cabecera Last-Event-ID) recupere los que se perdió.
+
+    Args:
+        historial: Número de eventos recientes que se conservan
+        capacidad: Tamaño de la cola de cada suscripción
+    """
+
+    def __init__(self, historial=200, capacidad=100):
+        self.capacidad = capacidad
+        self._historial = deque(maxlen=historial)
+        self._suscripciones = set()
+        self._secuencia = 0
+        self._lock = threading.Lock()
+
+    def suscribir(self, asesor_id=None, ultimo_id=None):
+        """
+        Registra una suscripción nueva.
+
+        Args:
+            asesor_id: Filtrar por asesor (None = todos los eventos)
+            ultimo_id: Último ID de evento recibido por el cliente (Last-Event-ID)
+
+        Returns:
+            tuple: (Suscripcion, eventos posteriores a ultimo_id o None si no
+                   se pueden recuperar y el cliente debe recargar)
+        """
+        suscripcion = Suscripcion(asesor_id, self.capacidad)
+        with self._lock:
+            self._suscripciones.add(suscripcion)
+            perdidos = self._posteriores(ultimo_id, suscripcion)
+        return suscripcion, perdidos
+
+    def _posteriores(self, ultimo_id, suscripcion):
+        """Eventos del historial posteriores a un ID (llamar con el lock tomado)"""
+        if not ultimo_id:
+            return []
+        arranque, _, numero = ultimo_id.partition('-')
+        if arranque != ARRANQUE or not numero.isdigit():
+            return None
+        numero = int(numero)
+        if numero >= self._secuencia:
+            return []
+        if not self._historial or self._historial[0]['numero'] > numero + 1:
+            return None
+        return [e for e in self._historial if e['numero'] > numero and suscripcion.admite(e)]
+
+    def cancelar(self, suscripcion):
+        """Elimina una suscripción (el cliente se desconectó)"""
+        with self._lock:
+            self._suscripciones.discard(suscripcion)
+
+    def publicar(self, tipo, datos, asesores=None):
+        """
+        Publica un evento a las suscripciones que lo admiten.
+
+        Args:
+            tipo: Nombre del evento (ej. 'recluta.actualizado')
+            datos: Carga útil ya serializada a JSON
+            asesores: IDs de asesor a los que concierne (None = a todos)
+        """
+        with self._lock:
+            self._secuencia += 1
+            evento = {
+                'id': f"{ARRANQUE}-{self._secuencia}",
+                'numero': self._secuencia,
+                'tipo': tipo,
+                'datos': datos,
+                'asesores': frozenset(asesores) if asesores is not None else None
+            }
+            self._historial.append(evento)
+            for suscripcion in self._suscripciones:
+                if suscripcion.admite(evento):
+                    suscripcion.entregar(evento)
+
+    def __len__(self):
+        return len(self._suscripciones)
+
+
+def obtener_bus(app=None):
+    """Retorna el bus de eventos de la aplicación actual"""
+    return (app or current_app).extensions[EXTENSION]
+
+
+def init_app(app):
+    """Crea el bus de eventos del proceso"""
+    app.config.setdefault('EVENTOS_HISTORIAL', 200)
+    app.config.setdefault('EVENTOS_CAPACIDAD_COLA', 100)
+    app.config.setdefault('EVENTOS_HEARTBEAT', 15)
+    app.config.setdefault('EVENTOS_DURACION_MAXIMA', 1800)
+    app.config.setdefault('EVENTOS_MAX_CONEXIONES', 200)
+    app.config.setdefault('EVENTOS_REINTENTO_MS', 3000)
+
+    app.extensions[EXTENSION] = BusEventos(app.config['EVENTOS_HISTORIAL'], app.config['EVENTOS_CAPACIDAD_COLA'])
+
+
+def formatear(tipo, datos, evento_id=None):
+    """Formatea un evento según el protocolo text/event-stream"""
+    linea_id = f"id: {evento_id}\n" if evento_id else ''
+    return f"{linea_id}event: {tipo}\ndata: {datos}\n\n"
+
+
+def flujo_eventos(bus, asesor_id, ultimo_id, heartbeat, duracion_maxima, reintento_ms):
+    """
+    Generador del cuerpo de /api/eventos.
+
+    La suscripción se registra en la primera iteración y no al crear el
+    generador: uno que nunca empieza a consumirse (peticiones HEAD, clientes
+    que cortan antes de recibir el cuerpo) no llega al finally que la cancela.
+
+    Envía un comentario cada `heartbeat` segundos para que proxies y
+    balanceadores no cierren la conexión y para detectar antes a los clientes
+    desconectados. Pasada la duración máxima cierra el flujo; el navegador se
+    reconecta solo con Last-Event-ID, lo que libera el hilo y vuelve a
+    comprobar la sesión.
+    """
+    fin = time.monotonic() + duracion_maxima
+    suscripcion, perdidos = bus.suscribir(asesor_id, ultimo_id)
+    try:
+        yield f"retry: {reintento_ms}\n\n"
+        if perdidos is None:
+            yield formatear('recarga', '{}')
+        else:
+            for evento in perdidos:
+                yield formatear(evento['tipo'], evento['datos'], evento['id'])
+
+        while time.monotonic() < fin:
+            if suscripcion.desbordada:
+                # El cliente no consumió a tiempo: vaciar y pedir recarga completa
+                while not suscripcion.cola.empty():
+                    suscripcion.cola.get_nowait()
+                suscripcion.desbordada = False
+                yield formatear('recarga', '{}')
+            try:
+                evento = suscripcion.cola.get(timeout=heartbeat)
+            except queue.Empty:
+                yield ": ping\n\n"
+                continue
+            yield formatear(evento['tipo'], evento['datos'], evento['id'])
+    finally:
+        bus.cancelar(suscripcion)
+
+
+def _registrar(session, tipo, datos, asesores=None):
+    """Acumula un evento en la sesión hasta el commit"""
+    session.info.setdefault(CLAVE_PENDIENTES, []).append((tipo, datos, asesores))
+
+
+def _valores_anteriores(obj, campo):
+    """Valores anteriores de un atributo en este flush (ej. el asesor antes de reasignar)"""
+    return db.inspect(obj).attrs[campo].history.deleted or ()
+
+
+@event.listens_for(Session, 'after_flush')
+def _recoger_cambios(session, flush_context):
+    """
+    Convierte los reclutas y entrevistas escritos en el flush en eventos.
+
+    En after_flush los objetos ya tienen ID pero new/dirty/deleted aún
+    reflejan lo que se escribió. Los nombres de asesor y los datos del
+    recluta de cada entrevista se obtienen con una consulta por tipo, no una
+    por objeto.
+    """
+    reclutas = []
+    entrevistas = []
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, Recluta):
+            reclutas.append(obj)
+        elif isinstance(obj, Entrevista):
+            entrevistas.append(obj)
+    if not reclutas and not entrevistas:
+        return
+
+    conexion = session.connection()
+
+    # (asesor, nombre) de cada recluta implicado: los del flush primero, el resto de la base
+    datos_recluta = {r.id: (r.asesor_id, r.nombre) for r in reclutas}
+    faltantes = {e.recluta_id for e in entrevistas} - set(datos_recluta)
+    if faltantes:
+        datos_recluta.update(
+            (fila.id, (fila.asesor_id, fila.nombre)) for fila in conexion.execute(
+                db.select(Recluta.id, Recluta.asesor_id, Recluta.nombre).where(Recluta.id.in_(faltantes))
+            )
+        )
+
+    nombres = {}
+    ids_asesor = {r.asesor_id for r in reclutas if r.asesor_id}
+    if ids_asesor:
+        nombres = dict(conexion.execute(
+            db.select(Usuario.id, db.func.coalesce(db.func.nullif(Usuario.nombre, ''), Usuario.email))
+            .where(Usuario.id.in_(ids_asesor))
+        ).all())
+
+    for recluta in reclutas:
+        anteriores = _valores_anteriores(recluta, 'asesor_id')
+        asesores = {recluta.asesor_id, *anteriores} - {None}
+        if recluta in session.deleted:
+            _registrar(session, 'recluta.eliminado', {'id': recluta.id}, asesores)
+            continue
+        if recluta in session.dirty and not session.is_modified(recluta, include_collections=False):
+            continue
+        datos = {campo: getattr(recluta, campo) for campo in CAMPOS_RECLUTA}
+        datos['foto_url'], datos['foto_variantes'] = urls_foto('recluta', recluta.id, recluta.foto_url, current_app.root_path)
+        datos['asesor_nombre'] = nombres.get(recluta.asesor_id)
+        if anteriores and recluta not in session.new:
+            # Reasignado: el asesor anterior lo quita de su vista y el nuevo recarga su calendario
+            datos['asesor_anterior_id'] = anteriores[0]
+        tipo = 'recluta.creado' if recluta in session.new else 'recluta.actualizado'
+        _registrar(session, tipo, datos, asesores)
+
+    for entrevista in entrevistas:
+        ids_recluta = {entrevista.recluta_id, *_valores_anteriores(entrevista, 'recluta_id')}
+        asesores = {datos_recluta.get(recluta_id, (None, None))[0] for recluta_id in ids_recluta} - {None}
+        if entrevista in session.deleted:
+            _registrar(session, 'entrevista.eliminada', {'id': entrevista.id}, asesores)
+            continue
+        if entrevista in session.dirty and not session.is_modified(entrevista, include_collections=False):
+            continue
+        datos = {campo: getattr(entrevista, campo) for campo in CAMPOS_ENTREVISTA}
+        datos['recluta_nombre'] = datos_recluta.get(entrevista.recluta_id, (None, None))[1]
+        tipo = 'entrevista.creada' if entrevista in session.new else 'entrevista.actualizada'
+        _registrar(session, tipo, datos, asesores)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _recoger_cambios_en_lote(estado_ejecucion):
+    """Las sentencias en lote no tienen detalle por fila: se publica una recarga del recurso"""
+    mapper = estado_ejecucion.bind_mapper
+    if mapper is None or not (estado_ejecucion.is_insert or estado_ejecucion.is_update or estado_ejecucion.is_delete):
+        return
+    if mapper.class_ is Recluta:
+        _registrar(estado_ejecucion.session, 'recarga', {'recurso': 'reclutas'})
+    elif mapper.class_ is Entrevista:
+        _registrar(estado_ejecucion.session, 'recarga', {'recurso': 'entrevistas'})
+
+
+@event.listens_for(Session, 'after_commit')
+def _publicar_tras_commit(session):
+    """Publica los eventos acumulados una vez confirmado el commit"""
+    pendientes = session.info.pop(CLAVE_PENDIENTES, None)
+    if not pendientes or EXTENSION not in current_app.extensions:
+        return
+    bus = obtener_bus()
+    recargas = set()
+    for tipo, datos, asesores in pendientes:
+        if tipo == 'recarga':
+            # Una recarga por recurso basta aunque haya varias sentencias en lote
+            if datos['recurso'] in recargas:
+                continue
+            recargas.add(datos['recurso'])
+        bus.publicar(tipo, current_app.json.dumps(datos), asesores)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _descartar_tras_rollback(session):
+    """Descarta los eventos si la transacción se revierte"""
+    session.info.pop(CLAVE_PENDIENTES, None)
@@ -1,13 +1,16 @@
 import os
-import uuid
-from werkzeug.utils import secure_filename
 from flask import current_app
 from datetime import datetime, date
-import json
+from utils.almacenamiento import escribir_temporal, almacenar_contenido, liberar_referencia, ruta_absoluta, calcular_sha256
+from utils.imagenes import eliminar_variantes, es_imagen, limpiar_metadatos
 
 def guardar_archivo(archivo, subdirectorio='', tipos_permitidos=['jpg', 'jpeg', 'png', 'gif', 'pdf'], max_size=5 * 1024 * 1024):
     """
-    Guarda un archivo en el sistema.
+    Guarda un archivo en el sistema, direccionado por su contenido (SHA-256).
+    
+    El hash se calcula mientras el archivo se escribe, así que volver a subir
+    un contenido ya almacenado no genera escrituras adicionales en disco:
+    sólo incrementa su contador de referencias.
     
     Args:
         archivo: Archivo FileStorage de Flask
@@ -27,33 +30,20 @@ def guardar_archivo(archivo, subdirectorio='', tipos_permitidos=['jpg', 'jpeg',
         if extension not in tipos_permitidos:
             raise ValueError(f"Tipo de archivo no permitido. Solo se permiten: {', '.join(tipos_permitidos)}")
         
-        # Validar tamaño
-        archivo.seek(0, os.SEEK_END)
-        tamaño = archivo.tell()
-        archivo.seek(0)
-        
-        if tamaño > max_size:
-            raise ValueError(f"Archivo demasiado grande. Máximo {max_size / (1024*1024):.1f}MB")
-        
-        # Crear nombre único
-        nombre_seguro = secure_filename(archivo.filename)
-        nombre_unico = f"{uuid.uuid4().hex}_{nombre_seguro}"
-        
-        # Crear ruta completa
-        upload_dir = current_app.config['UPLOAD_FOLDER']
-        if subdirectorio:
-            upload_dir = os.path.join(upload_dir, subdirectorio)
-        
-        if not os.path.exists(upload_dir):
-            os.makedirs(upload_dir)
-        
-        ruta_completa = os.path.join(upload_dir, nombre_unico)
+        # Escribir a temporal calculando hash y validando tamaño en la misma pasada
+        ruta_temporal, sha256, tamaño = escribir_temporal(archivo.stream, max_size)
         
-        # Guardar archivo
-        archivo.save(ruta_completa)
+        # Quitar EXIF/GPS de las fotos antes de almacenarlas: la ruta depende del contenido limpio
+        if es_imagen(archivo.filename):
+            try:
+                if limpiar_metadatos(ruta_temporal):
+                    sha256, tamaño = calcular_sha256(ruta_temporal), os.path.getsize(ruta_temporal)
+            except Exception:
+                os.remove(ruta_temporal)
+                raise
         
-        # Devolver ruta relativa
-        return os.path.join('static', 'uploads', subdirectorio, nombre_unico)
+        # Mover a la ruta por contenido (o reutilizar la existente) y devolver la ruta relativa
+        return almacenar_contenido(ruta_temporal, sha256, tamaño, subdirectorio, extension)
         
     except Exception as e:
         current_app.logger.error(f"Error al guardar archivo: {str(e)}")
@@ -63,35 +53,34 @@ def eliminar_archivo(ruta_relativa):
     """
     Elimina un archivo del servidor.
     
+    Los archivos almacenados por contenido sólo pierden una referencia: si
+    ya no quedan, quien llama debe ejecutar purgar_archivo después del
+    commit (ver la tarea eliminar_archivos). Los archivos sin registro
+    (anteriores al almacenamiento por contenido) se borran directamente.
+    
     Args:
         ruta_relativa: Ruta relativa del archivo a eliminar
         
     Returns:
-        True si se elimina correctamente, False en caso contrario
+        True si el archivo debe purgarse tras el commit, False en caso contrario
     """
     if not ruta_relativa:
         return False
         
     try:
-        ruta_completa = os.path.join(current_app.root_path, ruta_relativa)
+        liberado = liberar_referencia(ruta_relativa)
+        if liberado is not None:
+            return liberado
+        
+        ruta_completa = ruta_absoluta(ruta_relativa)
+        eliminar_variantes(ruta_completa)
         if os.path.exists(ruta_completa):
             os.remove(ruta_completa)
-            return True
         return False
     except Exception as e:
         current_app.logger.error(f"Error al eliminar archivo: {str(e)}")
         return False
 
-class JSONEncoder(json.JSONEncoder):
-    """
-    Codificador JSON personalizado para manejar tipos de datos específicos
-    como datetime y date.
-    """
-    def default(self, obj):
-        if isinstance(obj, (datetime, date)):
-            return obj.isoformat()
-        return super().default(obj)
-
 def format_date(date_string, output_format='%d/%m/%Y'):
     """
     Formatea una fecha en string al formato especificado.
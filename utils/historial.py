@@ -0,0 +1,270 @@
+"""
+Historial de estados de los reclutas.
+
+Cada cambio de estado se agrega a recluta_estado_historial en la misma
+transacción que lo produce: las altas y cambios hechos con el ORM se
+registran en before_flush, y las actualizaciones en lote
+(Recluta.actualizar_en_lote) con un INSERT ... SELECT previo al UPDATE.
+
+Con ese historial se construye la timeline pública del folio con fechas
+reales y se calcula cuánto tiempo pasan los reclutas en cada estado sin
+recorrer la tabla recluta.
+"""
+from datetime import datetime, time, timedelta
+from flask import has_request_context
+from flask_login import current_user
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from models import db
+from models.recluta import Recluta
+from models.entrevista import Entrevista
+from models.recluta_estado_historial import ReclutaEstadoHistorial
+
+# Estado con el que se asume que empezaron los reclutas sin historial
+# (ver reconstruir_historial)
+ESTADO_INICIAL = 'En proceso'
+
+# Etapa de la timeline pública que corresponde a cada estado del sistema
+ETAPAS_TIMELINE = {
+    'En proceso': 'revision',
+    'Activo': 'finalizada',
+    'Rechazado': 'finalizada'
+}
+
+# Etapas de la timeline en orden, con su título y descripción
+PASOS_TIMELINE = (
+    ('recibida', 'Recibida', 'Documentación recibida y registrada en el sistema.'),
+    ('revision', 'En revisión', 'Evaluación inicial de requisitos y perfil.'),
+    ('entrevista', 'Entrevista', 'Programación y realización de entrevistas.'),
+    ('evaluacion', 'Evaluación', 'Análisis de resultados y toma de decisiones.'),
+    ('finalizada', 'Finalizada', 'Proceso completado con decisión final.'),
+)
+
+
+def _usuario_actual():
+    """ID del usuario autenticado que hace el cambio, si lo hay"""
+    if has_request_context() and current_user.is_authenticated:
+        return current_user.id
+    return None
+
+
+@event.listens_for(Session, 'before_flush')
+def _registrar_cambios_estado(session, flush_context, instances):
+    """Agrega una fila de historial por cada alta o cambio de estado de un recluta"""
+    for obj in list(session.new) + list(session.dirty):
+        if not isinstance(obj, Recluta):
+            continue
+        if obj in session.new:
+            anterior = None
+        else:
+            historia = db.inspect(obj).attrs.estado.history
+            if not historia.has_changes():
+                continue
+            anterior = historia.deleted[0] if historia.deleted else None
+            if anterior == obj.estado:
+                continue
+        session.add(ReclutaEstadoHistorial(
+            recluta=obj, estado_anterior=anterior, estado=obj.estado, usuario_id=_usuario_actual()
+        ))
+
+
+def registrar_cambios_en_lote(condiciones, estado):
+    """
+    Registra el cambio de estado de los reclutas que va a modificar un UPDATE en lote.
+
+    Debe ejecutarse antes del UPDATE, con las mismas condiciones: sólo se
+    registran los reclutas cuyo estado actual es distinto del nuevo.
+
+    Args:
+        condiciones: Condiciones WHERE del UPDATE (ver Recluta.condiciones_filtro)
+        estado: Estado que se va a asignar
+    """
+    db.session.execute(
+        db.insert(ReclutaEstadoHistorial.__table__).from_select(
+            ['recluta_id', 'estado_anterior', 'estado', 'fecha', 'usuario_id'],
+            db.select(
+                Recluta.id, Recluta.estado, db.literal(estado),
+                db.literal(datetime.utcnow()), db.literal(_usuario_actual(), db.Integer)
+            ).where(*condiciones, Recluta.estado != estado)
+        )
+    )
+
+
+def reconstruir_historial():
+    """
+    Genera el historial de los reclutas creados antes de que existiera la tabla
+    (o insertados con INSERT masivos, como los del seeder).
+
+    No se conoce la historia real, así que se aproxima como lo hacía la
+    timeline: el recluta entra en ESTADO_INICIAL en su fecha de registro y,
+    si hoy está en otro estado, cambió a él en su última actualización. A los
+    reclutas que ya tienen cambios registrados pero no su alta se les agrega
+    el alta con el estado anterior a su primer cambio. Las filas generadas
+    quedan marcadas como reconstruidas y volver a ejecutarla no duplica nada.
+
+    El commit lo hace quien llama.
+
+    Returns:
+        int: Número de filas agregadas
+    """
+    H = ReclutaEstadoHistorial
+    ahora = datetime.utcnow()
+    columnas = ['recluta_id', 'estado_anterior', 'estado', 'fecha', 'reconstruido']
+
+    # 1. Reclutas sin historial que ya no están en el estado inicial: el cambio a su estado actual
+    cambios = db.session.execute(
+        db.insert(H.__table__).from_select(columnas, db.select(
+            Recluta.id, db.literal(ESTADO_INICIAL), Recluta.estado,
+            db.func.coalesce(Recluta.ultima_actualizacion, Recluta.fecha_registro, db.literal(ahora)),
+            db.literal(True)
+        ).where(
+            Recluta.estado != ESTADO_INICIAL,
+            ~db.exists().where(H.recluta_id == Recluta.id)
+        ))
+    ).rowcount
+
+    # 2. Alta de todos los reclutas que no la tienen, con el estado anterior a su primer cambio
+    primer_anterior = (
+        db.select(H.estado_anterior)
+        .where(H.recluta_id == Recluta.id)
+        .order_by(H.fecha, H.id)
+        .limit(1)
+        .scalar_subquery()
+    )
+    altas = db.session.execute(
+        db.insert(H.__table__).from_select(columnas, db.select(
+            Recluta.id, db.null(), db.func.coalesce(primer_anterior, Recluta.estado),
+            db.func.coalesce(Recluta.fecha_registro, db.literal(ahora)),
+            db.literal(True)
+        ).where(
+            ~db.exists().where(H.recluta_id == Recluta.id, H.estado_anterior.is_(None))
+        ))
+    ).rowcount
+
+    return cambios + altas
+
+
+def _cambios_aproximados(recluta):
+    """Historial aproximado de un recluta sin filas en la tabla (mismo criterio que reconstruir_historial)"""
+    cambios = [(None, ESTADO_INICIAL, recluta.fecha_registro)]
+    if recluta.estado != ESTADO_INICIAL:
+        cambios.append((ESTADO_INICIAL, recluta.estado, recluta.ultima_actualizacion))
+    return cambios
+
+
+def construir_timeline(recluta):
+    """
+    Construye la timeline pública de un recluta a partir de su historial de estados.
+
+    Cada etapa lleva la fecha en que el recluta entró en ella: el alta para
+    'recibida', la primera vez que pasó a revisión y el último cambio al
+    estado final. La etapa 'entrevista' toma la fecha de su última entrevista
+    completada.
+
+    Returns:
+        tuple: (etapa actual, lista de etapas con completed/active/date)
+    """
+    cambios = ReclutaEstadoHistorial.por_recluta(recluta.id) or _cambios_aproximados(recluta)
+    etapa_actual = ETAPAS_TIMELINE.get(recluta.estado, 'recibida')
+
+    fechas = {'recibida': cambios[0][2] or recluta.fecha_registro}
+    for _, estado, fecha in cambios:
+        etapa = ETAPAS_TIMELINE.get(estado)
+        if etapa == 'revision':
+            fechas.setdefault('revision', fecha)
+        elif etapa == 'finalizada' and estado == recluta.estado:
+            fechas['finalizada'] = fecha
+
+    fechas['entrevista'] = db.session.scalar(
+        db.select(db.func.max(Entrevista.fecha))
+        .where(Entrevista.recluta_id == recluta.id, Entrevista.estado == 'completada')
+    )
+
+    orden = [paso[0] for paso in PASOS_TIMELINE]
+    posicion = orden.index(etapa_actual)
+    items = []
+    for i, (etapa, titulo, descripcion) in enumerate(PASOS_TIMELINE):
+        fecha = fechas.get(etapa) if i <= posicion or etapa == 'entrevista' else None
+        items.append({
+            "id": etapa,
+            "title": titulo,
+            "description": descripcion,
+            "completed": i <= posicion,
+            "active": i == posicion,
+            "date": fecha.strftime('%d/%m/%Y') if fecha else None
+        })
+    return etapa_actual, items
+
+
+def _segundos_entre(inicio, fin):
+    """Expresión SQL con los segundos entre dos columnas de fecha y hora, según el motor"""
+    dialecto = db.session.get_bind().dialect.name
+    if dialecto == 'sqlite':
+        return (db.func.julianday(fin) - db.func.julianday(inicio)) * 86400
+    if dialecto == 'postgresql':
+        return db.extract('epoch', fin - inicio)
+    if dialecto in ('mysql', 'mariadb'):
+        return db.func.timestampdiff(db.text('SECOND'), inicio, fin)
+    raise ValueError(f"Motor de base de datos no soportado para tiempos por etapa: {dialecto}")
+
+
+def _dias(segundos):
+    """Convierte segundos en días con dos decimales"""
+    return round(float(segundos) / 86400, 2) if segundos is not None else None
+
+
+def tiempo_en_etapa(desde=None, hasta=None, asesor_id=None, ahora=None):
+    """
+    Tiempo que pasan los reclutas en cada estado, con una sola consulta agregada.
+
+    Cada fila del historial abre un tramo que termina con el siguiente cambio
+    del mismo recluta (LEAD sobre el índice recluta_id, fecha) o, si es el
+    estado actual, ahora. Se agregan los tramos que empezaron en el rango.
+
+    Args:
+        desde: Contar tramos iniciados desde esta fecha (opcional)
+        hasta: Contar tramos iniciados hasta esta fecha, incluida (opcional)
+        asesor_id: Limitar a los reclutas de este asesor (opcional)
+        ahora: Fin de los tramos abiertos (por defecto datetime.utcnow())
+
+    Returns:
+        list: Un diccionario por estado con tramos, en_curso y días promedio, mínimo y máximo
+    """
+    H = ReclutaEstadoHistorial
+    ahora = ahora or datetime.utcnow()
+
+    siguiente = db.func.lead(H.fecha).over(partition_by=H.recluta_id, order_by=(H.fecha, H.id))
+    tramos = db.select(H.estado, H.fecha.label('inicio'), siguiente.label('fin'))
+    if asesor_id:
+        tramos = tramos.join(Recluta, Recluta.id == H.recluta_id).where(Recluta.asesor_id == asesor_id)
+    tramos = tramos.subquery()
+
+    segundos = _segundos_entre(tramos.c.inicio, db.func.coalesce(tramos.c.fin, db.literal(ahora)))
+    consulta = (
+        db.select(
+            tramos.c.estado,
+            db.func.count().label('tramos'),
+            db.func.sum(db.case((tramos.c.fin.is_(None), 1), else_=0)).label('en_curso'),
+            db.func.avg(segundos).label('promedio'),
+            db.func.min(segundos).label('minimo'),
+            db.func.max(segundos).label('maximo')
+        )
+        .group_by(tramos.c.estado)
+        .order_by(tramos.c.estado)
+    )
+    if desde:
+        consulta = consulta.where(tramos.c.inicio >= datetime.combine(desde, time.min))
+    if hasta:
+        consulta = consulta.where(tramos.c.inicio < datetime.combine(hasta + timedelta(days=1), time.min))
+
+    return [
+        {
+            'estado': fila.estado,
+            'tramos': fila.tramos,
+            'en_curso': int(fila.en_curso or 0),
+            'promedio_dias': _dias(fila.promedio),
+            'minimo_dias': _dias(fila.minimo),
+            'maximo_dias': _dias(fila.maximo)
+        }
+        for fila in db.session.execute(consulta)
+    ]
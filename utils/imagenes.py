@@ -0,0 +1,212 @@
+import os
+from PIL import Image, ImageOps, features
+
+# Variantes generadas para cada foto: nombre -> (ancho, alto, recortar al tamaño exacto)
+VARIANTES = {
+    'thumb': (80, 80, True),
+    'medium': (400, 400, False)
+}
+
+# Extensiones que se tratan como imágenes al subir archivos
+EXTENSIONES_IMAGEN = {'jpg', 'jpeg', 'png', 'gif', 'webp'}
+
+# Formatos que pueden llevar EXIF/XMP y se limpian al subirlos (GIF no los usa)
+FORMATOS_CON_METADATOS = {'JPEG', 'PNG', 'WEBP'}
+CLAVES_XMP = ('xmp', 'XML:com.adobe.xmp')
+ORIENTACION_EXIF = 0x0112
+
+# Rutas de la API que entregan las fotos verificando permisos. Son relativas
+# a la raíz del sitio, como las rutas de static/uploads que se devolvían antes
+RUTAS_FOTO = {
+    'recluta': 'api/reclutas/{id}/foto',
+    'usuario': 'api/usuarios/{id}/foto'
+}
+
+# WebP si la instalación de Pillow lo soporta, JPEG en caso contrario
+if features.check('webp'):
+    FORMATO_VARIANTES, EXTENSION_VARIANTES = 'WEBP', 'webp'
+else:
+    FORMATO_VARIANTES, EXTENSION_VARIANTES = 'JPEG', 'jpg'
+
+
+def es_imagen(ruta):
+    """Indica si una ruta corresponde a un archivo de imagen por su extensión"""
+    return bool(ruta) and ruta.rsplit('.', 1)[-1].lower() in EXTENSIONES_IMAGEN
+
+
+def ruta_variante(ruta, nombre):
+    """
+    Calcula la ruta de una variante a partir de la ruta de la imagen original.
+
+    Funciona igual con rutas relativas (static/uploads/...) y absolutas.
+    """
+    base, _ = os.path.splitext(ruta)
+    return f"{base}_{nombre}.{EXTENSION_VARIANTES}"
+
+
+def rutas_variantes(ruta):
+    """
+    Retorna las rutas de todas las variantes de una imagen.
+
+    Args:
+        ruta: Ruta de la imagen original (relativa o absoluta)
+
+    Returns:
+        dict con {nombre_variante: ruta} o None si la ruta no es una imagen local
+    """
+    if not es_imagen(ruta) or ruta.startswith('http'):
+        return None
+    return {nombre: ruta_variante(ruta, nombre) for nombre in VARIANTES}
+
+
+def variantes_generadas(ruta, directorio_base):
+    """
+    Retorna las rutas de las variantes de una imagen sólo si ya están en disco.
+
+    Las variantes se generan en segundo plano después de la subida; hasta
+    que existen todas, los clientes deben usar la imagen original.
+
+    Args:
+        ruta: Ruta relativa de la imagen original
+        directorio_base: Directorio contra el que se resuelve la ruta relativa
+
+    Returns:
+        dict con {nombre_variante: ruta} o None si falta alguna variante
+    """
+    variantes = rutas_variantes(ruta)
+    if variantes and all(os.path.exists(os.path.join(directorio_base, r)) for r in variantes.values()):
+        return variantes
+    return None
+
+
+def urls_foto(tipo, id, ruta, directorio_base):
+    """
+    URLs de una foto subida y de sus variantes ya generadas, servidas por la API.
+
+    Los uploads no se sirven como archivos estáticos: la foto se pide a la
+    ruta del recluta o usuario, que verifica permisos. El parámetro v (el
+    inicio del hash del contenido) cambia con la foto, así que el navegador
+    puede guardarla en caché sin mostrar una anterior.
+
+    Args:
+        tipo: 'recluta' o 'usuario' (ver RUTAS_FOTO)
+        id: ID del recluta o usuario
+        ruta: Ruta relativa guardada en la BD (o URL externa)
+        directorio_base: Directorio contra el que se resuelve la ruta relativa
+
+    Returns:
+        tuple: (foto_url, foto_variantes); las URLs externas se devuelven tal cual y sin variantes
+    """
+    if not ruta or ruta.startswith('http'):
+        return ruta, None
+
+    base = RUTAS_FOTO[tipo].format(id=id)
+    version = os.path.splitext(os.path.basename(ruta))[0][:12]
+    variantes = variantes_generadas(ruta, directorio_base)
+    if variantes:
+        variantes = {nombre: f"{base}?variante={nombre}&v={version}" for nombre in variantes}
+    return f"{base}?v={version}", variantes
+
+
+def limpiar_metadatos(ruta):
+    """
+    Elimina de una imagen, en su lugar, los metadatos EXIF y XMP (ubicación GPS, cámara, fecha...).
+
+    La orientación EXIF se aplica a los píxeles antes de descartarla. Las
+    imágenes sin esos metadatos no se tocan, y los JPEG que no hace falta
+    rotar conservan sus tablas de cuantización para no perder calidad.
+
+    Args:
+        ruta: Ruta absoluta de la imagen
+
+    Returns:
+        bool: True si la imagen se reescribió
+    """
+    with Image.open(ruta) as original:
+        formato = 'JPEG' if original.format == 'MPO' else original.format
+        if formato not in FORMATOS_CON_METADATOS:
+            return False
+        exif = original.getexif()
+        if not exif and not any(clave in original.info for clave in CLAVES_XMP):
+            return False
+
+        opciones = {'exif': b'', 'xmp': b''}
+        if original.info.get('icc_profile'):
+            opciones['icc_profile'] = original.info['icc_profile']
+        if exif.get(ORIENTACION_EXIF, 1) != 1:
+            imagen = ImageOps.exif_transpose(original)
+            if formato != 'PNG':
+                opciones['quality'] = 95
+        else:
+            imagen = original
+            if formato == 'JPEG':
+                opciones['quality'] = 'keep'
+
+        temporal = f"{ruta}.limpia"
+        imagen.save(temporal, formato, **opciones)
+    os.replace(temporal, ruta)
+    return True
+
+
+def generar_variantes(ruta_original, forzar=False):
+    """
+    Genera las variantes redimensionadas de una imagen, sin metadatos EXIF.
+
+    No depende del contexto de Flask para poder ejecutarse en un pool de procesos.
+
+    Args:
+        ruta_original: Ruta absoluta de la imagen original
+        forzar: Regenerar aunque las variantes ya existan
+
+    Returns:
+        int: Número de variantes generadas
+    """
+    pendientes = {
+        nombre: ruta_variante(ruta_original, nombre)
+        for nombre in VARIANTES
+    }
+    if not forzar:
+        pendientes = {n: r for n, r in pendientes.items() if not os.path.exists(r)}
+    if not pendientes:
+        return 0
+
+    with Image.open(ruta_original) as original:
+        # Aplicar la orientación EXIF antes de descartar los metadatos
+        imagen = ImageOps.exif_transpose(original)
+        modo = 'RGBA' if FORMATO_VARIANTES == 'WEBP' and 'A' in imagen.getbands() else 'RGB'
+        imagen = imagen.convert(modo)
+
+    for nombre, destino in pendientes.items():
+        ancho, alto, recortar = VARIANTES[nombre]
+        if recortar:
+            variante = ImageOps.fit(imagen, (ancho, alto), Image.LANCZOS)
+        else:
+            variante = imagen.copy()
+            variante.thumbnail((ancho, alto), Image.LANCZOS)
+
+        # Escribir a un temporal y renombrar para no servir variantes a medio escribir
+        temporal = f"{destino}.tmp"
+        variante.save(temporal, FORMATO_VARIANTES, quality=82, exif=b'')
+        os.replace(temporal, destino)
+
+    return len(pendientes)
+
+
+def procesar_variantes(ruta_original, forzar=False):
+    """
+    Envoltura de generar_variantes para el backfill en paralelo.
+
+    Returns:
+        tuple: (ruta, variantes generadas, mensaje de error o None)
+    """
+    try:
+        return ruta_original, generar_variantes(ruta_original, forzar), None
+    except Exception as e:
+        return ruta_original, 0, str(e)
+
+
+def eliminar_variantes(ruta_original):
+    """Elimina del disco las variantes de una imagen, si existen"""
+    for ruta in (rutas_variantes(ruta_original) or {}).values():
+        if os.path.exists(ruta):
+            os.remove(ruta)
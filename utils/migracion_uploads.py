@@ -0,0 +1,200 @@
+"""
+Migración de los uploads existentes al esquema particionado por hash.
+
+Cada archivo se enlaza primero en su nueva ruta (ruta_contenido), luego se
+reescriben las referencias en la BD y sólo al final se borran los originales.
+Si la migración se interrumpe, las rutas antiguas y las nuevas siguen siendo
+válidas y basta con volver a ejecutarla.
+"""
+import os
+import uuid
+import shutil
+from datetime import datetime
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from sqlalchemy import bindparam
+from models import db
+from models.archivo import Archivo
+from utils.almacenamiento import ruta_contenido, es_ruta_contenido, calcular_sha256, PATRON_SHA256
+from utils.imagenes import rutas_variantes, ruta_variante, eliminar_variantes
+from utils.recolector import COLUMNAS_REFERENCIA, conciliar_referencias
+
+# Referencias reescritas por cada UPDATE en lote
+TAMANO_LOTE = 1000
+
+
+def _lotes(elementos, tamaño):
+    """Divide una lista en sublistas de como máximo `tamaño` elementos"""
+    for inicio in range(0, len(elementos), tamaño):
+        yield elementos[inicio:inicio + tamaño]
+
+
+def _subdirectorio(ruta):
+    """Deduce la categoría de un upload a partir de su ruta antigua"""
+    partes = ruta.replace('\\', '/').split('/')
+    if 'documentos' in partes:
+        return 'documentos'
+    return partes[2] if len(partes) > 3 else 'otros'
+
+
+def _enlazar(origen, destino):
+    """Crea `destino` como enlace duro de `origen` (o una copia si no es posible)"""
+    if os.path.exists(destino):
+        return
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    temporal = f"{destino}.{uuid.uuid4().hex}.tmp"
+    try:
+        os.link(origen, temporal)
+    except OSError:
+        shutil.copy2(origen, temporal)
+    os.replace(temporal, destino)
+
+
+def preparar_archivo(raiz_app, ruta):
+    """
+    Calcula el hash de un archivo y lo enlaza (con sus variantes) en la nueva ruta.
+
+    No depende del contexto de Flask para poder ejecutarse en un pool de hilos.
+
+    Args:
+        raiz_app: Directorio raíz de la aplicación
+        ruta: Ruta relativa actual del archivo
+
+    Returns:
+        tuple: (ruta, nueva ruta, sha256, tamaño, mensaje de error o None)
+    """
+    try:
+        origen = os.path.join(raiz_app, ruta)
+        base, extension = os.path.splitext(os.path.basename(ruta))
+        sha256 = base if PATRON_SHA256.fullmatch(base) else calcular_sha256(origen)
+        nueva = ruta_contenido(_subdirectorio(ruta), sha256, extension.lstrip('.').lower() or 'bin')
+        destino = os.path.join(raiz_app, nueva)
+
+        _enlazar(origen, destino)
+        for nombre, variante in (rutas_variantes(origen) or {}).items():
+            if os.path.exists(variante):
+                _enlazar(variante, ruta_variante(destino, nombre))
+
+        return ruta, nueva, sha256, os.path.getsize(destino), None
+    except Exception as e:
+        return ruta, None, None, None, str(e)
+
+
+def _eliminar_original(raiz_app, ruta):
+    """Borra un archivo ya migrado y sus variantes de la ruta antigua"""
+    origen = os.path.join(raiz_app, ruta)
+    eliminar_variantes(origen)
+    if os.path.exists(origen):
+        os.remove(origen)
+
+
+def _reescribir_referencias(cambios, lote):
+    """
+    Reescribe las rutas en cada columna de referencia.
+
+    Las columnas de ruta no tienen índice: en lugar de un UPDATE ... WHERE
+    ruta = :anterior por archivo (un recorrido completo de la tabla cada
+    uno), se leen una vez los pares (id, ruta) de cada tabla, se calculan
+    las rutas nuevas en Python y se actualiza por clave primaria en lotes
+    (executemany), con un commit por lote.
+
+    Returns:
+        int: Filas actualizadas
+    """
+    actualizadas = 0
+    for columna in COLUMNAS_REFERENCIA:
+        tabla = columna.class_.__table__
+        consulta = db.select(tabla.c.id, columna).where(columna.isnot(None)).execution_options(yield_per=lote)
+        parametros = [
+            {'fila_id': fila_id, 'anterior': ruta, 'nueva': cambios[ruta]}
+            for fila_id, ruta in db.session.execute(consulta)
+            if ruta in cambios
+        ]
+        # La condición sobre la ruta anterior evita pisar una ruta cambiada mientras tanto
+        sentencia = (
+            tabla.update()
+            .where(tabla.c.id == bindparam('fila_id'), tabla.c[columna.key] == bindparam('anterior'))
+            .values({columna.key: bindparam('nueva')})
+        )
+        for grupo in _lotes(parametros, lote):
+            actualizadas += db.session.execute(sentencia, grupo).rowcount
+            db.session.commit()
+    return actualizadas
+
+
+def _registrar_archivos(cambios, archivos, lote):
+    """
+    Sustituye los registros de Archivo de las rutas antiguas por los de las nuevas.
+
+    Los contadores se recalculan después con conciliar_referencias, incluidos
+    los de los registros recién creados.
+    """
+    anteriores = list(cambios)
+    for grupo in _lotes(anteriores, lote):
+        db.session.execute(db.delete(Archivo).where(Archivo.ruta.in_(grupo)))
+
+    nuevas = list(archivos)
+    for grupo in _lotes(nuevas, lote):
+        existentes = set(db.session.scalars(db.select(Archivo.ruta).where(Archivo.ruta.in_(grupo))))
+        filas = [
+            {'sha256': archivos[ruta][0], 'ruta': ruta, 'tamaño': archivos[ruta][1], 'referencias': 0}
+            for ruta in grupo if ruta not in existentes
+        ]
+        if filas:
+            db.session.execute(db.insert(Archivo), filas)
+
+    db.session.flush()
+    conciliar_referencias(datetime.utcnow())
+    db.session.commit()
+
+
+def migrar_uploads(workers=8, lote=TAMANO_LOTE, log=print):
+    """
+    Mueve los uploads con rutas antiguas (directorios planos o por recluta)
+    al esquema particionado por hash y actualiza sus referencias.
+
+    Args:
+        workers: Hilos para calcular hashes y enlazar archivos en paralelo
+        lote: Referencias reescritas por cada UPDATE
+        log: Función usada para el reporte
+
+    Returns:
+        dict con el resumen de la migración
+    """
+    raiz_app = current_app.root_path
+
+    rutas = set()
+    for columna in COLUMNAS_REFERENCIA + (Archivo.ruta,):
+        for ruta in db.session.scalars(db.select(columna).where(columna.isnot(None)).distinct()):
+            if ruta.startswith(os.path.join('static', 'uploads')) and not es_ruta_contenido(ruta):
+                rutas.add(ruta)
+
+    log(f"Archivos a migrar: {len(rutas)}")
+
+    cambios = {}
+    archivos = {}
+    errores = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for ruta, nueva, sha256, tamaño, error in executor.map(partial(preparar_archivo, raiz_app), sorted(rutas)):
+            if error:
+                errores += 1
+                log(f"Error en {ruta}: {error}")
+                continue
+            cambios[ruta] = nueva
+            archivos[nueva] = (sha256, tamaño)
+
+    actualizadas = _reescribir_referencias(cambios, lote)
+    _registrar_archivos(cambios, archivos, lote)
+    log(f"Referencias actualizadas: {actualizadas}")
+
+    # Las referencias ya apuntan a las rutas nuevas: se pueden borrar los originales
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(partial(_eliminar_original, raiz_app), cambios))
+
+    return {
+        'migrados': len(cambios),
+        'contenidos_distintos': len(archivos),
+        'referencias_actualizadas': actualizadas,
+        'errores': errores
+    }
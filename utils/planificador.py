@@ -0,0 +1,314 @@
+"""
+Programación masiva de entrevistas (rondas de ferias de empleo).
+
+La asignación es voraz con una cola de prioridad de asesores ordenada por su
+siguiente horario libre: siempre se llena el hueco más temprano disponible
+entre todos los asesores, lo que reparte la carga y termina la ronda lo antes
+posible. Cada recluta se entrevista con su asesor; los que no tienen asesor
+se asignan al que quede libre antes.
+
+Las entrevistas existentes (de los asesores y de las salas) se respetan con
+los mismos índices de intervalos que la detección de conflictos, y todas las
+entrevistas nuevas se insertan en una sola transacción.
+"""
+import heapq
+from collections import defaultdict, deque
+from datetime import datetime, timedelta
+from models import db
+from models.entrevista import Entrevista
+from models.recluta import Recluta
+from utils.tareas import tarea, reportar_progreso
+from utils.agenda import (IndiceIntervalos, minutos, horario_laboral, normalizar_ubicacion,
+                          DURACION_POR_DEFECTO, ESTADO_ACTIVO)
+
+# Cada cuántas entrevistas asignadas se reporta el avance
+INTERVALO_PROGRESO = 500
+
+# Porcentaje del avance que corresponde a la asignación (el resto es la inserción)
+PROGRESO_ASIGNACION = 90
+
+
+def generar_horarios(dias, duracion, horario, ahora=None):
+    """
+    Lista ordenada de horarios (fecha, minuto de inicio) de duración fija
+    dentro del horario laboral de cada día.
+
+    Args:
+        dias: Fechas a cubrir, en orden
+        duracion: Duración de cada entrevista en minutos
+        horario: Función fecha -> bloques (inicio, fin) en minutos
+        ahora: Los horarios anteriores a este momento se descartan
+    """
+    horarios = []
+    for dia in dias:
+        for inicio, fin in horario(dia):
+            for minuto in range(inicio, fin - duracion + 1, duracion):
+                if ahora is None or datetime.combine(dia, datetime.min.time()) + timedelta(minutes=minuto) >= ahora:
+                    horarios.append((dia, minuto))
+    return horarios
+
+
+def asignar_horarios(reclutas, asesores, horarios, duracion, salas=(), ocupados=None, progreso=None):
+    """
+    Asigna a cada recluta un horario con su asesor (y una sala, si se indican).
+
+    Args:
+        reclutas: Lista de (recluta_id, asesor_id o None) en orden de prioridad
+        asesores: IDs de asesores disponibles (también reciben a los reclutas sin asesor)
+        horarios: Lista ordenada de (fecha, minuto de inicio), ver generar_horarios
+        duracion: Duración de cada entrevista en minutos
+        salas: Salas disponibles; si está vacío no se asigna sala
+        ocupados: dict {(recurso, valor, fecha): IndiceIntervalos} con lo ya
+            programado, donde recurso es 'asesor' o 'ubicacion'
+        progreso: Función opcional llamada con el número de asignaciones hechas
+
+    Returns:
+        tuple: (asignaciones [{recluta_id, asesor_id, fecha, inicio, sala}], IDs sin horario)
+    """
+    ocupados = ocupados or {}
+    vacio = IndiceIntervalos()
+
+    def libre(recurso, valor, fecha, inicio):
+        return not ocupados.get((recurso, valor, fecha), vacio).solapados(inicio, inicio + duracion)
+
+    # Reclutas con asesor propio, por asesor; los demás, en un fondo común
+    propios = defaultdict(deque)
+    sin_asesor = deque()
+    disponibles = set(asesores)
+    sin_horario = []
+    for recluta_id, asesor_id in reclutas:
+        if asesor_id is None:
+            sin_asesor.append(recluta_id)
+        elif asesor_id in disponibles:
+            propios[asesor_id].append(recluta_id)
+        else:
+            sin_horario.append(recluta_id)
+
+    # Salas ya tomadas por esta ronda en cada horario
+    salas_usadas = defaultdict(set)
+
+    # Cola de prioridad: (índice del siguiente horario a probar, asesor)
+    cola = [(0, asesor_id) for asesor_id in sorted(disponibles)]
+    heapq.heapify(cola)
+
+    asignaciones = []
+    while cola and (sin_asesor or any(propios.values())):
+        indice, asesor_id = heapq.heappop(cola)
+        if not propios[asesor_id] and not sin_asesor:
+            continue  # Este asesor ya no tiene a quién entrevistar
+
+        # Avanzar hasta un horario en que el asesor y alguna sala estén libres
+        sala = None
+        while indice < len(horarios):
+            fecha, inicio = horarios[indice]
+            if libre('asesor', asesor_id, fecha, inicio):
+                if not salas:
+                    break
+                usadas = salas_usadas[(fecha, inicio)]
+                sala = next((s for s in salas if s not in usadas
+                             and libre('ubicacion', normalizar_ubicacion('presencial', s), fecha, inicio)), None)
+                if sala is not None:
+                    break
+            indice += 1
+        if indice >= len(horarios):
+            continue  # Sin horarios libres para este asesor
+
+        recluta_id = propios[asesor_id].popleft() if propios[asesor_id] else sin_asesor.popleft()
+        fecha, inicio = horarios[indice]
+        if sala is not None:
+            salas_usadas[(fecha, inicio)].add(sala)
+        asignaciones.append({
+            'recluta_id': recluta_id,
+            'asesor_id': asesor_id,
+            'fecha': fecha,
+            'inicio': inicio,
+            'sala': sala
+        })
+        if progreso and len(asignaciones) % INTERVALO_PROGRESO == 0:
+            progreso(len(asignaciones))
+
+        heapq.heappush(cola, (indice + 1, asesor_id))
+
+    sin_horario.extend(sin_asesor)
+    for pendientes in propios.values():
+        sin_horario.extend(pendientes)
+    return asignaciones, sin_horario
+
+
+def _cargar_ocupados(desde, hasta, asesores, salas):
+    """Entrevistas pendientes del rango que ocupan a los asesores o salas de la ronda"""
+    salas_normalizadas = {normalizar_ubicacion('presencial', s) for s in salas}
+    consulta = (
+        db.select(Entrevista.fecha, Entrevista.hora, Entrevista.duracion, Entrevista.tipo,
+                  Entrevista.ubicacion, Recluta.asesor_id)
+        .join(Recluta, Recluta.id == Entrevista.recluta_id)
+        .where(Entrevista.estado == ESTADO_ACTIVO, Entrevista.fecha >= desde, Entrevista.fecha <= hasta)
+    )
+
+    ocupados = defaultdict(IndiceIntervalos)
+    for fecha, hora, duracion, tipo, ubicacion, asesor_id in db.session.execute(consulta):
+        inicio = minutos(hora)
+        fin = inicio + (duracion or DURACION_POR_DEFECTO)
+        if asesor_id in asesores:
+            ocupados[('asesor', asesor_id, fecha)].agregar(inicio, fin, None)
+        sala = normalizar_ubicacion(tipo, ubicacion)
+        if sala in salas_normalizadas:
+            ocupados[('ubicacion', sala, fecha)].agregar(inicio, fin, None)
+    return ocupados
+
+
+def programar_ronda(recluta_ids, desde, hasta, duracion, asesor_ids=None, salas=None,
+                    tipo='presencial', ahora=None):
+    """
+    Programa una entrevista para cada recluta dentro del rango de fechas.
+
+    Se omiten los reclutas que ya tienen una entrevista pendiente en el rango,
+    así que repetir la ronda (ej. al recuperar la tarea) no duplica entrevistas.
+
+    Args:
+        recluta_ids: Reclutas a entrevistar, en orden de prioridad
+        desde: Primer día (incluido)
+        hasta: Último día (incluido)
+        duracion: Minutos por entrevista
+        asesor_ids: Asesores disponibles (por defecto, los asesores de los reclutas)
+        salas: Ubicaciones disponibles (opcional)
+        tipo: Tipo de las entrevistas creadas
+        ahora: Momento actual (no se programan horarios pasados)
+
+    Returns:
+        dict: Resumen de la ronda
+    """
+    salas = [s.strip() for s in (salas or []) if s and s.strip()]
+    reportar_progreso(0)
+
+    filas = db.session.execute(
+        db.select(Recluta.id, Recluta.asesor_id).where(Recluta.id.in_(recluta_ids))
+    ).all()
+    encontrados = {recluta_id: asesor_id for recluta_id, asesor_id in filas}
+
+    ya_programados = set(db.session.scalars(
+        db.select(Entrevista.recluta_id).where(
+            Entrevista.recluta_id.in_(list(encontrados)),
+            Entrevista.estado == ESTADO_ACTIVO,
+            Entrevista.fecha >= desde,
+            Entrevista.fecha <= hasta
+        )
+    ))
+
+    reclutas = [(rid, encontrados[rid]) for rid in dict.fromkeys(recluta_ids)
+                if rid in encontrados and rid not in ya_programados]
+    if asesor_ids is None:
+        asesor_ids = sorted({asesor_id for _, asesor_id in reclutas if asesor_id is not None})
+
+    dias = [desde + timedelta(days=i) for i in range((hasta - desde).days + 1)]
+    horarios = generar_horarios(dias, duracion, horario_laboral, ahora or datetime.now())
+    ocupados = _cargar_ocupados(desde, hasta, set(asesor_ids), salas)
+
+    total = max(len(reclutas), 1)
+    asignaciones, sin_horario = asignar_horarios(
+        reclutas, asesor_ids, horarios, duracion, salas, ocupados,
+        progreso=lambda n: reportar_progreso(n * PROGRESO_ASIGNACION // total)
+    )
+    reportar_progreso(PROGRESO_ASIGNACION)
+
+    # Inserción de todas las entrevistas y asignación de asesores en una sola transacción
+    ahora_utc = datetime.utcnow()
+    try:
+        if asignaciones:
+            db.session.execute(db.insert(Entrevista), [{
+                'recluta_id': a['recluta_id'],
+                'fecha': a['fecha'],
+                'hora': f"{a['inicio'] // 60:02d}:{a['inicio'] % 60:02d}",
+                'duracion': duracion,
+                'tipo': tipo,
+                'ubicacion': a['sala'],
+                'estado': ESTADO_ACTIVO,
+                'fecha_creacion': ahora_utc,
+                'ultima_actualizacion': ahora_utc
+            } for a in asignaciones])
+
+        # Los reclutas sin asesor quedan asignados a quien los entrevista (UPDATE por clave primaria)
+        nuevos_asesores = [
+            {'id': a['recluta_id'], 'asesor_id': a['asesor_id'], 'ultima_actualizacion': ahora_utc}
+            for a in asignaciones if encontrados[a['recluta_id']] is None
+        ]
+        if nuevos_asesores:
+            db.session.execute(db.update(Recluta), nuevos_asesores)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return {
+        'programadas': len(asignaciones),
+        'asesores_asignados': len(nuevos_asesores),
+        'ya_programados': sorted(ya_programados),
+        'no_encontrados': sorted(set(recluta_ids) - set(encontrados)),
+        'sin_horario': sin_horario,
+        'primera': min((a['fecha'] for a in asignaciones), default=None),
+        'ultima': max((a['fecha'] for a in asignaciones), default=None)
+    }
+
+
+@tarea('programar_entrevistas')
+def programar_entrevistas(recluta_ids, desde, hasta, duracion, asesor_ids=None, salas=None, tipo='presencial'):
+    """Manejador en segundo plano de la programación masiva (fechas en ISO)"""
+    resultado = programar_ronda(
+        recluta_ids,
+        datetime.strptime(desde, '%Y-%m-%d').date(),
+        datetime.strptime(hasta, '%Y-%m-%d').date(),
+        duracion,
+        asesor_ids=asesor_ids,
+        salas=salas,
+        tipo=tipo
+    )
+    for clave in ('primera', 'ultima'):
+        if resultado[clave]:
+            resultado[clave] = resultado[clave].isoformat()
+    return resultado
+
+
+def benchmark(candidatos=10000, asesores=50, salas=50, dias=20, duracion=30, semilla=42):
+    """
+    Mide la asignación en memoria con datos sintéticos (sin base de datos).
+
+    Un 80% de los candidatos llega con asesor y el resto sin él; cada asesor
+    tiene algunas entrevistas ya programadas que hay que respetar.
+
+    Returns:
+        dict: Tiempos y resultados de la asignación
+    """
+    import random
+    import time
+
+    rng = random.Random(semilla)
+    asesor_ids = list(range(1, asesores + 1))
+    nombres_salas = [f"Sala {i}" for i in range(1, salas + 1)]
+    reclutas = [(i, rng.choice(asesor_ids) if rng.random() < 0.8 else None) for i in range(1, candidatos + 1)]
+
+    inicio_rango = datetime(2030, 1, 7).date()  # Lunes
+    lista_dias = [inicio_rango + timedelta(days=i) for i in range(dias)]
+    horario = lambda dia: [(540, 840), (900, 1080)] if dia.weekday() < 5 else []
+
+    ocupados = defaultdict(IndiceIntervalos)
+    for asesor_id in asesor_ids:
+        for _ in range(dias):
+            dia = rng.choice(lista_dias)
+            inicio = rng.randrange(540, 1020, 15)
+            ocupados[('asesor', asesor_id, dia)].agregar(inicio, inicio + 60, None)
+
+    t0 = time.perf_counter()
+    horarios = generar_horarios(lista_dias, duracion, horario)
+    t1 = time.perf_counter()
+    asignaciones, sin_horario = asignar_horarios(reclutas, asesor_ids, horarios, duracion, nombres_salas, ocupados)
+    t2 = time.perf_counter()
+
+    return {
+        'candidatos': candidatos,
+        'horarios': len(horarios),
+        'programadas': len(asignaciones),
+        'sin_horario': len(sin_horario),
+        'segundos_horarios': round(t1 - t0, 4),
+        'segundos_asignacion': round(t2 - t1, 4),
+        'asignaciones_por_segundo': int(len(asignaciones) / (t2 - t1)) if t2 > t1 else None
+    }
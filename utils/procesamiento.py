@@ -0,0 +1,73 @@
+"""
+Manejadores de tareas en segundo plano para los archivos subidos.
+
+Se ejecutan después de responder al cliente: re-codificación de imágenes,
+extracción de metadatos de documentos y eliminación de archivos reemplazados.
+"""
+import os
+import re
+import mmap
+from models import db
+from models.documento import Documento
+from utils.tareas import tarea, completar_tarea
+from utils.almacenamiento import ruta_absoluta, purgar_archivo
+from utils.helpers import eliminar_archivo
+from utils.imagenes import generar_variantes
+
+# Objetos de página en un PDF (excluye el nodo /Pages del árbol)
+PATRON_PAGINA_PDF = re.compile(rb'/Type\s*/Page(?!s)')
+
+
+@tarea('procesar_imagen')
+def procesar_imagen(ruta):
+    """Genera las variantes redimensionadas de una foto subida"""
+    return {'variantes': generar_variantes(ruta_absoluta(ruta))}
+
+
+@tarea('procesar_documento')
+def procesar_documento(documento_id):
+    """Valida un PDF subido, extrae sus metadatos y marca el documento como listo"""
+    documento = Documento.query.get(documento_id)
+    if documento is None:
+        return {'omitido': True}
+
+    ruta = ruta_absoluta(documento.url)
+    try:
+        with open(ruta, 'rb') as f:
+            if f.read(5) != b'%PDF-':
+                documento.estado = 'error'
+                db.session.commit()
+                return {'valido': False}
+
+            # El archivo se recorre mapeado en memoria, sin cargarlo entero
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as contenido:
+                paginas = sum(1 for _ in PATRON_PAGINA_PDF.finditer(contenido))
+    except FileNotFoundError:
+        documento.estado = 'error'
+        db.session.commit()
+        return {'valido': False, 'error': 'Archivo no encontrado'}
+
+    documento.tamaño = os.path.getsize(ruta)
+    documento.paginas = paginas or None
+    documento.estado = 'listo'
+    db.session.commit()
+    return {'valido': True, 'paginas': documento.paginas}
+
+
+@tarea('eliminar_archivos')
+def eliminar_archivos(rutas):
+    """
+    Libera la referencia a cada archivo y, tras el commit, borra del disco los que ya no se usan.
+
+    La tarea se marca como completada en la misma transacción que resta las
+    referencias: si el proceso muere antes del commit no se restó nada, y
+    después ya no se vuelve a ejecutar al recuperar las tareas interrumpidas.
+    """
+    if not completar_tarea():
+        # Otro proceso la recuperó y la está ejecutando: no restar dos veces
+        db.session.rollback()
+        return {'omitido': True}
+    sin_referencias = [ruta for ruta in rutas if eliminar_archivo(ruta)]
+    db.session.commit()
+    eliminados = sum(1 for ruta in sin_referencias if purgar_archivo(ruta))
+    return {'eliminados': eliminados}
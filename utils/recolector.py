@@ -0,0 +1,265 @@
+"""
+Recolector de archivos huérfanos en el directorio de uploads.
+
+Un archivo es huérfano cuando ninguna fila lo referencia (Recluta.foto_url,
+Usuario.foto_url, Documento.url o una carga por fragmentos activa). Ocurre, por
+ejemplo, cuando el archivo se guarda pero el commit posterior falla.
+"""
+import os
+import json
+import shutil
+import time
+from datetime import datetime, timedelta
+from flask import current_app
+from models import db
+from models.archivo import Archivo
+from models.recluta import Recluta
+from models.usuario import Usuario
+from models.documento import Documento
+from models.carga_documento import CargaDocumento
+from models.tarea import Tarea
+from utils.almacenamiento import directorio_uploads, ruta_absoluta, ruta_carga
+from utils.imagenes import rutas_variantes
+
+# Subdirectorio (dentro de uploads) al que se mueven los huérfanos en cuarentena
+DIRECTORIO_CUARENTENA = '.cuarentena'
+
+# Columnas que guardan referencias a archivos subidos
+COLUMNAS_REFERENCIA = (Recluta.foto_url, Usuario.foto_url, Documento.url)
+
+# Filas leídas por viaje a la BD al reunir las referencias
+TAMANO_LOTE = 10000
+
+# Registros de Archivo bloqueados y corregidos por transacción al conciliar
+LOTE_CONCILIACION = 500
+
+
+def recorrer_archivos(directorio, excluir=()):
+    """
+    Recorre un árbol de directorios en streaming con os.scandir.
+
+    Args:
+        directorio: Directorio raíz
+        excluir: Nombres de subdirectorios de primer nivel a omitir
+
+    Yields:
+        os.DirEntry de cada archivo regular
+    """
+    pendientes = [directorio]
+    while pendientes:
+        actual = pendientes.pop()
+        try:
+            with os.scandir(actual) as entradas:
+                for entrada in entradas:
+                    if entrada.is_dir(follow_symlinks=False):
+                        if not (actual == directorio and entrada.name in excluir):
+                            pendientes.append(entrada.path)
+                    elif entrada.is_file(follow_symlinks=False):
+                        yield entrada
+        except FileNotFoundError:
+            continue
+
+
+def _rutas_referenciadas():
+    """
+    Reúne en un conjunto las rutas absolutas referenciadas desde la BD.
+
+    Se hace una sola lectura por columna, por lotes, para que comprobar cada
+    archivo del disco sea una búsqueda en memoria y no una consulta.
+    """
+    referenciadas = set()
+    for columna in COLUMNAS_REFERENCIA:
+        consulta = db.select(columna).where(columna.isnot(None)).execution_options(yield_per=TAMANO_LOTE)
+        for ruta in db.session.scalars(consulta):
+            referenciadas.add(os.path.normpath(ruta_absoluta(ruta)))
+            for variante in (rutas_variantes(ruta) or {}).values():
+                referenciadas.add(os.path.normpath(ruta_absoluta(variante)))
+
+    for carga_id in db.session.scalars(db.select(CargaDocumento.id)):
+        referenciadas.add(os.path.normpath(ruta_carga(carga_id)))
+
+    return referenciadas
+
+
+def _eliminar_cargas_abandonadas(limite):
+    """Elimina las cargas por fragmentos sin actividad desde antes del límite"""
+    return db.session.execute(
+        db.delete(CargaDocumento).where(CargaDocumento.ultima_actividad < limite)
+    ).rowcount
+
+
+def _contar_referencias(rutas=None):
+    """
+    Cuenta las filas que apuntan a cada ruta, con un GROUP BY por columna.
+
+    Las eliminaciones encoladas que aún no se ejecutan siguen contando como
+    referencia: la tarea la liberará al ejecutarse.
+
+    Args:
+        rutas: Limitar el conteo a estas rutas (por defecto, todas)
+
+    Returns:
+        dict: Ruta relativa -> número de referencias
+    """
+    conteos = {}
+    for columna in COLUMNAS_REFERENCIA:
+        consulta = db.select(columna, db.func.count()).where(columna.isnot(None)).group_by(columna)
+        if rutas is not None:
+            consulta = consulta.where(columna.in_(list(rutas)))
+        for ruta, cantidad in db.session.execute(consulta):
+            conteos[ruta] = conteos.get(ruta, 0) + cantidad
+
+    pendientes = db.select(Tarea.parametros).where(
+        Tarea.tipo == 'eliminar_archivos',
+        Tarea.estado.in_(['pendiente', 'en_proceso'])
+    )
+    for parametros in db.session.scalars(pendientes):
+        for ruta in json.loads(parametros or '{}').get('rutas', []):
+            if rutas is None or ruta in rutas:
+                conteos[ruta] = conteos.get(ruta, 0) + 1
+
+    return conteos
+
+
+def conciliar_referencias(limite):
+    """
+    Recalcula los contadores de referencias de Archivo a partir de las filas
+    que realmente apuntan a cada ruta.
+
+    Una primera pasada sin bloqueos sólo elige candidatos: entre el conteo y
+    la lectura de Archivo puede confirmarse una subida o una eliminación.
+    Cada lote de candidatos se bloquea con un UPDATE, se vuelve a contar y se
+    corrige con una diferencia (referencias = referencias + n) en la misma
+    transacción; las subidas y liberaciones de esas rutas esperan al commit.
+
+    Sólo se revisan los registros creados antes del límite: los de una
+    subida aún sin confirmar no se tocan.
+
+    Hace un commit por lote.
+
+    Args:
+        limite: Fecha de creación (UTC) a partir de la cual se omiten los registros
+
+    Returns:
+        int: Número de registros corregidos o eliminados
+    """
+    conteos = _contar_referencias()
+    consulta = db.select(Archivo.id, Archivo.ruta, Archivo.referencias).where(Archivo.fecha_creacion < limite)
+    candidatos = [
+        archivo_id for archivo_id, ruta, referencias in db.session.execute(consulta)
+        if conteos.get(ruta, 0) != referencias
+    ]
+
+    corregidos = 0
+    for inicio in range(0, len(candidatos), LOTE_CONCILIACION):
+        grupo = candidatos[inicio:inicio + LOTE_CONCILIACION]
+        # UPDATE sin cambios: sólo bloquea las filas hasta el commit
+        db.session.execute(
+            db.update(Archivo)
+            .where(Archivo.id.in_(grupo))
+            .values(referencias=Archivo.referencias)
+            .execution_options(synchronize_session=False)
+        )
+        filas = db.session.execute(
+            db.select(Archivo.id, Archivo.ruta, Archivo.referencias).where(Archivo.id.in_(grupo))
+        ).all()
+        reales = _contar_referencias({ruta for _, ruta, _ in filas})
+
+        sin_uso = []
+        for archivo_id, ruta, referencias in filas:
+            diferencia = reales.get(ruta, 0) - referencias
+            if not diferencia:
+                continue
+            corregidos += 1
+            if not reales.get(ruta):
+                sin_uso.append(archivo_id)
+                continue
+            db.session.execute(
+                db.update(Archivo)
+                .where(Archivo.id == archivo_id)
+                .values(referencias=Archivo.referencias + diferencia)
+                .execution_options(synchronize_session=False)
+            )
+        if sin_uso:
+            db.session.execute(
+                db.delete(Archivo)
+                .where(Archivo.id.in_(sin_uso), Archivo.fecha_creacion < limite)
+                .execution_options(synchronize_session=False)
+            )
+        db.session.commit()
+
+    return corregidos
+
+
+def recolectar_huerfanos(gracia_horas=24, dry_run=False, cuarentena=False, log=print):
+    """
+    Busca archivos huérfanos en uploads y los elimina o los pone en cuarentena.
+
+    Sólo se consideran huérfanos los archivos modificados hace más de
+    gracia_horas, para no tocar uploads cuya transacción sigue en curso.
+
+    Args:
+        gracia_horas: Antigüedad mínima (en horas) de un archivo para recolectarlo
+        dry_run: Si es True sólo reporta, sin modificar nada
+        cuarentena: Mover los huérfanos a uploads/.cuarentena en lugar de borrarlos
+        log: Función usada para el reporte
+
+    Returns:
+        dict con el resumen de la recolección
+    """
+    raiz = directorio_uploads()
+    limite = datetime.utcnow() - timedelta(hours=gracia_horas)
+    limite_mtime = time.time() - gracia_horas * 3600
+    destino_cuarentena = os.path.join(raiz, DIRECTORIO_CUARENTENA, datetime.utcnow().strftime('%Y%m%d%H%M%S'))
+
+    resumen = {'revisados': 0, 'huerfanos': 0, 'bytes': 0, 'cargas_abandonadas': 0, 'referencias_corregidas': 0}
+
+    if not dry_run:
+        resumen['cargas_abandonadas'] = _eliminar_cargas_abandonadas(limite)
+        db.session.commit()
+
+    referenciadas = _rutas_referenciadas()
+
+    for entrada in recorrer_archivos(raiz, excluir=(DIRECTORIO_CUARENTENA,)):
+        resumen['revisados'] += 1
+        if os.path.normpath(entrada.path) in referenciadas:
+            continue
+
+        estado = entrada.stat(follow_symlinks=False)
+        if estado.st_mtime > limite_mtime:
+            continue
+
+        resumen['huerfanos'] += 1
+        resumen['bytes'] += estado.st_size
+        relativa = os.path.relpath(entrada.path, raiz)
+        if dry_run:
+            log(f"[dry-run] Huérfano: {relativa} ({estado.st_size} bytes)")
+            continue
+
+        try:
+            if cuarentena:
+                destino = os.path.join(destino_cuarentena, relativa)
+                os.makedirs(os.path.dirname(destino), exist_ok=True)
+                shutil.move(entrada.path, destino)
+            else:
+                os.remove(entrada.path)
+        except FileNotFoundError:
+            # Otro proceso ya lo recolectó
+            pass
+
+    if not dry_run:
+        resumen['referencias_corregidas'] = conciliar_referencias(limite)
+
+    accion = 'encontrados' if dry_run else ('en cuarentena' if cuarentena else 'eliminados')
+    log(f"Archivos revisados: {resumen['revisados']}. Huérfanos {accion}: {resumen['huerfanos']} "
+        f"({resumen['bytes'] / (1024*1024):.1f}MB)")
+    return resumen
+
+
+def recolectar_programado():
+    """Ejecución periódica del recolector con la configuración de la aplicación"""
+    return recolectar_huerfanos(
+        gracia_horas=current_app.config['UPLOADS_GC_GRACIA_HORAS'],
+        cuarentena=current_app.config['UPLOADS_GC_CUARENTENA'],
+        log=current_app.logger.info
+    )
@@ -0,0 +1,510 @@
+"""
+Recordatorios de entrevistas mediante una bandeja de salida (outbox).
+
+El proceso tiene dos fases independientes:
+
+1. generar_recordatorios() busca las entrevistas pendientes de las próximas
+   horas (índice fecha/hora/estado) y escribe un mensaje por destinatario en
+   la tabla mensaje_saliente, en lotes. Cada mensaje tiene una clave única
+   derivada de la entrevista, su fecha/hora y el destinatario, así que
+   volver a generar (o hacerlo desde varios workers a la vez) no duplica
+   mensajes. Si la entrevista se reprograma, la clave cambia y se genera
+   un recordatorio nuevo.
+
+2. enviar_pendientes() reclama un lote de mensajes con un UPDATE condicional
+   que marca cada fila con un token propio; sólo el worker cuyo token quedó
+   escrito los envía, y cada envío se confirma con otro UPDATE filtrado por
+   ese token. Un mensaje cuyo worker murió a mitad del envío se vuelve a
+   reclamar pasado MENSAJES_TIMEOUT_RECLAMO (mientras le queden intentos).
+   Para ese caso límite el Message-ID se deriva de la clave, de modo que el
+   servidor de correo puede descartar el duplicado. Antes de enviar, cada
+   recordatorio se compara con su entrevista: si ya no existe, no está
+   pendiente o se reprogramó, el mensaje se descarta.
+
+El transporte es intercambiable (MENSAJES_DESPACHADOR): 'log', 'archivo'
+(ficheros .eml, útil en pruebas) o 'smtp' (un servidor real o uno local de
+depuración, ej. `python -m aiosmtpd -n -l localhost:1025`).
+"""
+import os
+import re
+import uuid
+import hashlib
+import smtplib
+from abc import ABC, abstractmethod
+from contextlib import ExitStack
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+from models import db
+from models.entrevista import Entrevista
+from models.recluta import Recluta
+from models.usuario import Usuario
+from models.mensaje_saliente import MensajeSaliente
+from utils.agenda import minutos
+
+# Despachadores registrados: nombre -> clase
+_despachadores = {}
+
+# Clave de un recordatorio: recordatorio:<entrevista_id>:<inicio>:<rol> (ver _mensajes_entrevista)
+PATRON_CLAVE_RECORDATORIO = re.compile(r'^recordatorio:\d+:(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}):')
+
+
+def despachador(nombre):
+    """Decorador que registra una clase de despachador con un nombre de configuración"""
+    def decorador(cls):
+        _despachadores[nombre] = cls
+        return cls
+    return decorador
+
+
+def _datos_entrevistas(desde, hasta):
+    """
+    Entrevistas pendientes entre dos instantes, con los datos del recluta y su asesor.
+
+    El filtro por fecha usa el índice; la hora se compara en Python porque
+    se guarda como texto y no siempre con dos dígitos.
+    """
+    consulta = (
+        db.select(
+            Entrevista.id, Entrevista.fecha, Entrevista.hora, Entrevista.tipo, Entrevista.ubicacion,
+            Recluta.nombre.label('recluta_nombre'), Recluta.email.label('recluta_email'),
+            Usuario.nombre.label('asesor_nombre'), Usuario.email.label('asesor_email')
+        )
+        .join(Recluta, Recluta.id == Entrevista.recluta_id)
+        .outerjoin(Usuario, Usuario.id == Recluta.asesor_id)
+        .where(
+            Entrevista.fecha >= desde.date(),
+            Entrevista.fecha <= hasta.date(),
+            Entrevista.estado == 'pendiente'
+        )
+        .order_by(Entrevista.fecha, Entrevista.hora)
+    )
+    for fila in db.session.execute(consulta).all():
+        try:
+            inicio = datetime.combine(fila.fecha, datetime.min.time()) + timedelta(minutes=minutos(fila.hora))
+        except ValueError:
+            continue
+        if desde <= inicio <= hasta:
+            yield fila, inicio
+
+
+def _mensajes_entrevista(fila, inicio):
+    """Mensajes de recordatorio (recluta y asesor) de una entrevista"""
+    cuando = inicio.strftime('%d/%m/%Y a las %H:%M')
+    lugar = fila.ubicacion or 'por confirmar'
+    clave = f"recordatorio:{fila.id}:{inicio:%Y-%m-%dT%H:%M}"
+
+    mensajes = []
+    if fila.recluta_email:
+        mensajes.append({
+            'clave': f"{clave}:recluta",
+            'destinatario': fila.recluta_email,
+            'asunto': f"Recordatorio: entrevista el {cuando}",
+            'cuerpo': (f"Hola {fila.recluta_nombre},\n\n"
+                       f"Te recordamos tu entrevista ({fila.tipo or 'presencial'}) el {cuando}.\n"
+                       f"Ubicación: {lugar}\n"),
+        })
+    if fila.asesor_email:
+        mensajes.append({
+            'clave': f"{clave}:asesor",
+            'destinatario': fila.asesor_email,
+            'asunto': f"Entrevista con {fila.recluta_nombre} el {cuando}",
+            'cuerpo': (f"Hola {fila.asesor_nombre or ''},\n\n"
+                       f"Tienes una entrevista ({fila.tipo or 'presencial'}) con {fila.recluta_nombre} el {cuando}.\n"
+                       f"Ubicación: {lugar}\n"),
+        })
+    for mensaje in mensajes:
+        mensaje.update(tipo='recordatorio', entrevista_id=fila.id, estado='pendiente',
+                       intentos=0, fecha_creacion=datetime.utcnow())
+    return mensajes
+
+
+def _insertar_sin_duplicados(filas):
+    """
+    Inserta los mensajes cuya clave aún no existe.
+
+    En SQLite y PostgreSQL se usa INSERT ... ON CONFLICT DO NOTHING; en otros
+    motores se filtran las claves existentes y, si otro worker gana la carrera,
+    se reintenta fila a fila con savepoints.
+
+    Returns:
+        int: Número de mensajes insertados
+    """
+    if not filas:
+        return 0
+
+    dialecto = db.session.get_bind().dialect.name
+    if dialecto in ('sqlite', 'postgresql'):
+        if dialecto == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        sentencia = insert(MensajeSaliente.__table__).values(filas).on_conflict_do_nothing(index_elements=['clave'])
+        return db.session.execute(sentencia).rowcount
+
+    existentes = set(db.session.scalars(
+        db.select(MensajeSaliente.clave).where(MensajeSaliente.clave.in_([f['clave'] for f in filas]))
+    ))
+    nuevas = [f for f in filas if f['clave'] not in existentes]
+    if not nuevas:
+        return 0
+    try:
+        with db.session.begin_nested():
+            db.session.execute(db.insert(MensajeSaliente.__table__), nuevas)
+        return len(nuevas)
+    except IntegrityError:
+        insertadas = 0
+        for fila in nuevas:
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(db.insert(MensajeSaliente.__table__), [fila])
+                insertadas += 1
+            except IntegrityError:
+                pass
+        return insertadas
+
+
+def generar_recordatorios(horas=None, ahora=None, lote=100):
+    """
+    Escribe en la bandeja de salida los recordatorios de las próximas entrevistas.
+
+    Args:
+        horas: Ventana hacia adelante (por defecto RECORDATORIOS_HORAS_ANTES)
+        ahora: Instante de referencia, hora local (por defecto datetime.now())
+        lote: Mensajes por sentencia INSERT
+
+    Returns:
+        int: Número de mensajes nuevos
+    """
+    horas = current_app.config['RECORDATORIOS_HORAS_ANTES'] if horas is None else horas
+    ahora = ahora or datetime.now()
+
+    insertados = 0
+    pendientes = []
+    for fila, inicio in _datos_entrevistas(ahora, ahora + timedelta(hours=horas)):
+        pendientes.extend(_mensajes_entrevista(fila, inicio))
+        if len(pendientes) >= lote:
+            insertados += _insertar_sin_duplicados(pendientes)
+            pendientes = []
+    insertados += _insertar_sin_duplicados(pendientes)
+    db.session.commit()
+    return insertados
+
+
+def reclamar_mensajes(lote=50, ahora=None):
+    """
+    Reclama un lote de mensajes pendientes para este worker.
+
+    El UPDATE vuelve a comprobar el estado, así que si dos workers eligen las
+    mismas filas, cada fila queda con el token de uno solo de ellos.
+
+    Returns:
+        tuple: (token, lista de MensajeSaliente reclamados)
+    """
+    ahora = ahora or datetime.utcnow()
+    limite = ahora - timedelta(seconds=current_app.config['MENSAJES_TIMEOUT_RECLAMO'])
+    max_intentos = current_app.config['MENSAJES_MAX_INTENTOS']
+    abandonado = db.and_(MensajeSaliente.estado == 'enviando', MensajeSaliente.reclamado_en < limite)
+
+    # Los reclamos abandonados que ya agotaron sus intentos no se reintentan más
+    db.session.execute(
+        db.update(MensajeSaliente)
+        .where(abandonado, MensajeSaliente.intentos >= max_intentos)
+        .values(estado='fallido', error='Sin confirmación de envío tras agotar los intentos')
+        .execution_options(synchronize_session=False)
+    )
+
+    disponible = db.and_(
+        MensajeSaliente.intentos < max_intentos,
+        db.or_(MensajeSaliente.estado == 'pendiente', abandonado)
+    )
+
+    ids = db.session.scalars(
+        db.select(MensajeSaliente.id).where(disponible).order_by(MensajeSaliente.id).limit(lote)
+    ).all()
+    if not ids:
+        db.session.commit()
+        return None, []
+
+    token = uuid.uuid4().hex
+    db.session.execute(
+        db.update(MensajeSaliente)
+        .where(MensajeSaliente.id.in_(ids), disponible)
+        .values(estado='enviando', reclamado_por=token, reclamado_en=ahora,
+                intentos=MensajeSaliente.intentos + 1)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+
+    mensajes = db.session.scalars(
+        db.select(MensajeSaliente)
+        .where(MensajeSaliente.reclamado_por == token, MensajeSaliente.estado == 'enviando')
+        .order_by(MensajeSaliente.id)
+    ).all()
+    return token, mensajes
+
+
+def _motivo_descarte(mensaje, entrevistas):
+    """
+    Motivo por el que un recordatorio ya no debe enviarse, o None si sigue vigente.
+
+    Args:
+        mensaje: MensajeSaliente reclamado
+        entrevistas: Diccionario {id: fila con fecha, hora y estado} de las entrevistas del lote
+    """
+    coincidencia = PATRON_CLAVE_RECORDATORIO.match(mensaje.clave)
+    if mensaje.tipo != 'recordatorio' or not coincidencia:
+        return None
+
+    entrevista = entrevistas.get(mensaje.entrevista_id)
+    if entrevista is None:
+        return 'La entrevista ya no existe'
+    if entrevista.estado != 'pendiente':
+        return f"La entrevista está {entrevista.estado}"
+    try:
+        inicio = datetime.combine(entrevista.fecha, datetime.min.time()) + timedelta(minutes=minutos(entrevista.hora))
+    except ValueError:
+        return 'La entrevista tiene una hora inválida'
+    if f"{inicio:%Y-%m-%dT%H:%M}" != coincidencia.group(1):
+        return 'La entrevista se reprogramó'
+    return None
+
+
+def _descartar_obsoletos(token, mensajes):
+    """
+    Descarta los recordatorios cuya entrevista se eliminó, dejó de estar
+    pendiente o cambió de fecha/hora desde que se generaron (un reprogramado
+    tiene su propio recordatorio, con otra clave).
+
+    Returns:
+        set: IDs de los mensajes que siguen vigentes
+    """
+    ids = {m.entrevista_id for m in mensajes if m.tipo == 'recordatorio' and m.entrevista_id}
+    entrevistas = {}
+    if ids:
+        entrevistas = {
+            fila.id: fila for fila in db.session.execute(
+                db.select(Entrevista.id, Entrevista.fecha, Entrevista.hora, Entrevista.estado)
+                .where(Entrevista.id.in_(ids))
+            )
+        }
+
+    # Se evalúan todos antes de resolver: cada commit expira los objetos de la sesión
+    vigentes, descartados = set(), []
+    for mensaje in mensajes:
+        motivo = _motivo_descarte(mensaje, entrevistas)
+        if motivo:
+            descartados.append((mensaje.id, motivo))
+        else:
+            vigentes.add(mensaje.id)
+
+    for mensaje_id, motivo in descartados:
+        _resolver(mensaje_id, token, estado='descartado', error=motivo)
+    return vigentes
+
+
+def _resolver(mensaje_id, token, **valores):
+    """Cierra un mensaje reclamado, sólo si sigue siendo de este worker"""
+    db.session.execute(
+        db.update(MensajeSaliente)
+        .where(MensajeSaliente.id == mensaje_id, MensajeSaliente.reclamado_por == token,
+               MensajeSaliente.estado == 'enviando')
+        .values(**valores)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+
+
+def _liberar_reclamo(token, error):
+    """
+    Devuelve a 'pendiente' los mensajes reclamados por un worker sin gastar su intento.
+
+    Se usa cuando el transporte no se pudo abrir (ej. servidor SMTP caído):
+    no se intentó ningún envío, así que la caída no debe agotar los reintentos.
+    """
+    db.session.execute(
+        db.update(MensajeSaliente)
+        .where(MensajeSaliente.reclamado_por == token, MensajeSaliente.estado == 'enviando')
+        .values(estado='pendiente', reclamado_por=None, reclamado_en=None,
+                intentos=MensajeSaliente.intentos - 1, error=error)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+
+
+def enviar_pendientes(lote=50, despachador_mensajes=None):
+    """
+    Envía los mensajes pendientes de la bandeja de salida.
+
+    Cada mensaje se confirma (enviado o error) en cuanto termina su envío, de
+    modo que un fallo del proceso sólo deja en el aire el mensaje en curso.
+    Si el transporte no se puede abrir, el lote se libera sin gastar sus
+    intentos y se propaga el error.
+
+    Args:
+        lote: Mensajes reclamados por vuelta
+        despachador_mensajes: Transporte a usar (por defecto el de la configuración)
+
+    Returns:
+        dict: Conteo de mensajes enviados y fallidos
+    """
+    despachador_mensajes = despachador_mensajes or crear_despachador()
+    max_intentos = current_app.config['MENSAJES_MAX_INTENTOS']
+    resumen = {'enviados': 0, 'fallidos': 0, 'descartados': 0}
+
+    while True:
+        token, mensajes = reclamar_mensajes(lote)
+        if not mensajes:
+            return resumen
+        reclamados = len(mensajes)
+
+        # Los correos se construyen antes de enviar: cada commit posterior
+        # expira los objetos de la sesión
+        correos = [(m.id, m.clave, m.intentos, construir_correo(m)) for m in mensajes]
+        vigentes = _descartar_obsoletos(token, mensajes)
+        resumen['descartados'] += reclamados - len(vigentes)
+        correos = [c for c in correos if c[0] in vigentes]
+        with ExitStack() as pila:
+            try:
+                pila.enter_context(despachador_mensajes)
+            except Exception as e:
+                current_app.logger.error(f"No se pudo abrir el transporte de mensajes: {str(e)}")
+                _liberar_reclamo(token, str(e)[:1000])
+                raise
+            for mensaje_id, clave, intentos, correo in correos:
+                try:
+                    despachador_mensajes.enviar(correo)
+                except Exception as e:
+                    current_app.logger.error(f"Error al enviar mensaje {clave}: {str(e)}")
+                    _resolver(mensaje_id, token, error=str(e)[:1000],
+                              estado='fallido' if intentos >= max_intentos else 'pendiente')
+                    resumen['fallidos'] += 1
+                    continue
+                _resolver(mensaje_id, token, estado='enviado', enviado_en=datetime.utcnow(), error=None)
+                resumen['enviados'] += 1
+
+        if reclamados < lote:
+            return resumen
+
+
+def construir_correo(mensaje):
+    """
+    Construye el correo de un mensaje de la bandeja de salida.
+
+    El Message-ID es estable para cada clave, así que un reenvío tras una
+    caída se puede identificar como duplicado.
+    """
+    remitente = current_app.config['MENSAJES_REMITENTE']
+    dominio = remitente.rsplit('@', 1)[-1]
+
+    correo = EmailMessage()
+    correo['From'] = remitente
+    correo['To'] = mensaje.destinatario
+    correo['Subject'] = mensaje.asunto
+    correo['Message-ID'] = f"<{hashlib.sha1(mensaje.clave.encode('utf-8')).hexdigest()}@{dominio}>"
+    correo.set_content(mensaje.cuerpo)
+    return correo
+
+
+class Despachador(ABC):
+    """
+    Transporte de mensajes. Se usa como gestor de contexto alrededor de cada
+    lote para que las implementaciones puedan reutilizar una conexión.
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    @abstractmethod
+    def enviar(self, correo):
+        """Envía un correo (EmailMessage); lanza una excepción si falla"""
+
+
+@despachador('log')
+class DespachadorLog(Despachador):
+    """Sólo registra los mensajes en el log (desarrollo)"""
+
+    def enviar(self, correo):
+        current_app.logger.info(f"Mensaje para {correo['To']}: {correo['Subject']}")
+
+
+@despachador('archivo')
+class DespachadorArchivo(Despachador):
+    """
+    Escribe cada mensaje como fichero .eml en un directorio (pruebas).
+
+    El nombre del fichero es el Message-ID, así que un reenvío sobrescribe el
+    mismo fichero en lugar de crear otro.
+    """
+
+    def __init__(self, directorio):
+        self.directorio = directorio
+        os.makedirs(directorio, exist_ok=True)
+
+    def enviar(self, correo):
+        nombre = re.sub(r'[^\w.-]', '_', correo['Message-ID'].strip('<>'))
+        with open(os.path.join(self.directorio, f"{nombre}.eml"), 'wb') as f:
+            f.write(correo.as_bytes())
+
+
+@despachador('smtp')
+class DespachadorSMTP(Despachador):
+    """Envía por SMTP, con una conexión por lote"""
+
+    def __init__(self, host, puerto, usuario=None, password=None, tls=False, timeout=30):
+        self.host = host
+        self.puerto = puerto
+        self.usuario = usuario
+        self.password = password
+        self.tls = tls
+        self.timeout = timeout
+        self._conexion = None
+
+    def __enter__(self):
+        self._conexion = smtplib.SMTP(self.host, self.puerto, timeout=self.timeout)
+        if self.tls:
+            self._conexion.starttls()
+        if self.usuario:
+            self._conexion.login(self.usuario, self.password)
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            self._conexion.quit()
+        except smtplib.SMTPException:
+            pass
+        self._conexion = None
+        return False
+
+    def enviar(self, correo):
+        self._conexion.send_message(correo)
+
+
+def crear_despachador(app=None):
+    """Crea el despachador configurado en MENSAJES_DESPACHADOR"""
+    app = app or current_app
+    nombre = app.config['MENSAJES_DESPACHADOR']
+    if nombre not in _despachadores:
+        raise ValueError(f"Despachador de mensajes desconocido: {nombre}")
+    if nombre == 'archivo':
+        return DespachadorArchivo(app.config['MENSAJES_DIRECTORIO'])
+    if nombre == 'smtp':
+        return DespachadorSMTP(
+            app.config['SMTP_HOST'], app.config['SMTP_PUERTO'],
+            usuario=app.config.get('SMTP_USUARIO'), password=app.config.get('SMTP_PASSWORD'),
+            tls=app.config['SMTP_TLS']
+        )
+    return _despachadores[nombre]()
+
+
+def ciclo_recordatorios():
+    """Ejecución periódica: genera los recordatorios nuevos y envía la bandeja de salida"""
+    generados = generar_recordatorios()
+    resumen = enviar_pendientes()
+    if generados or any(resumen.values()):
+        current_app.logger.info(f"Recordatorios: {generados} generados, {resumen}")
+    return {'generados': generados, **resumen}
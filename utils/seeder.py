@@ -0,0 +1,281 @@
+import os
+import uuid
+import random
+import hashlib
+from datetime import datetime, timedelta
+import bcrypt
+from models import db
+from models.usuario import Usuario
+from models.recluta import Recluta
+from models.entrevista import Entrevista
+from models.documento import Documento
+from utils.almacenamiento import ruta_contenido, ruta_absoluta, registrar_referencias
+from utils.historial import reconstruir_historial
+
+NOMBRES = [
+    'Ana', 'Luis', 'María', 'José', 'Carmen', 'Juan', 'Laura', 'Carlos', 'Sofía', 'Miguel',
+    'Lucía', 'Jorge', 'Valeria', 'Diego', 'Fernanda', 'Ricardo', 'Daniela', 'Alejandro',
+    'Gabriela', 'Fernando', 'Paola', 'Roberto', 'Andrea', 'Javier', 'Mariana', 'Héctor'
+]
+
+APELLIDOS = [
+    'García', 'Hernández', 'Martínez', 'López', 'González', 'Pérez', 'Rodríguez', 'Sánchez',
+    'Ramírez', 'Cruz', 'Flores', 'Gómez', 'Morales', 'Vázquez', 'Reyes', 'Jiménez',
+    'Torres', 'Díaz', 'Gutiérrez', 'Ruiz', 'Mendoza', 'Aguilar', 'Ortiz', 'Castillo'
+]
+
+PUESTOS = [
+    'Asesor de ventas', 'Ejecutivo de cuenta', 'Agente de atención a clientes',
+    'Supervisor de piso', 'Promotor', 'Analista de cobranza', 'Capturista', None
+]
+
+# Pesos aproximados de la distribución de estados observada en producción
+ESTADOS_RECLUTA = [('En proceso', 6), ('Activo', 3), ('Rechazado', 2)]
+ESTADOS_ENTREVISTA = [('pendiente', 5), ('completada', 4), ('cancelada', 1)]
+TIPOS_ENTREVISTA = ['presencial', 'virtual', 'telefonica']
+DURACIONES_ENTREVISTA = [30, 60, 60, 90, 120]
+HORAS_ENTREVISTA = [f"{h:02d}:{m:02d}" for h in range(9, 18) for m in (0, 30)]
+
+# PDF mínimo válido que se usa como contenido de los archivos de ejemplo
+PDF_PLACEHOLDER = (
+    b"%PDF-1.4\n1 0 obj<</Type/Catalog/Pages 2 0 R>>endobj\n"
+    b"2 0 obj<</Type/Pages/Kids[3 0 R]/Count 1>>endobj\n"
+    b"3 0 obj<</Type/Page/Parent 2 0 R/MediaBox[0 0 612 792]>>endobj\n"
+    b"trailer<</Root 1 0 R>>\n%%EOF\n"
+)
+
+
+def _elegir_ponderado(rng, opciones):
+    """Elige un valor de una lista de tuplas (valor, peso)"""
+    valores, pesos = zip(*opciones)
+    return rng.choices(valores, weights=pesos, k=1)[0]
+
+
+def _siguiente_id(modelo):
+    """Obtiene el siguiente ID libre de una tabla"""
+    max_id = db.session.query(db.func.max(modelo.id)).scalar()
+    return (max_id or 0) + 1
+
+
+def _ajustar_secuencias(*modelos):
+    """
+    Adelanta las secuencias de PostgreSQL tras insertar IDs explícitos.
+
+    Los reclutas y asesores se insertan con el ID ya calculado (las filas
+    dependientes lo necesitan) y eso no avanza la secuencia: sin ajustarla,
+    los siguientes INSERT del ORM chocarían con IDs existentes. SQLite toma
+    el siguiente ID del máximo de la tabla y no lo necesita.
+    """
+    if db.session.get_bind().dialect.name != 'postgresql':
+        return
+    for modelo in modelos:
+        tabla = modelo.__table__.name
+        db.session.execute(
+            db.text(f"SELECT setval(pg_get_serial_sequence('{tabla}', 'id'), "
+                    f"(SELECT COALESCE(MAX(id), 1) FROM {tabla}))")
+        )
+    db.session.commit()
+
+
+def _insertar_por_lotes(tabla, filas, chunk_size):
+    """
+    Inserta filas con INSERT masivo de Core, una transacción por lote.
+
+    Args:
+        tabla: Objeto Table de SQLAlchemy
+        filas: Iterable de diccionarios con los valores a insertar
+        chunk_size: Número de filas por transacción
+
+    Returns:
+        int: Número total de filas insertadas
+    """
+    total = 0
+    lote = []
+    for fila in filas:
+        lote.append(fila)
+        if len(lote) >= chunk_size:
+            with db.engine.begin() as conn:
+                conn.execute(tabla.insert(), lote)
+            total += len(lote)
+            lote = []
+    if lote:
+        with db.engine.begin() as conn:
+            conn.execute(tabla.insert(), lote)
+        total += len(lote)
+    return total
+
+
+def _generar_asesores(rng, cantidad, primer_id, password_hash):
+    """Genera filas de usuarios con rol asesor"""
+    for i in range(cantidad):
+        numero = primer_id + i
+        nombre = f"{rng.choice(NOMBRES)} {rng.choice(APELLIDOS)}"
+        yield {
+            'id': numero,
+            'email': f"asesor{numero}@seed.example.com",
+            'password_hash': password_hash,
+            'nombre': nombre,
+            'telefono': f"55{rng.randint(10000000, 99999999)}",
+            'is_active': True,
+            'created_at': datetime.utcnow(),
+            'rol': 'asesor'
+        }
+
+
+def _generar_reclutas(rng, cantidad, primer_id, asesor_ids, ahora):
+    """Genera filas de reclutas con datos realistas"""
+    for i in range(cantidad):
+        recluta_id = primer_id + i
+        nombre = rng.choice(NOMBRES)
+        apellido = rng.choice(APELLIDOS)
+        fecha_registro = ahora - timedelta(days=rng.randint(0, 365), minutes=rng.randint(0, 1439))
+        yield {
+            'id': recluta_id,
+            'nombre': f"{nombre} {apellido} {rng.choice(APELLIDOS)}",
+            'email': f"{nombre}.{apellido}.{recluta_id}@seed.example.com".lower(),
+            'telefono': f"55{rng.randint(10000000, 99999999)}",
+            'estado': _elegir_ponderado(rng, ESTADOS_RECLUTA),
+            'puesto': rng.choice(PUESTOS),
+            'notas': None if rng.random() < 0.7 else 'Registro generado para pruebas de carga.',
+            'folio': f"SEED-{recluta_id:010d}",
+            'foto_url': None,
+            'fecha_registro': fecha_registro,
+            'ultima_actualizacion': min(fecha_registro + timedelta(days=rng.randint(0, 30)), ahora),
+            'asesor_id': rng.choice(asesor_ids) if asesor_ids else None
+        }
+
+
+def _generar_entrevistas(rng, recluta_ids, por_recluta, hoy, ahora):
+    """Genera filas de entrevistas para cada recluta"""
+    for recluta_id in recluta_ids:
+        for _ in range(por_recluta):
+            fecha = hoy + timedelta(days=rng.randint(-60, 60))
+            estado = 'pendiente' if fecha >= hoy else _elegir_ponderado(rng, ESTADOS_ENTREVISTA)
+            tipo = rng.choice(TIPOS_ENTREVISTA)
+            yield {
+                'recluta_id': recluta_id,
+                'fecha': fecha,
+                'hora': rng.choice(HORAS_ENTREVISTA),
+                'duracion': rng.choice(DURACIONES_ENTREVISTA),
+                'tipo': tipo,
+                'ubicacion': f"Sala {rng.randint(1, 5)}" if tipo == 'presencial' else None,
+                'notas': None,
+                'estado': estado,
+                'fecha_creacion': ahora,
+                'ultima_actualizacion': ahora
+            }
+
+
+def _generar_documentos(rng, recluta_ids, por_recluta, ruta, ahora):
+    """Genera filas de documentos PDF para cada recluta, todas con el mismo contenido"""
+    for recluta_id in recluta_ids:
+        for n in range(1, por_recluta + 1):
+            yield {
+                'recluta_id': recluta_id,
+                'nombre': f"documento_{n}.pdf",
+                'url': ruta,
+                'tipo': 'pdf',
+                'tamaño': len(PDF_PLACEHOLDER),
+                'fecha_subida': ahora - timedelta(days=rng.randint(0, 90)),
+                'estado': 'listo',
+                'paginas': 1
+            }
+
+
+def _crear_archivo_placeholder(ruta):
+    """
+    Crea en disco el PDF de ejemplo compartido por los documentos generados.
+
+    Returns:
+        int: 1 si se creó, 0 si ya existía
+    """
+    destino = ruta_absoluta(ruta)
+    if os.path.exists(destino):
+        return 0
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    temporal = f"{destino}.{uuid.uuid4().hex}.tmp"
+    with open(temporal, 'wb') as f:
+        f.write(PDF_PLACEHOLDER)
+    os.replace(temporal, destino)
+    return 1
+
+
+def sembrar_datos(reclutas=1000, entrevistas_por_recluta=1, asesores=5, documentos=0,
+                  semilla=42, chunk_size=5000, crear_archivos=False, log=print):
+    """
+    Genera un conjunto de datos sintético y determinista para pruebas de carga.
+
+    Los datos se insertan con INSERT masivos de Core en transacciones por lote,
+    sin construir objetos ORM, para que volúmenes de millones de filas sean viables.
+
+    Args:
+        reclutas: Número de reclutas a generar
+        entrevistas_por_recluta: Entrevistas por cada recluta
+        asesores: Número de usuarios asesores a generar
+        documentos: Documentos PDF por cada recluta
+        semilla: Semilla del generador aleatorio (misma semilla, mismos datos)
+        chunk_size: Filas por transacción
+        crear_archivos: Si es True, crea en disco el PDF de ejemplo (compartido por todos los documentos)
+        log: Función usada para reportar el progreso
+
+    Returns:
+        dict: Número de filas creadas por tabla
+    """
+    rng = random.Random(semilla)
+    ahora = datetime.utcnow().replace(microsecond=0)
+    hoy = ahora.date()
+    resultado = {}
+
+    # Un solo hash de contraseña compartido: bcrypt por usuario dominaría el tiempo total
+    password_hash = bcrypt.hashpw(b'asesor123', bcrypt.gensalt()).decode('utf-8')
+
+    primer_asesor = _siguiente_id(Usuario)
+    resultado['asesores'] = _insertar_por_lotes(
+        Usuario.__table__,
+        _generar_asesores(rng, asesores, primer_asesor, password_hash),
+        chunk_size
+    )
+    asesor_ids = list(range(primer_asesor, primer_asesor + asesores))
+    log(f"Asesores creados: {resultado['asesores']}")
+
+    primer_recluta = _siguiente_id(Recluta)
+    resultado['reclutas'] = _insertar_por_lotes(
+        Recluta.__table__,
+        _generar_reclutas(rng, reclutas, primer_recluta, asesor_ids, ahora),
+        chunk_size
+    )
+    recluta_ids = range(primer_recluta, primer_recluta + reclutas)
+    _ajustar_secuencias(Usuario, Recluta)
+    log(f"Reclutas creados: {resultado['reclutas']}")
+
+    # Historial de estados aproximado de los reclutas generados (alta y cambio al estado actual)
+    resultado['historial'] = reconstruir_historial()
+    db.session.commit()
+    log(f"Historial de estados creado: {resultado['historial']}")
+
+    resultado['entrevistas'] = _insertar_por_lotes(
+        Entrevista.__table__,
+        _generar_entrevistas(rng, recluta_ids, entrevistas_por_recluta, hoy, ahora),
+        chunk_size
+    )
+    log(f"Entrevistas creadas: {resultado['entrevistas']}")
+
+    # Los documentos comparten un solo archivo almacenado por contenido, con
+    # su registro de Archivo contando todas las referencias
+    sha256 = hashlib.sha256(PDF_PLACEHOLDER).hexdigest()
+    ruta = ruta_contenido('documentos', sha256, 'pdf')
+    resultado['documentos'] = _insertar_por_lotes(
+        Documento.__table__,
+        _generar_documentos(rng, recluta_ids, documentos, ruta, ahora),
+        chunk_size
+    )
+    if resultado['documentos']:
+        registrar_referencias(sha256, ruta, len(PDF_PLACEHOLDER), resultado['documentos'])
+        db.session.commit()
+    log(f"Documentos creados: {resultado['documentos']}")
+
+    if crear_archivos and documentos:
+        resultado['archivos'] = _crear_archivo_placeholder(ruta)
+        log(f"Archivos de ejemplo creados: {resultado['archivos']}")
+
+    return resultado
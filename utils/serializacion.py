@@ -0,0 +1,60 @@
+"""
+Proveedor JSON de la aplicación.
+
+Usa orjson si está instalado y, si no, el módulo json estándar. En ambos
+casos las fechas se serializan en ISO 8601, por lo que los modelos pueden
+entregar objetos datetime/date sin convertirlos a mano.
+"""
+import uuid
+import decimal
+from datetime import date, datetime, time
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependencia opcional
+    orjson = None
+
+
+def _default(obj):
+    """Convierte los tipos que el codificador no soporta de forma nativa"""
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    if isinstance(obj, (decimal.Decimal, uuid.UUID)):
+        return str(obj)
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    raise TypeError(f"Objeto de tipo {type(obj).__name__} no serializable a JSON")
+
+
+class ProveedorJSON(DefaultJSONProvider):
+    """
+    Proveedor JSON rápido: orjson cuando está disponible, json estándar si no.
+
+    Las respuestas se generan directamente en bytes con orjson. Si se pasan
+    opciones propias de json.dumps (indent, sort_keys...), se usa siempre el
+    módulo estándar para respetarlas.
+    """
+    default = staticmethod(_default)
+    sort_keys = False
+
+    # Permitir claves no string (ej. IDs enteros en diccionarios agrupados por recluta)
+    OPCIONES_ORJSON = orjson.OPT_NON_STR_KEYS if orjson else 0
+
+    def dumps(self, obj, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.dumps(obj, default=_default, option=self.OPCIONES_ORJSON).decode('utf-8')
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        if orjson is None or self._app.debug:
+            return super().response(*args, **kwargs)
+
+        obj = self._prepare_response_obj(args, kwargs)
+        datos = orjson.dumps(obj, default=_default, option=self.OPCIONES_ORJSON)
+        return self._app.response_class(datos, mimetype=self.mimetype)
@@ -0,0 +1,245 @@
+import json
+import threading
+import traceback
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app, has_request_context
+from flask_login import current_user
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from models import db
+from models.tarea import Tarea
+
+# Manejadores registrados: tipo de tarea -> función
+_manejadores = {}
+
+# Clave en session.info con los IDs de tareas a despachar tras el commit
+CLAVE_PENDIENTES = 'tareas_pendientes'
+
+# Tarea que se está ejecutando en cada hilo del pool (para reportar_progreso)
+_contexto = threading.local()
+
+
+def tarea(tipo):
+    """
+    Decorador que registra una función como manejador de un tipo de tarea.
+
+    El manejador recibe como argumentos con nombre los parámetros con los que
+    se encoló la tarea y se ejecuta dentro de un contexto de aplicación.
+    Su valor de retorno (serializable a JSON) se guarda como resultado.
+    """
+    def decorador(f):
+        _manejadores[tipo] = f
+        return f
+    return decorador
+
+
+def init_app(app):
+    """
+    Crea el pool de hilos de la aplicación.
+
+    La recuperación de tareas interrumpidas (recuperar_tareas) se hace al
+    inicializar la base de datos, cuando la tabla ya existe.
+    """
+    app.config.setdefault('TAREAS_MAX_WORKERS', 4)
+    app.config.setdefault('TAREAS_TIMEOUT', 600)
+    app.config.setdefault('TAREAS_SINCRONAS', False)
+
+    app.extensions['tareas'] = ThreadPoolExecutor(
+        max_workers=app.config['TAREAS_MAX_WORKERS'],
+        thread_name_prefix='tareas'
+    )
+
+
+def encolar(tipo, **parametros):
+    """
+    Registra una tarea en la sesión actual.
+
+    La tarea se guarda con el mismo commit que los datos de la petición y sólo
+    se despacha al pool cuando ese commit se completa; si hay rollback, se descarta.
+    Si se encola durante una petición autenticada, queda a nombre de ese usuario.
+
+    Args:
+        tipo: Tipo de tarea (debe tener un manejador registrado)
+        **parametros: Parámetros serializables a JSON para el manejador
+
+    Returns:
+        Tarea: Registro de la tarea (con ID asignado)
+    """
+    if tipo not in _manejadores:
+        raise ValueError(f"Tipo de tarea desconocido: {tipo}")
+
+    usuario_id = current_user.id if has_request_context() and current_user.is_authenticated else None
+    nueva = Tarea(tipo=tipo, parametros=json.dumps(parametros), usuario_id=usuario_id)
+    db.session.add(nueva)
+    db.session.flush()
+    db.session.info.setdefault(CLAVE_PENDIENTES, []).append(nueva.id)
+    return nueva
+
+
+def despachar(app, tarea_id):
+    """Envía una tarea al pool (o la ejecuta en línea si TAREAS_SINCRONAS)"""
+    if app.config.get('TAREAS_SINCRONAS'):
+        ejecutar_tarea(app, tarea_id)
+    else:
+        app.extensions['tareas'].submit(ejecutar_tarea, app, tarea_id)
+
+
+def ejecutar_tarea(app, tarea_id):
+    """
+    Ejecuta una tarea en un contexto de aplicación propio.
+
+    La tarea se reclama con un UPDATE condicional, de modo que aunque varios
+    procesos la recuperen a la vez, sólo uno la ejecuta.
+    """
+    with app.app_context():
+        reclamada = db.session.execute(
+            db.update(Tarea)
+            .where(Tarea.id == tarea_id, Tarea.estado == 'pendiente')
+            .values(estado='en_proceso', fecha_inicio=datetime.utcnow(), intentos=Tarea.intentos + 1)
+        ).rowcount
+        db.session.commit()
+        if not reclamada:
+            return
+
+        registro = db.session.get(Tarea, tarea_id)
+        manejador = _manejadores.get(registro.tipo)
+        _contexto.tarea_id = tarea_id
+        _contexto.intentos = registro.intentos
+        try:
+            if manejador is None:
+                raise ValueError(f"Tipo de tarea desconocido: {registro.tipo}")
+            resultado = manejador(**json.loads(registro.parametros or '{}'))
+            registro.estado = 'completada'
+            registro.resultado = json.dumps(resultado)
+            registro.progreso = 100
+        except Exception as e:
+            db.session.rollback()
+            app.logger.error(f"Error en tarea {tarea_id} ({registro.tipo}): {str(e)}")
+            registro = db.session.get(Tarea, tarea_id)
+            registro.estado = 'fallida'
+            registro.error = ''.join(traceback.format_exception_only(type(e), e)).strip()
+        finally:
+            _contexto.tarea_id = None
+
+        registro.fecha_fin = datetime.utcnow()
+        db.session.commit()
+
+
+def reportar_progreso(porcentaje):
+    """
+    Guarda el avance de la tarea en ejecución para que el cliente lo consulte.
+
+    Se escribe con una conexión propia, así que no confirma ni interfiere con
+    la transacción del manejador. En SQLite conviene llamarla fuera de una
+    transacción de escritura del manejador (la base se bloquea por completo).
+    Fuera de una tarea no hace nada.
+
+    Args:
+        porcentaje: Avance de 0 a 100
+    """
+    tarea_id = getattr(_contexto, 'tarea_id', None)
+    if tarea_id is None:
+        return
+    with db.engine.begin() as conexion:
+        conexion.execute(
+            db.update(Tarea).where(Tarea.id == tarea_id).values(progreso=max(0, min(100, int(porcentaje))))
+        )
+
+
+def completar_tarea():
+    """
+    Marca como completada la tarea en ejecución dentro de la transacción del manejador.
+
+    Para manejadores que no son idempotentes: al confirmar sus cambios en el
+    mismo commit, una tarea interrumpida después ya no se vuelve a ejecutar
+    al recuperarla. El UPDATE sólo aplica si la tarea sigue en proceso con el
+    mismo intento; si no, otro proceso la recuperó y el manejador debe
+    descartar sus cambios.
+
+    Returns:
+        bool: True si la tarea quedó marcada (o si no se está en una tarea)
+    """
+    tarea_id = getattr(_contexto, 'tarea_id', None)
+    if tarea_id is None:
+        return True
+    return bool(db.session.execute(
+        db.update(Tarea)
+        .where(Tarea.id == tarea_id, Tarea.estado == 'en_proceso', Tarea.intentos == _contexto.intentos)
+        .values(estado='completada', progreso=100, fecha_fin=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    ).rowcount)
+
+
+def recuperar_tareas(app):
+    """
+    Vuelve a despachar las tareas pendientes y las que quedaron en proceso
+    más tiempo que TAREAS_TIMEOUT (su proceso probablemente murió).
+
+    Returns:
+        int: Número de tareas despachadas
+    """
+    limite = datetime.utcnow() - timedelta(seconds=app.config['TAREAS_TIMEOUT'])
+    db.session.execute(
+        db.update(Tarea)
+        .where(Tarea.estado == 'en_proceso', Tarea.fecha_inicio < limite)
+        .values(estado='pendiente')
+    )
+    db.session.commit()
+
+    ids = db.session.scalars(
+        db.select(Tarea.id).where(Tarea.estado == 'pendiente').order_by(Tarea.id)
+    ).all()
+    for tarea_id in ids:
+        despachar(app, tarea_id)
+    if ids:
+        app.logger.info(f"Tareas pendientes recuperadas: {len(ids)}")
+    return len(ids)
+
+
+def programar_periodica(app, nombre, intervalo, funcion):
+    """
+    Ejecuta una función periódicamente en un hilo demonio.
+
+    Cada ejecución corre en su propio contexto de aplicación; un error se
+    registra en el log y no detiene las ejecuciones siguientes.
+
+    Args:
+        app: Aplicación Flask
+        nombre: Nombre descriptivo (para el hilo y los logs)
+        intervalo: Segundos entre ejecuciones
+        funcion: Función sin argumentos a ejecutar
+
+    Returns:
+        threading.Event: Evento que detiene el ciclo al activarse
+    """
+    detener = threading.Event()
+
+    def ciclo():
+        while not detener.wait(intervalo):
+            with app.app_context():
+                try:
+                    funcion()
+                except Exception as e:
+                    db.session.rollback()
+                    app.logger.error(f"Error en tarea periódica {nombre}: {str(e)}")
+
+    threading.Thread(target=ciclo, name=f"periodica-{nombre}", daemon=True).start()
+    app.extensions.setdefault('tareas_periodicas', {})[nombre] = detener
+    return detener
+
+
+@event.listens_for(Session, 'after_commit')
+def _despachar_tras_commit(session):
+    """Despacha las tareas encoladas en una sesión una vez confirmado el commit"""
+    ids = session.info.pop(CLAVE_PENDIENTES, None)
+    if ids:
+        app = current_app._get_current_object()
+        for tarea_id in ids:
+            despachar(app, tarea_id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _descartar_tras_rollback(session):
+    """Descarta las tareas encoladas si la transacción se revierte"""
+    session.info.pop(CLAVE_PENDIENTES, None)